@@ -34,6 +34,9 @@ class handler(BaseHTTPRequestHandler):
                 'CONTENT_LENGTH': '',
                 'SERVER_NAME': 'localhost',
                 'SERVER_PORT': '80',
+                # Adresse du client pour la limitation de débit (voir BLOG_RATELIMIT_TRUST_FORWARDED_FOR)
+                'REMOTE_ADDR': self.client_address[0] if self.client_address else '',
+                'HTTP_X_FORWARDED_FOR': self.headers.get('X-Forwarded-For', ''),
                 'wsgi.version': (1, 0),
                 'wsgi.url_scheme': 'https',
                 'wsgi.input': io.StringIO(),
@@ -7,7 +7,8 @@ from .models import User
 class UserAdmin(BaseUserAdmin):
     model = User
 
-    list_display = ('email', 'first_name', 'last_name', 'date_joined')
+    list_display = ('email', 'first_name', 'last_name', 'date_joined', 'post_count', 'likes_received', 'last_post_at')
+    readonly_fields = ('post_count', 'likes_received', 'last_post_at')
     ordering = ('email',)
 
     fieldsets = (
@@ -15,6 +16,7 @@ class UserAdmin(BaseUserAdmin):
         (_("Informations personnelles"), {"fields": ("first_name", "last_name", "biography", "profile_picture")}),
         (_("Permissions"), {"fields": ("is_active", "is_staff", "is_superuser", "groups", "user_permissions")}),
         (_("Dates importantes"), {"fields": ("last_login", "date_joined")}),
+        (_("Statistiques"), {"fields": ("post_count", "likes_received", "last_post_at")}),
     )
 
     add_fieldsets = (
@@ -1,6 +1,6 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models.functions import Lower
 
 User = get_user_model()
 
@@ -16,16 +16,13 @@ class EmailBackend(ModelBackend):
         if email is None or password is None:
             return None
         
+        # Recherche insensible à la casse sur LOWER(email), unique (auth_user_email_lower_uniq)
         try:
-            # Chercher l'utilisateur par email
-            user = User.objects.get(Q(email=email))
+            user = User.objects.alias(email_lower=Lower('email')).get(email_lower=email.lower())
         except User.DoesNotExist:
             # Exécuter le hashage du mot de passe pour éviter les attaques de timing
             User().set_password(password)
             return None
-        except User.MultipleObjectsReturned:
-            # Si plusieurs utilisateurs ont le même email, prendre le premier
-            user = User.objects.filter(Q(email=email)).first()
         
         # Vérifier le mot de passe
         if user.check_password(password) and self.user_can_authenticate(user):
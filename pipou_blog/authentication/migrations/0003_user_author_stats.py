@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:49
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_author_stats(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    Post = apps.get_model('blog', 'Post')
+    Like = apps.get_model('blog', 'Like')
+    posts = Post.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    likes = Like.objects.filter(post__user=OuterRef('pk')).order_by().values('post__user')
+    User.objects.update(
+        post_count=Coalesce(Subquery(posts.annotate(total=Count('id')).values('total')), 0),
+        likes_received=Coalesce(Subquery(likes.annotate(total=Count('id')).values('total')), 0),
+        last_post_at=Subquery(posts.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_user_username'),
+        ('blog', '0012_trendingscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Dernier post'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='likes_received',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Likes reçus'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de posts'),
+        ),
+        migrations.RunPython(backfill_author_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:54
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+from pipou_blog.operations import AddConstraintConcurrently
+
+
+def check_email_duplicates(apps, schema_editor):
+    """Refuse la migration tant que des comptes partagent un email à la casse près"""
+    User = apps.get_model('authentication', 'User')
+    duplicates = list(
+        User.objects.annotate(email_lower=Lower('email'))
+        .values('email_lower')
+        .annotate(accounts=Count('pk'))
+        .filter(accounts__gt=1)
+        .values_list('email_lower', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Emails en double à la casse près, à fusionner ou corriger avant la migration : "
+            + ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    # CREATE UNIQUE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0003_user_author_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_email_duplicates, migrations.RunPython.noop),
+        AddConstraintConcurrently(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='auth_user_email_lower_uniq', violation_error_message='Un compte utilise déjà cet email.'),
+        ),
+    ]
@@ -1,6 +1,12 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 
+# Statistiques d'auteur dénormalisées, tenues à jour par blog.signals
+# (voir blog.author_stats et la commande recount_author_stats)
+STATS_FIELDS = ('post_count', 'likes_received', 'last_post_at')
+
+
 class User(AbstractUser):
     profile_picture = models.ImageField(
         upload_to='profile_pictures/',
@@ -13,6 +19,10 @@ class User(AbstractUser):
     biography = models.TextField(max_length=500, null=True, blank=True, verbose_name='Biographie')
     email = models.EmailField(unique=True)
 
+    post_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de posts')
+    likes_received = models.PositiveIntegerField(default=0, editable=False, verbose_name='Likes reçus')
+    last_post_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Dernier post')
+
     # Annule le champ par défaut username
     #username = None
 
@@ -25,6 +35,24 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'Utilisateur-rice'
         verbose_name_plural = 'Utilisateur-rices'
+        # Email unique sans tenir compte de la casse ; l'index couvre aussi la
+        # recherche à la connexion (voir EmailBackend)
+        constraints = [
+            models.UniqueConstraint(
+                Lower('email'), name='auth_user_email_lower_uniq',
+                violation_error_message="Un compte utilise déjà cet email.",
+            ),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.email})"
+
+    def save(self, *args, **kwargs):
+        # Les statistiques ne s'écrivent que par update() avec F() : une sauvegarde
+        # complète (profil, admin) écraserait les mises à jour concurrentes
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in STATS_FIELDS
+            ]
+        super().save(*args, **kwargs)
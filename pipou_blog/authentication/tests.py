@@ -4,6 +4,9 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.conf import settings
 from authentication.forms import RegisterForm
+from authentication.backends import EmailBackend
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
@@ -118,6 +121,20 @@ class RegisterViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(User.objects.filter(email='valentinb@test.fr').count(), 1)
 
+    def test_register_page_duplicate_email_other_case(self):
+        # Un email ne diffère pas par la casse : le second compte est refusé
+
+        User.objects.create_user(
+            username='existing_user',
+            email='valentinb@test.fr',
+            password='password123'
+        )
+        response = self.client.post(self.register_url, {**self.valid_user_data, 'email': 'ValentinB@Test.fr'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Un compte utilise déjà cet email.')
+        self.assertEqual(User.objects.count(), 1)
+
     def test_register_page_post_empty_data(self):
         # On teste l'inscription avec des données vides
 
@@ -142,3 +159,34 @@ class RegisterViewTest(TestCase):
         # Vérifier que chaque champ obligatoire a une erreur
         for field in expected_required_fields:            
             self.assertIn(field, form.errors)
+
+
+class EmailBackendTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='Valentin', email='valentinb@test.fr', password='1234valb',
+            first_name='Valentin', last_name='B',
+        )
+
+    def test_authenticate_ignores_email_case(self):
+        user = EmailBackend().authenticate(None, username='ValentinB@Test.FR', password='1234valb')
+        self.assertEqual(user, self.user)
+
+    def test_authenticate_rejects_wrong_password(self):
+        self.assertIsNone(EmailBackend().authenticate(None, username='valentinb@test.fr', password='faux'))
+        self.assertIsNone(EmailBackend().authenticate(None, username='inconnu@test.fr', password='1234valb'))
+
+    def test_authenticate_uses_lower_email_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            EmailBackend().authenticate(None, username='valentinb@test.fr', password='1234valb')
+        sql = queries.captured_queries[0]['sql']
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql)
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = str(cursor.fetchall())
+        self.assertIn('auth_user_email_lower_uniq', plan)
@@ -13,8 +13,14 @@ from django.urls import reverse_lazy
 from . import forms
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import get_user_model
+from blog.ratelimit import ratelimit
+
+def submits_credentials(request):
+    """Seules les tentatives de connexion (avec mot de passe) déclenchent un hachage"""
+    return bool(request.POST.get('password') or request.GET.get('password'))
 
 # NOUVELLE VUE DE CONNEXION SIMPLE QUI FONCTIONNE
+@ratelimit('login', applies=submits_credentials)
 def custom_login_view(request):
     """Vue de connexion simple et fonctionnelle - AVEC SUPPORT GET POUR VERCEL"""
     if request.user.is_authenticated:
@@ -71,6 +77,7 @@ class CustomLoginView(LoginView):
         messages.error(self.request, 'Erreur de connexion. Vérifiez vos identifiants.')
         return self.render_to_response(self.get_context_data(form=form))
 
+@ratelimit('register', applies=lambda request: request.method == 'POST')
 def register_page(request):
     form = forms.RegisterForm()
     if request.method == 'POST':
@@ -0,0 +1,23 @@
+"""
+Mesures de performance des vues et méthodes les plus sollicitées.
+
+Chaque cas (voir `benchmarks.cases`) est exécuté sur des jeux de données
+synthétiques de plusieurs tailles (`blog.synthetic`), dans une base de test
+créée pour l'occasion : SQLite, ou PostgreSQL si `DATABASE_URL` est défini
+(voir `pipou_blog.test_settings`). Pour chaque cas et chaque taille :
+
+- `p50_ms` / `p95_ms` : durées médiane et 95e centile ;
+- `queries` : nombre de requêtes SQL d'un appel ;
+- `alloc_peak_kib` : pic de mémoire allouée pendant un appel (tracemalloc).
+
+Usage, depuis le dossier `pipou_blog/` :
+
+    python -m benchmarks --sizes 100 1000 10000
+    python -m benchmarks --save-baseline     # remplace la référence du moteur courant
+
+Les résultats sont écrits en JSON (`--output`) et comparés à la référence
+enregistrée (`benchmarks/baseline.json`). Le code de sortie vaut 1 en cas de
+régression. Les durées dépendent de la machine : la référence doit être
+produite sur celle qui exécute la comparaison ; les nombres de requêtes, eux,
+sont comparables partout.
+"""
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Mesures de performance de PipouBlog")
+    parser.add_argument('--settings', default='pipou_blog.test_settings', help="Module de réglages Django")
+    parser.add_argument('--sizes', type=int, nargs='+', help="Nombres de posts des jeux de données")
+    parser.add_argument('--iterations', type=int, help="Nombre d'appels chronométrés par cas")
+    parser.add_argument('--cases', nargs='+', help="Cas à mesurer (tous par défaut)")
+    parser.add_argument('--output', default='benchmark-results.json', help="Fichier JSON des résultats")
+    parser.add_argument('--baseline', help="Référence à comparer (benchmarks/baseline.json par défaut)")
+    parser.add_argument(
+        '--compare-timings', action='store_true',
+        help="Compare aussi durées et allocations, à une référence mesurée sur la même machine (--baseline)",
+    )
+    parser.add_argument('--tolerance', type=float, help="Écart relatif toléré sur les durées et les allocations")
+    parser.add_argument('--save-baseline', action='store_true', help="Enregistre les nombres de requêtes comme référence")
+    options = parser.parse_args(argv)
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = options.settings
+    import django
+    django.setup()
+
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    from benchmarks import runner
+
+    baseline_path = options.baseline or runner.BASELINE_PATH
+    iterations = options.iterations or runner.DEFAULT_ITERATIONS
+
+    # Base de test jetable : les données synthétiques n'atteignent jamais la base configurée
+    setup_test_environment(debug=False)
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        results = runner.run_suite(options.sizes or runner.DEFAULT_SIZES, iterations, options.cases)
+        current = runner.report(results, iterations)
+    finally:
+        teardown_databases(databases, verbosity=0)
+        teardown_test_environment()
+
+    runner.save(current, options.output)
+    baseline = runner.load(baseline_path)
+    if options.save_baseline:
+        runner.save(runner.merge_baseline(baseline, current), baseline_path)
+        print(f"Référence enregistrée dans {baseline_path}")
+        return 0
+
+    regressions = runner.compare(
+        current, baseline, options.tolerance or runner.DEFAULT_TOLERANCE, timings=options.compare_timings
+    )
+    for vendor, name, size, metric, reference, measured in regressions:
+        print(f"RÉGRESSION {vendor} {name} ({size} posts) : {metric} {reference} -> {measured}")
+    if not regressions:
+        print("Aucune régression par rapport à la référence.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Cas mesurés. Chaque cas reçoit le `Dataset` courant et retourne la fonction à
+chronométrer (un appel = une requête ou une opération). Les cas sont exécutés
+dans l'ordre de déclaration : les lectures d'abord, les écritures ensuite.
+"""
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.template.response import TemplateResponse
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from authentication.backends import EmailBackend
+from blog.models import Post
+from blog.synthetic import SYNTHETIC_PASSWORD
+from blog.views import BlogHome
+
+User = get_user_model()
+
+CASES = {}
+
+
+def case(name):
+    def register(factory):
+        CASES[name] = factory
+        return factory
+    return register
+
+
+@dataclass
+class Dataset:
+    """Objets de référence d'un jeu de données : le post le plus liké, l'auteur le plus prolifique"""
+    viewer: User
+    author: User
+    post: Post
+
+    @classmethod
+    def load(cls):
+        return cls(
+            viewer=User.objects.order_by('pk').first(),
+            author=User.objects.order_by('-post_count', 'pk').first(),
+            post=Post.objects.order_by('-likes_count', 'pk').first(),
+        )
+
+    def client(self):
+        """Client connecté : les visiteurs anonymes seraient servis par le cache de pages"""
+        client = Client()
+        client.force_login(self.viewer)
+        return client
+
+
+def get(client, url):
+    def call():
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+    return call
+
+
+@case('blog_home')
+def blog_home(dataset):
+    return get(dataset.client(), reverse('index'))
+
+
+@case('post_detail')
+def post_detail(dataset):
+    return get(dataset.client(), reverse('post_detail', args=[dataset.post.pk]))
+
+
+@case('profile_view')
+def profile_view(dataset):
+    return get(dataset.client(), reverse('profile', args=[dataset.author.pk]))
+
+
+@case('get_like_status')
+def get_like_status(dataset):
+    return get(dataset.client(), reverse('like_status', args=[dataset.post.pk]))
+
+
+@case('index_template')
+def index_template(dataset):
+    """Rendu seul de index.html, sur le contexte déjà calculé par BlogHome"""
+    request = RequestFactory().get(reverse('index'))
+    request.user = dataset.viewer
+    response = BlogHome.as_view()(request)
+    assert isinstance(response, TemplateResponse)
+    template = response.resolve_template(response.template_name)
+    context = response.resolve_context(response.context_data)
+
+    def call():
+        template.render(context, request)
+    return call
+
+
+@case('email_backend_authenticate')
+def email_backend_authenticate(dataset):
+    backend = EmailBackend()
+    email = dataset.viewer.email.upper()
+
+    def call():
+        assert backend.authenticate(None, email=email, password=SYNTHETIC_PASSWORD) is not None
+    return call
+
+
+@case('toggle_like')
+def toggle_like(dataset):
+    client = dataset.client()
+    url = reverse('like', args=[dataset.post.pk])
+
+    def call():
+        response = client.post(url)
+        assert response.status_code == 200, response.status_code
+    return call
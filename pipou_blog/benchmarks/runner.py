@@ -0,0 +1,171 @@
+"""
+Exécution des cas, statistiques et comparaison avec la référence.
+
+Structure des résultats :
+
+    {"meta": {...}, "results": {moteur: {cas: {taille: {"p50_ms": ..., "p95_ms": ...,
+     "queries": ..., "alloc_peak_kib": ...}}}}}
+
+La référence versionnée (`baseline.json`) a la même structure mais ne garde que
+`queries` : les durées et les allocations dépendent de la machine. Elles ne sont
+comparées que sur demande (`compare(..., timings=True)`), à des résultats
+mesurés sur la même machine.
+"""
+import json
+import math
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from benchmarks.cases import CASES, Dataset
+from blog.synthetic import Generator
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_ITERATIONS = 20
+DEFAULT_TOLERANCE = 0.25
+# En dessous, un écart de durée relève du bruit de mesure
+NOISE_FLOOR_MS = 1.0
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def percentile(values, fraction):
+    """Centile par rang le plus proche"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(call, iterations):
+    """Chronomètre `call` après un appel de chauffe ; compte ses requêtes et ses allocations"""
+    call()
+    with CaptureQueriesContext(connection) as queries:
+        call()
+    # À lire tout de suite : chaque requête HTTP suivante vide le journal des requêtes
+    query_count = len(queries)
+
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    # tracemalloc ralentit l'exécution : mesuré à part
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(durations, 0.5), 3),
+        'p95_ms': round(percentile(durations, 0.95), 3),
+        'queries': query_count,
+        'alloc_peak_kib': round(peak / 1024, 1),
+    }
+
+
+def dataset_volumes(size):
+    """`size` posts, un auteur pour 20 posts, 5 likes par post en moyenne"""
+    return {'users': max(20, size // 20), 'posts': size, 'likes': size * 5}
+
+
+@contextmanager
+def build_dataset(size, seed=0):
+    """
+    Jeu de données de `size` posts, construit dans une transaction annulée à la
+    sortie : la base retrouve son état sans `flush`, y compris quand la suite
+    tourne dans un `TestCase`.
+    """
+    with transaction.atomic():
+        cache.clear()
+        Generator(**dataset_volumes(size), seed=seed).run()
+        yield Dataset.load()
+        transaction.set_rollback(True)
+
+
+@override_settings(BLOG_RATELIMIT_ENABLED=False, BLOG_LIKE_WRITE_BEHIND=False)
+def run_suite(sizes=DEFAULT_SIZES, iterations=DEFAULT_ITERATIONS, cases=None, log=print):
+    """Mesure les cas demandés à chaque taille ; retourne {cas: {taille: mesures}}"""
+    names = [name for name in CASES if cases is None or name in cases]
+    results = {name: {} for name in names}
+    for size in sizes:
+        with build_dataset(size) as dataset:
+            for name in names:
+                results[name][str(size)] = stats = measure(CASES[name](dataset), iterations)
+                log(f"{name:<28} {size:>8}  p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms  "
+                    f"{stats['queries']:>3} requêtes  {stats['alloc_peak_kib']:>9.1f} KiB")
+    return results
+
+
+def report(results, iterations):
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'iterations': iterations,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+        },
+        'results': {connection.vendor: results},
+    }
+
+
+def load(path):
+    path = Path(path)
+    if not path.exists():
+        return {'meta': {}, 'results': {}}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def save(data, path):
+    Path(path).write_text(json.dumps(data, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+
+def merge_baseline(baseline, current):
+    """
+    Remplace dans la référence les résultats des moteurs mesurés, garde les
+    autres. Seuls les nombres de requêtes sont conservés.
+    """
+    measured = {
+        vendor: {
+            name: {size: {'queries': stats['queries']} for size, stats in sizes.items()}
+            for name, sizes in cases.items()
+        }
+        for vendor, cases in current['results'].items()
+    }
+    return {'meta': current['meta'], 'results': {**baseline.get('results', {}), **measured}}
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE, timings=False):
+    """
+    Retourne les régressions `(moteur, cas, taille, métrique, référence, mesure)` :
+    une requête de plus et, avec `timings`, une durée p95 / un pic d'allocation
+    dépassant la référence de plus de `tolerance`.
+    """
+    regressions = []
+    for vendor, cases in current['results'].items():
+        reference_cases = baseline.get('results', {}).get(vendor, {})
+        for name, sizes in cases.items():
+            for size, stats in sizes.items():
+                reference = reference_cases.get(name, {}).get(size)
+                if reference is None:
+                    continue
+                checks = [('queries', stats['queries'] > reference['queries'])]
+                if timings and 'p95_ms' in reference:
+                    checks += [
+                        ('p95_ms', stats['p95_ms'] > reference['p95_ms'] * (1 + tolerance)
+                         and stats['p95_ms'] - reference['p95_ms'] > NOISE_FLOOR_MS),
+                        ('alloc_peak_kib', stats['alloc_peak_kib'] > reference['alloc_peak_kib'] * (1 + tolerance)),
+                    ]
+                for metric, regressed in checks:
+                    if regressed:
+                        regressions.append((vendor, name, size, metric, reference[metric], stats[metric]))
+    return regressions
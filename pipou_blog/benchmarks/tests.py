@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from benchmarks import runner
+from benchmarks.cases import CASES
+from blog.models import Post
+
+User = get_user_model()
+
+
+def stats(p95_ms=10.0, queries=4, alloc_peak_kib=100.0):
+    return {'p50_ms': p95_ms / 2, 'p95_ms': p95_ms, 'queries': queries, 'alloc_peak_kib': alloc_peak_kib}
+
+
+def results(**cases):
+    return {'meta': {}, 'results': {'sqlite': {name: {'100': value} for name, value in cases.items()}}}
+
+
+class BenchmarkRunnerTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 0.5), 50)
+        self.assertEqual(runner.percentile(values, 0.95), 95)
+        self.assertEqual(runner.percentile([3.0], 0.95), 3.0)
+
+    def test_compare_flags_extra_queries_and_slowdowns_beyond_tolerance(self):
+        baseline = results(blog_home=stats(), post_detail=stats(), profile_view=stats())
+        current = results(
+            blog_home=stats(queries=5),
+            post_detail=stats(p95_ms=12.0, alloc_peak_kib=200.0),
+            profile_view=stats(p95_ms=14.0),
+            toggle_like=stats(queries=50),
+        )
+
+        regressions = runner.compare(current, baseline, tolerance=0.25, timings=True)
+
+        self.assertEqual(regressions, [
+            ('sqlite', 'blog_home', '100', 'queries', 4, 5),
+            ('sqlite', 'post_detail', '100', 'alloc_peak_kib', 100.0, 200.0),
+            ('sqlite', 'profile_view', '100', 'p95_ms', 10.0, 14.0),
+        ])
+        # Sans `timings`, seules les requêtes comptent
+        self.assertEqual(runner.compare(current, baseline), [('sqlite', 'blog_home', '100', 'queries', 4, 5)])
+
+    def test_merge_baseline_keeps_other_engines(self):
+        baseline = {'meta': {}, 'results': {'postgresql': {'blog_home': {}}, 'sqlite': {'old': {}}}}
+        merged = runner.merge_baseline(baseline, results(blog_home=stats()))
+        self.assertEqual(set(merged['results']), {'postgresql', 'sqlite'})
+        self.assertNotIn('old', merged['results']['sqlite'])
+        # Les durées dépendent de la machine : la référence ne garde que les requêtes
+        self.assertEqual(merged['results']['sqlite']['blog_home'], {'100': {'queries': 4}})
+
+    def test_suite_measures_a_case(self):
+        existing = User.objects.create_user(username='présent', email='present@gmail.com', password='!')
+        # Un seul petit cas : la suite complète se lance avec `python -m benchmarks`
+        measured = runner.run_suite(sizes=[20, 40], iterations=1, cases=['blog_home'], log=lambda line: None)
+
+        self.assertEqual(set(measured), {'blog_home'})
+        stats = measured['blog_home']['20']
+        self.assertGreater(stats['p95_ms'], 0)
+        self.assertGreater(stats['queries'], 0)
+        self.assertGreater(stats['alloc_peak_kib'], 0)
+        # Chaque jeu de données est annulé, la base de test n'est pas vidée
+        self.assertEqual(list(User.objects.all()), [existing])
+        self.assertFalse(Post.objects.exists())
+
+    def test_stored_baseline_covers_every_case(self):
+        baseline = runner.load(runner.BASELINE_PATH)
+        for vendor, cases in baseline['results'].items():
+            self.assertEqual(set(cases), set(CASES), vendor)
+            for sizes in cases.values():
+                self.assertTrue(all(set(stats) == {'queries'} for stats in sizes.values()))
@@ -0,0 +1,89 @@
+"""
+Statistiques d'auteur stockées sur l'utilisateur : nombre de posts, likes reçus
+et date du dernier post.
+
+Chaque écriture (post créé ou supprimé, like ajouté ou retiré) applique un
+`UPDATE` relatif avec `F()` dans la transaction de l'écriture, depuis les
+signaux de `blog.signals`. La commande `recount_author_stats` recalcule les
+valeurs à partir des tables `Post` et `Like` en cas de dérive.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from blog.models import Like, Post
+
+User = get_user_model()
+
+
+def record_post_created(post):
+    record_posts_created(post.user_id, 1, post.created_at)
+
+
+def record_posts_created(user_id, count, latest):
+    """Compte `count` nouveaux posts de l'auteur, dont le plus récent date de `latest`"""
+    User.objects.filter(pk=user_id).update(
+        post_count=F('post_count') + count,
+        last_post_at=Greatest(Coalesce('last_post_at', latest), latest),
+    )
+
+
+def record_post_deleted(post):
+    """Les likes du post ont déjà été décomptés par la suppression en cascade"""
+    User.objects.filter(pk=post.user_id, post_count__gt=0).update(post_count=F('post_count') - 1)
+    User.objects.filter(pk=post.user_id).update(last_post_at=Subquery(latest_post_dates()))
+
+
+def record_likes_received(post_id, delta):
+    author = Post.objects.filter(pk=post_id).values('user_id')
+    authors = User.objects.filter(pk__in=Subquery(author))
+    if delta < 0:
+        authors = authors.filter(likes_received__gte=-delta)
+    authors.update(likes_received=F('likes_received') + delta)
+
+
+def record_likes_received_by_post(deltas):
+    """Reporte des variations de likes `{post_id: delta}` sur leurs auteurs, en une seule mise à jour"""
+    by_author = Counter()
+    for post_id, user_id in Post.objects.filter(pk__in=list(deltas)).values_list('pk', 'user_id'):
+        by_author[user_id] += deltas[post_id]
+    by_author = {user_id: delta for user_id, delta in by_author.items() if delta}
+    if not by_author:
+        return
+    delta = Case(*(When(pk=user_id, then=Value(delta)) for user_id, delta in by_author.items()), default=Value(0))
+    User.objects.filter(pk__in=list(by_author)).update(likes_received=Greatest(F('likes_received') + delta, 0))
+
+
+def latest_post_dates():
+    return (
+        Post.objects.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(latest=Max('created_at'))
+        .values('latest')
+    )
+
+
+def actual_stats(user_ids):
+    """Retourne {user_id: (post_count, likes_received, last_post_at)} recalculés depuis les tables"""
+    posts = {
+        row['user_id']: (row['total'], row['latest'])
+        for row in Post.objects.filter(user_id__in=user_ids)
+        .order_by()
+        .values('user_id')
+        .annotate(total=Count('id'), latest=Max('created_at'))
+    }
+    likes = dict(
+        Like.objects.filter(post__user_id__in=user_ids)
+        .order_by()
+        .values('post__user_id')
+        .annotate(total=Count('id'))
+        .values_list('post__user_id', 'total')
+    )
+    stats = {}
+    for user_id in user_ids:
+        post_count, last_post_at = posts.get(user_id, (0, None))
+        stats[user_id] = (post_count, likes.get(user_id, 0), last_post_at)
+    return stats
@@ -0,0 +1,137 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+
+FEED_GENERATION_KEY = 'blog:generation:feed'
+USERS_GENERATION_KEY = 'blog:generation:users'
+POST_GENERATION_KEY = 'blog:generation:post:%s'
+SYNDICATION_GENERATION_KEY = 'blog:generation:syndication'
+
+
+def get_generation(key):
+    """
+    Retourne le compteur de génération stocké sous `key`.
+
+    Un compteur absent (jamais créé ou évincé) repart d'une valeur basée sur
+    l'horloge, de sorte qu'il ne retombe jamais sur une génération déjà utilisée.
+    """
+    generation = cache.get(key)
+    if generation is None:
+        generation = int(time.time() * 1000)
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_generation(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def bump_after_commit(*keys):
+    """
+    Incrémente les générations une fois la transaction en cours validée (tout
+    de suite hors transaction). Incrémentées avant, elles laisseraient une
+    requête concurrente relire les lignes non validées et les mettre en cache
+    sous la nouvelle génération jusqu'à la prochaine écriture.
+    """
+    transaction.on_commit(lambda: [bump_generation(key) for key in keys])
+
+
+def invalidate_feed():
+    bump_after_commit(FEED_GENERATION_KEY)
+
+
+def invalidate_post(post_id):
+    bump_after_commit(FEED_GENERATION_KEY, POST_GENERATION_KEY % post_id)
+
+
+def invalidate_users():
+    bump_after_commit(USERS_GENERATION_KEY)
+
+
+def invalidate_syndication():
+    bump_after_commit(SYNDICATION_GENERATION_KEY)
+
+
+def cached_feed(feed_view, timeout=None):
+    """
+    Sert un flux RSS/Atom depuis le cache jusqu'à la prochaine création,
+    modification ou suppression de post (les likes n'y figurent pas).
+    ETag et Last-Modified sont portés par la réponse en cache, si bien que
+    `ConditionalGetMiddleware` répond 304 aux lecteurs de flux sans rendu.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'BLOG_FEED_CACHE_TIMEOUT', 24 * 60 * 60)
+
+    @wraps(feed_view)
+    def view(request, *args, **kwargs):
+        key = 'blog:syndication:%s:%s' % (get_generation(SYNDICATION_GENERATION_KEY), request.path)
+        response = cache.get(key)
+        if response is None:
+            response = feed_view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response, timeout)
+        return response
+    return view
+
+
+class AnonymousPageCacheMixin:
+    """
+    Met en cache la page complète rendue pour les visiteurs anonymes.
+
+    La clé inclut des compteurs de génération incrémentés par les signaux de
+    `blog.signals` : une création, modification ou suppression de post, un like
+    ou une modification d'utilisateur rend immédiatement obsolètes les pages
+    concernées. Les réponses qui posent un cookie, utilisent le jeton CSRF ou
+    consomment des messages ne sont jamais mises en cache.
+    """
+
+    page_cache_timeout = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 300)
+
+    def get_page_cache_generations(self):
+        return [get_generation(FEED_GENERATION_KEY), get_generation(USERS_GENERATION_KEY)]
+
+    def get_page_cache_key(self):
+        generations = ':'.join(str(generation) for generation in self.get_page_cache_generations())
+        path = hashlib.md5(self.request.get_full_path().encode()).hexdigest()
+        return 'blog:page:%s:%s:%s' % (self.__class__.__name__, generations, path)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self._is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        # Les attributs utilisés par get_page_cache_key ne sont posés qu'au setup()
+        key = self.get_page_cache_key()
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda rendered: self._store_page(key, rendered))
+        else:
+            self._store_page(key, response)
+        return response
+
+    def _is_cacheable_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if request.user.is_authenticated:
+            return False
+        # Une page servie depuis le cache n'afficherait pas les messages en attente
+        return len(messages.get_messages(request)) == 0
+
+    def _store_page(self, key, response):
+        if response.status_code != 200 or response.cookies or response.streaming:
+            return
+        if self.request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            return
+        cache.set(key, response, self.page_cache_timeout)
@@ -0,0 +1,82 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from blog import like_buffer
+from blog.models import Post
+from blog.pagination import FEED_PAGE_SIZE, KeysetPaginator
+
+
+def make_etag(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def viewer_key(request):
+    """Partie du validateur propre au visiteur (icônes de like, en-tête de navigation)"""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    if like_buffer.is_enabled():
+        return (user.pk, user.date_updated, like_buffer.pending_generation(user))
+    return (user.pk, user.date_updated)
+
+
+def conditional_view(etag_func):
+    """
+    Applique `condition(etag_func=...)` : une revalidation dont l'ETag correspond
+    reçoit un 304 sans que la vue ni le template ne soient exécutés. Les réponses
+    sont marquées `no-cache` (revalidation systématique) et `private` pour un
+    visiteur connecté.
+    """
+    def decorator(view_func):
+        conditional = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            patch_cache_control(response, no_cache=True, private=request.user.is_authenticated)
+            return response
+        return wrapper
+    return decorator
+
+
+def feed_etag(request, *args, **kwargs):
+    """Validateur de la page du fil : lignes de la page (id, version, dates) et curseurs"""
+    queryset = Post.objects.select_related('user').only(
+        'id', 'created_at', 'updated_at', 'version', 'user', 'user__date_updated'
+    )
+    page = KeysetPaginator(queryset, FEED_PAGE_SIZE).get_page(request.GET.get('cursor'))
+    rows = [(post.pk, post.version, post.updated_at, post.user.date_updated) for post in page]
+    return make_etag('feed', viewer_key(request), rows, page.next_cursor, page.previous_cursor)
+
+
+def post_etag(request, pk, *args, **kwargs):
+    state = (
+        Post.objects.filter(pk=pk)
+        .values_list('version', 'updated_at', 'user__date_updated')
+        .first()
+    )
+    if state is None:
+        return None
+    return make_etag('post', pk, viewer_key(request), state)
+
+
+def like_status_etag(request, post_id, *args, **kwargs):
+    version = Post.objects.filter(pk=post_id).values_list('version', flat=True).first()
+    if version is None:
+        return None
+    return make_etag('like-status', post_id, viewer_key(request), version)
+
+
+def likes_status_etag(request, *args, **kwargs):
+    ids = request.GET.get('ids', '')
+    if not all(pk.isdigit() for pk in ids.split(',') if pk):
+        return None
+    versions = list(
+        Post.objects.filter(pk__in=[int(pk) for pk in ids.split(',') if pk])
+        .order_by('pk')
+        .values_list('pk', 'version')
+    )
+    return make_etag('likes-status', ids, viewer_key(request), versions)
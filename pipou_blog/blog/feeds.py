@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from blog.models import Post
+
+FEED_ITEMS = 30
+
+User = get_user_model()
+
+
+class LatestPostsFeed(Feed):
+    """Flux RSS des derniers articles du blog"""
+    title = "Pipou Blog"
+    link = "/"
+    description = "Les derniers articles publiés sur Pipou Blog."
+
+    def items(self):
+        # Requête bornée qui suit l'index sur created_at ; le contenu complet n'est pas chargé
+        return (
+            Post.objects.select_related('user')
+            .defer('content')
+            .order_by('-created_at', '-id')[:FEED_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.user.username
+
+
+class AtomLatestPostsFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    """Flux RSS des derniers articles d'un auteur"""
+
+    def get_object(self, request, user_id):
+        return get_object_or_404(User, pk=user_id)
+
+    def title(self, obj):
+        return f"Pipou Blog — {obj.username}"
+
+    def link(self, obj):
+        return reverse('profile', args=[obj.pk])
+
+    def description(self, obj):
+        return f"Les derniers articles de {obj.username} sur Pipou Blog."
+
+    def items(self, obj):
+        return (
+            Post.objects.filter(user=obj)
+            .select_related('user')
+            .defer('content')
+            .order_by('-created_at', '-id')[:FEED_ITEMS]
+        )
+
+
+class AtomAuthorPostsFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
@@ -0,0 +1,257 @@
+"""
+Chargement en flux d'une fixture au format `dumpdata` (tableau JSON d'objets
+``{"model": ..., "pk": ..., "fields": {...}}``), pour les fixtures trop
+volumineuses pour `loaddata` ou `json.load`.
+
+Le tableau est lu objet par objet (`iter_json_array`) : la mémoire reste
+constante quelle que soit la taille du fichier, hormis la table de
+correspondance des ids d'utilisateurs (un entier par utilisateur).
+
+Seuls `authentication.user` et `blog.post` sont chargés, en une seule passe.
+Les utilisateurs doivent précéder leurs posts, ce qui est le cas dans l'ordre de
+`dumpdata`. Les objets sont regroupés en lots ; pour chaque lot, les lignes
+existantes sont retrouvées par une seule requête `IN` :
+
+- utilisateurs : même `username` (ou même email), conservés tels quels ;
+- posts : même auteur et même titre ; la requête passe par l'index de la clé
+  étrangère `user`, le titre est filtré parmi les posts des auteurs du lot.
+
+Un post dont la date est invalide est rejeté et signalé dans `invalid`, au
+même format que les lignes rejetées par `blog.importer`.
+
+Les utilisateurs sont écrits par `bulk_create(ignore_conflicts=True)` puis
+relus pour remplir la correspondance ancien id -> nouvel id. Les posts passent
+par `blog.importer.save_chunk`, qui tient à jour l'index de recherche, les
+statistiques des auteurs et les caches.
+"""
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from blog.cache import invalidate_users
+from blog.importer import row_error, save_chunk
+from blog.models import Post
+
+FIXTURE_CHUNK_SIZE = 1000
+READ_SIZE = 1 << 16
+USER_MODEL = 'authentication.user'
+POST_MODEL = 'blog.post'
+USER_FIELDS = ('email', 'first_name', 'last_name', 'is_staff', 'is_superuser')
+
+User = get_user_model()
+
+
+class FixtureFormatError(ValueError):
+    """Fixture qui n'est pas un tableau JSON valide"""
+
+
+@dataclass
+class LoadResult:
+    users_created: int = 0
+    users_existing: int = 0
+    posts_created: int = 0
+    posts_existing: int = 0
+    # Posts dont l'auteur est absent de la fixture (ou n'a pas pu être créé)
+    posts_orphaned: int = 0
+    # Posts rejetés : {'pk': id dans la fixture, 'errors': ...}
+    invalid: list = field(default_factory=list)
+    skipped: Counter = field(default_factory=Counter)
+
+    def as_dict(self):
+        return {
+            'users_created': self.users_created,
+            'users_existing': self.users_existing,
+            'posts_created': self.posts_created,
+            'posts_existing': self.posts_existing,
+            'posts_orphaned': self.posts_orphaned,
+            'invalid': self.invalid,
+            'skipped': dict(self.skipped),
+        }
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """Itère sur les éléments d'un tableau JSON lu par blocs depuis `stream` (texte ou binaire)"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+
+    def read_more():
+        nonlocal buffer, eof
+        block = stream.read(read_size)
+        if isinstance(block, bytes):
+            # Un caractère multi-octets peut être coupé par le bloc
+            while True:
+                try:
+                    block = block.decode('utf-8')
+                    break
+                except UnicodeDecodeError:
+                    more = stream.read(1)
+                    if not more:
+                        raise FixtureFormatError("Encodage UTF-8 invalide")
+                    block += more
+        if not block:
+            eof = True
+        buffer += block
+
+    while not buffer.lstrip() and not eof:
+        read_more()
+    buffer = buffer.lstrip()
+    if not buffer.startswith('['):
+        raise FixtureFormatError("La fixture doit être un tableau JSON")
+    buffer = buffer[1:]
+    expect_value = True
+
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if eof:
+                raise FixtureFormatError("Tableau JSON non terminé")
+            read_more()
+            continue
+        if buffer[0] == ']':
+            return
+        if not expect_value:
+            if buffer[0] != ',':
+                raise FixtureFormatError("Virgule attendue entre deux éléments")
+            buffer = buffer[1:]
+            expect_value = True
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as error:
+            if eof:
+                raise FixtureFormatError(f"JSON invalide : {error}")
+            read_more()
+            continue
+        if end == len(buffer) and not eof:
+            # Un nombre en fin de bloc peut se poursuivre dans le bloc suivant
+            read_more()
+            continue
+        yield value
+        buffer = buffer[end:]
+        expect_value = False
+
+
+def load_fixture(stream, chunk_size=FIXTURE_CHUNK_SIZE):
+    """Charge les utilisateurs et les posts de la fixture ; retourne un `LoadResult`"""
+    result = LoadResult()
+    user_ids = {}
+    users, posts = [], []
+
+    for item in iter_json_array(stream):
+        model = item.get('model') if isinstance(item, dict) else None
+        if model == USER_MODEL:
+            if posts:
+                save_posts(posts, user_ids, result)
+                posts = []
+            users.append(item)
+            if len(users) >= chunk_size:
+                save_users(users, user_ids, result)
+                users = []
+        elif model == POST_MODEL:
+            if users:
+                save_users(users, user_ids, result)
+                users = []
+            posts.append(item)
+            if len(posts) >= chunk_size:
+                save_posts(posts, user_ids, result)
+                posts = []
+        else:
+            result.skipped[model or '?'] += 1
+
+    if users:
+        save_users(users, user_ids, result)
+    if posts:
+        save_posts(posts, user_ids, result)
+    return result
+
+
+def save_users(items, user_ids, result):
+    """Crée les utilisateurs absents du lot et complète `user_ids` (ancien id -> nouvel id)"""
+    names = {item['fields']['username'] for item in items}
+    emails = {item['fields']['email'].lower() for item in items}
+    existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+
+    new_users, seen = [], set()
+    for item in items:
+        fields = item['fields']
+        if fields['username'] in existing or fields['username'] in seen:
+            continue
+        seen.add(fields['username'])
+        new_users.append(User(
+            username=fields['username'],
+            **{name: fields[name] for name in USER_FIELDS if name in fields},
+        ))
+    # Un email déjà pris par un autre compte fait ignorer la ligne au lieu d'échouer
+    User.objects.bulk_create(new_users, ignore_conflicts=True)
+
+    by_name, by_email = {}, {}
+    saved = (
+        User.objects.alias(email_lower=Lower('email'))
+        .filter(Q(username__in=names) | Q(email_lower__in=emails))
+        .values_list('pk', 'username', 'email')
+    )
+    for pk, username, email in saved:
+        by_name[username] = pk
+        by_email[email.lower()] = pk
+    for item in items:
+        fields = item['fields']
+        pk = by_name.get(fields['username'], by_email.get(fields['email'].lower()))
+        if pk is not None:
+            user_ids[item['pk']] = pk
+
+    result.users_existing += len(items) - len(new_users)
+    created = sum(1 for user in new_users if user.username in by_name)
+    result.users_created += created
+    result.users_existing += len(new_users) - created
+    if new_users:
+        invalidate_users()
+
+
+def save_posts(items, user_ids, result):
+    """Crée les posts du lot qui n'existent pas déjà (même auteur, même titre)"""
+    candidates = []
+    for item in items:
+        fields = item['fields']
+        user_id = user_ids.get(fields['user'])
+        if user_id is None:
+            result.posts_orphaned += 1
+        else:
+            candidates.append((item['pk'], user_id, fields))
+
+    existing = set(
+        Post.objects.filter(
+            user_id__in={user_id for _, user_id, _ in candidates},
+            title__in={fields['title'] for _, _, fields in candidates},
+        ).values_list('user_id', 'title')
+    )
+
+    new_posts = []
+    for pk, user_id, fields in candidates:
+        key = (user_id, fields['title'])
+        if key in existing:
+            result.posts_existing += 1
+            continue
+        post = Post(user_id=user_id, title=fields['title'], content=fields['content'])
+        if fields.get('created_at'):
+            try:
+                created_at = parse_datetime(str(fields['created_at']))
+            except ValueError:
+                created_at = None
+            if created_at is None:
+                result.invalid.append({'pk': pk, 'errors': row_error('created_at', "Date invalide (ISO 8601 attendu)")})
+                continue
+            post.imported_created_at = make_aware(created_at) if is_naive(created_at) else created_at
+        existing.add(key)
+        post.refresh_content_metadata()
+        new_posts.append(post)
+
+    if new_posts:
+        save_chunk(new_posts)
+        result.posts_created += len(new_posts)
@@ -0,0 +1,11 @@
+from django import forms
+
+from blog.models import Post
+
+
+class PostForm(forms.ModelForm):
+    """Règles de validation d'un post, partagées par l'édition et l'import en masse"""
+
+    class Meta:
+        model = Post
+        fields = ["title", "content"]
@@ -0,0 +1,172 @@
+"""
+Import de posts en masse depuis du JSON (tableau d'objets) ou du NDJSON (un
+objet par ligne).
+
+Chaque ligne est un objet ``{"title": ..., "content": ..., "author": ...,
+"created_at": ...}`` ; `author` (email) et `created_at` (ISO 8601) sont
+facultatifs. Les lignes sont validées par `PostForm`, comme dans l'interface,
+puis écrites par `bulk_create` en lots, chacun dans sa propre transaction. Une
+ligne invalide est signalée avec son numéro sans interrompre l'import.
+
+`bulk_create` n'envoie pas les signaux de `Post` : l'index de recherche, les
+statistiques des auteurs et les caches sont mis à jour ici, une fois par lot.
+"""
+import itertools
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from blog.author_stats import record_posts_created
+from blog.cache import invalidate_feed, invalidate_syndication
+from blog.forms import PostForm
+from blog.models import Post
+from blog.search import index_posts
+
+IMPORT_CHUNK_SIZE = 500
+
+User = get_user_model()
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, errors):
+        self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'errors': self.errors}
+
+
+class ImportFormatError(ValueError):
+    """Document d'import illisible dans son ensemble"""
+
+
+def row_error(field_name, message, code='invalid'):
+    """Erreur de ligne au format de `form.errors.get_json_data()`"""
+    return {field_name: [{'message': message, 'code': code}]}
+
+
+def read_rows(lines):
+    """
+    Itère sur `(numéro, objet ou None, erreur)` à partir des lignes d'un
+    document JSON ou NDJSON. Le NDJSON est lu ligne à ligne, sans charger le
+    document entier.
+    """
+    lines = iter(lines)
+    for first in lines:
+        if isinstance(first, bytes):
+            first = first.decode('utf-8')
+        if first.strip():
+            break
+    else:
+        return
+
+    if first.lstrip().startswith('['):
+        document = first + ''.join(
+            line.decode('utf-8') if isinstance(line, bytes) else line for line in lines
+        )
+        try:
+            rows = json.loads(document)
+        except ValueError as error:
+            raise ImportFormatError(f"JSON invalide : {error}")
+        for number, row in enumerate(rows, start=1):
+            yield number, row, None
+        return
+
+    for number, line in enumerate(itertools.chain([first], lines), start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError as error:
+            yield number, None, row_error('__all__', f"JSON invalide : {error}")
+
+
+def import_posts(lines, default_author=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Importe les posts décrits par `lines` ; retourne un `ImportResult`"""
+    result = ImportResult()
+    authors = {}
+    rows = read_rows(lines)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return result
+        posts = []
+        for number, row, error in chunk:
+            if error is None:
+                post, error = build_post(row, default_author, authors)
+            if error is not None:
+                result.add_error(number, error)
+            else:
+                posts.append(post)
+        if posts:
+            save_chunk(posts)
+            result.created += len(posts)
+
+
+def build_post(row, default_author, authors):
+    """Valide une ligne ; retourne `(post non enregistré, None)` ou `(None, erreurs)`"""
+    if not isinstance(row, dict):
+        return None, row_error('__all__', "Chaque ligne doit être un objet JSON")
+
+    form = PostForm(data={'title': row.get('title'), 'content': row.get('content')})
+    if not form.is_valid():
+        return None, form.errors.get_json_data()
+
+    email = str(row.get('author') or '')
+    if email:
+        if email.lower() not in authors:
+            authors[email.lower()] = (
+                User.objects.alias(email_lower=Lower('email')).filter(email_lower=email.lower()).first()
+            )
+        author = authors[email.lower()]
+        if author is None:
+            return None, row_error('author', f"Aucun utilisateur avec l'email {email}")
+    elif default_author is not None:
+        author = default_author
+    else:
+        return None, row_error('author', "Auteur manquant", 'required')
+
+    post = form.save(commit=False)
+    post.user = author
+    if row.get('created_at'):
+        try:
+            created_at = parse_datetime(str(row['created_at']))
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            return None, row_error('created_at', "Date invalide (ISO 8601 attendu)")
+        post.imported_created_at = make_aware(created_at) if is_naive(created_at) else created_at
+    post.refresh_content_metadata()
+    return post, None
+
+
+def save_chunk(posts):
+    with transaction.atomic():
+        Post.objects.bulk_create(posts)
+        # created_at est en auto_now_add : les dates d'origine sont reportées ensuite
+        dated = [post for post in posts if hasattr(post, 'imported_created_at')]
+        for post in dated:
+            post.created_at = post.imported_created_at
+        if dated:
+            Post.objects.bulk_update(dated, ['created_at'])
+
+        index_posts(Post.objects.filter(pk__in=[post.pk for post in posts]))
+        by_author = defaultdict(list)
+        for post in posts:
+            by_author[post.user_id].append(post.created_at)
+        for user_id, dates in by_author.items():
+            record_posts_created(user_id, len(dates), max(dates))
+
+    invalidate_feed()
+    invalidate_syndication()
@@ -0,0 +1,15 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import Index
+
+
+class SearchVectorIndex(GinIndex):
+    """
+    Index GIN de `Post.search_vector` sous PostgreSQL. Les autres moteurs ne
+    connaissent pas `USING gin` et ne lisent jamais la colonne (SQLite cherche
+    dans sa table FTS5) : ils reçoivent un index ordinaire sur une colonne vide.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
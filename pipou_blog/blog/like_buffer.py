@@ -0,0 +1,183 @@
+"""
+Mode « write-behind » des likes, pour absorber les rafales sur un post viral.
+
+Activé par le réglage `BLOG_LIKE_WRITE_BEHIND`, il remplace l'écriture directe
+dans `blog_like` par l'enregistrement de l'intention (like ou unlike) dans un
+journal SQLite local et durable (`BLOG_LIKE_JOURNAL_PATH`). Le journal garde une
+seule ligne par couple (utilisateur, post) : la dernière intention l'emporte.
+
+La commande `flush_like_buffer` reporte le journal par lots dans la base
+principale (`flush`) : insertions et suppressions groupées, puis une seule mise
+à jour des compteurs par post. Le report est idempotent, un lot rejoué après
+une interruption ne compte rien deux fois.
+
+En attendant le report, les lectures fusionnent les intentions en attente de
+l'utilisateur (`merge_pending_likes`) : chacun voit immédiatement son action,
+les autres visiteurs la voient après le report.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from blog.cache import bump_generation, get_generation
+from blog.likes import apply_like_deltas, bulk_add_likes, bulk_remove_likes
+from blog.models import Post
+
+PENDING_LIKES_GENERATION_KEY = 'blog:generation:pending-likes:%s'
+FLUSH_BATCH_SIZE = 5000
+
+User = get_user_model()
+
+
+def is_enabled():
+    return getattr(settings, 'BLOG_LIKE_WRITE_BEHIND', False)
+
+
+class LikeJournal:
+    """Journal des intentions de like en attente, dans un fichier SQLite"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        db = getattr(self._local, 'connection', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode = WAL")
+            # Chaque intention acceptée survit à un arrêt brutal du processus
+            db.execute("PRAGMA synchronous = FULL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS pending_like ("
+                "user_id INTEGER NOT NULL, post_id INTEGER NOT NULL, liked INTEGER NOT NULL, "
+                "queued_at REAL NOT NULL, PRIMARY KEY (user_id, post_id))"
+            )
+            self._local.connection = db
+        return db
+
+    def record(self, user_id, post_id, liked):
+        self._connection().execute(
+            "INSERT INTO pending_like (user_id, post_id, liked, queued_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (user_id, post_id) DO UPDATE SET liked = excluded.liked, queued_at = excluded.queued_at",
+            (user_id, post_id, int(liked), time.time()),
+        )
+
+    def pending_for_user(self, user_id, post_ids):
+        """Retourne {post_id: liked} des intentions en attente de l'utilisateur"""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        placeholders = ', '.join('?' * len(post_ids))
+        rows = self._connection().execute(
+            f"SELECT post_id, liked FROM pending_like WHERE user_id = ? AND post_id IN ({placeholders})",
+            [user_id, *post_ids],
+        )
+        return {post_id: bool(liked) for post_id, liked in rows}
+
+    def batch(self, limit):
+        return self._connection().execute(
+            "SELECT user_id, post_id, liked, queued_at FROM pending_like ORDER BY queued_at LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def acknowledge(self, rows):
+        """Retire les lignes reportées, sauf celles modifiées depuis leur lecture"""
+        db = self._connection()
+        with db:
+            db.executemany(
+                "DELETE FROM pending_like WHERE user_id = ? AND post_id = ? AND queued_at = ?",
+                [(user_id, post_id, queued_at) for user_id, post_id, _, queued_at in rows],
+            )
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM pending_like").fetchone()[0]
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal():
+    path = str(getattr(settings, 'BLOG_LIKE_JOURNAL_PATH', settings.BASE_DIR / 'like_journal.sqlite3'))
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = LikeJournal(path)
+        return _journals[path]
+
+
+def pending_generation(user):
+    """Partie de l'ETag propre aux intentions en attente de l'utilisateur"""
+    return get_generation(PENDING_LIKES_GENERATION_KEY % user.pk)
+
+
+def queue_like(user, post_id, liked=None):
+    """
+    Enregistre l'intention de l'utilisateur (`liked=None` inverse l'état actuel).
+    Retourne `(liked, likes_count)` tels que l'utilisateur doit les voir, ou
+    `(None, None)` si le post n'existe pas.
+    """
+    post = Post.objects.filter(pk=post_id).with_like_state(user).values('likes_count', 'liked').first()
+    if post is None:
+        return None, None
+
+    journal = get_journal()
+    current = journal.pending_for_user(user.pk, [post_id]).get(post_id, post['liked'])
+    if liked is None:
+        liked = not current
+    journal.record(user.pk, post_id, liked)
+    bump_generation(PENDING_LIKES_GENERATION_KEY % user.pk)
+    return liked, post['likes_count'] + int(liked) - int(post['liked'])
+
+
+def merge_pending_likes(user, posts):
+    """
+    Applique aux posts (annotés par `with_like_state`) les intentions en attente
+    de l'utilisateur : état du bouton et compteur ajusté de sa propre action.
+    """
+    if not is_enabled() or not user.is_authenticated:
+        return posts
+    pending = get_journal().pending_for_user(user.pk, {post.pk for post in posts})
+    for post in posts:
+        liked = pending.get(post.pk, post.liked)
+        if liked != post.liked:
+            post.likes_count += 1 if liked else -1
+            post.liked = liked
+    return posts
+
+
+def flush(batch_size=FLUSH_BATCH_SIZE):
+    """Reporte un lot du journal dans la base ; retourne le nombre d'intentions traitées"""
+    journal = get_journal()
+    rows = journal.batch(batch_size)
+    if not rows:
+        return 0
+
+    with transaction.atomic():
+        # Les intentions visant un post ou un utilisateur supprimé entre-temps sont abandonnées
+        post_ids = set(Post.objects.filter(pk__in={row[1] for row in rows}).values_list('pk', flat=True))
+        user_ids = set(User.objects.filter(pk__in={row[0] for row in rows}).values_list('pk', flat=True))
+        valid = [row for row in rows if row[0] in user_ids and row[1] in post_ids]
+
+        deltas = Counter(bulk_add_likes([(user_id, post_id) for user_id, post_id, liked, _ in valid if liked]))
+        deltas.subtract(bulk_remove_likes([(user_id, post_id) for user_id, post_id, liked, _ in valid if not liked]))
+        apply_like_deltas(deltas)
+
+    # Après le commit : une interruption ici rejoue un lot sans effet
+    journal.acknowledge(rows)
+    for user_id in {row[0] for row in rows}:
+        bump_generation(PENDING_LIKES_GENERATION_KEY % user_id)
+    return len(rows)
+
+
+def flush_all(batch_size=FLUSH_BATCH_SIZE):
+    total = 0
+    while True:
+        flushed = flush(batch_size)
+        if not flushed:
+            return total
+        total += flushed
@@ -0,0 +1,141 @@
+"""
+Like et unlike idempotents, sûrs face aux requêtes concurrentes.
+
+Chaque opération tient en une seule instruction SQL qui ne peut pas échouer sur
+la contrainte d'unicité (user, post) : `INSERT … ON CONFLICT DO NOTHING` pour
+le like, `DELETE … RETURNING` pour l'unlike. Seule la requête qui a réellement
+inséré ou supprimé la ligne envoie les signaux de `Like`, qui mettent à jour
+les compteurs, le score de tendance et les caches (voir `blog.signals`). Le
+nouveau nombre de likes est lu dans la même transaction.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from blog.author_stats import record_likes_received_by_post
+from blog.cache import invalidate_post
+from blog.models import Like, Post
+from blog.trending import record_likes
+
+BULK_CHUNK_SIZE = 500
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def add_like(user, post_id):
+    """
+    Like le post. Retourne `(created, likes_count)` ; `likes_count` vaut None si
+    le post n'existe pas.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # L'INSERT … SELECT n'insère rien si le post n'existe pas
+            cursor.execute(
+                f"INSERT INTO {_table(Like)} (user_id, post_id, created_at) "
+                f"SELECT %s, id, %s FROM {_table(Post)} WHERE id = %s "
+                "ON CONFLICT (user_id, post_id) DO NOTHING RETURNING id",
+                [user.pk, connection.ops.adapt_datetimefield_value(timezone.now()), post_id],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            like = Like(pk=row[0], user_id=user.pk, post_id=post_id)
+            like._state.adding = False
+            post_save.send(sender=Like, instance=like, created=True, update_fields=None, raw=False, using=connection.alias)
+        return row is not None, _likes_count(post_id)
+
+
+def remove_like(user, post_id):
+    """
+    Retire le like du post. Retourne `(deleted, likes_count)` ; `likes_count`
+    vaut None si le post n'existe pas.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {_table(Like)} WHERE user_id = %s AND post_id = %s RETURNING id",
+                [user.pk, post_id],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            like = Like(pk=row[0], user_id=user.pk, post_id=post_id)
+            like._state.adding = False
+            post_delete.send(sender=Like, instance=like, using=connection.alias, origin=like)
+        return row is not None, _likes_count(post_id)
+
+
+def toggle_like(user, post_id):
+    """Retire le like s'il existe, sinon l'ajoute. Retourne `(liked, likes_count)`"""
+    with transaction.atomic():
+        deleted, likes_count = remove_like(user, post_id)
+        if deleted:
+            return False, likes_count
+        # Si un like concurrent est inséré entre les deux instructions, il est conservé
+        _, likes_count = add_like(user, post_id)
+        return True, likes_count
+
+
+def _likes_count(post_id):
+    return Post.objects.filter(pk=post_id).values_list('likes_count', flat=True).first()
+
+
+def bulk_add_likes(pairs):
+    """
+    Insère les likes `(user_id, post_id)` absents, sans envoyer de signal.
+    Retourne la liste des post_id effectivement likés (un par ligne insérée).
+    """
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    inserted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), BULK_CHUNK_SIZE):
+            chunk = pairs[start:start + BULK_CHUNK_SIZE]
+            cursor.execute(
+                f"INSERT INTO {_table(Like)} (user_id, post_id, created_at) VALUES "
+                + ", ".join(["(%s, %s, %s)"] * len(chunk))
+                + " ON CONFLICT (user_id, post_id) DO NOTHING RETURNING post_id",
+                [value for user_id, post_id in chunk for value in (user_id, post_id, created_at)],
+            )
+            inserted.extend(row[0] for row in cursor.fetchall())
+    return inserted
+
+
+def bulk_remove_likes(pairs):
+    """
+    Supprime les likes `(user_id, post_id)` présents, sans envoyer de signal.
+    Retourne la liste des post_id effectivement délikés (un par ligne supprimée).
+    """
+    deleted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), BULK_CHUNK_SIZE):
+            chunk = pairs[start:start + BULK_CHUNK_SIZE]
+            cursor.execute(
+                f"DELETE FROM {_table(Like)} WHERE "
+                + " OR ".join(["(user_id = %s AND post_id = %s)"] * len(chunk))
+                + " RETURNING post_id",
+                [value for pair in chunk for value in pair],
+            )
+            deleted.extend(row[0] for row in cursor.fetchall())
+    return deleted
+
+
+def apply_like_deltas(deltas):
+    """
+    Reporte sur les données dérivées des variations de likes `{post_id: delta}`
+    produites hors signaux : compteur et version des posts, scores de tendance,
+    statistiques des auteurs et caches. Le nombre de requêtes ne dépend que du
+    nombre de lots de `BULK_CHUNK_SIZE` posts, pas du nombre de likes ni de posts.
+    """
+    deltas = [(post_id, delta) for post_id, delta in deltas.items() if delta]
+    for start in range(0, len(deltas), BULK_CHUNK_SIZE):
+        chunk = dict(deltas[start:start + BULK_CHUNK_SIZE])
+        delta = Case(*(When(pk=post_id, then=Value(delta)) for post_id, delta in chunk.items()), default=Value(0))
+        Post.objects.filter(pk__in=list(chunk)).update(
+            likes_count=Greatest(F('likes_count') + delta, 0), version=F('version') + 1
+        )
+        record_likes(chunk)
+        record_likes_received_by_post(chunk)
+    for post_id, _ in deltas:
+        invalidate_post(post_id)
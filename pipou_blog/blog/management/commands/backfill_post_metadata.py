@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from blog.cache import invalidate_post, invalidate_syndication
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'extrait, le nombre de mots et le temps de lecture des posts existants"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre de posts traités par lot")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .only('pk', 'content')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].pk
+
+            for post in batch:
+                post.refresh_content_metadata()
+                # Nouvelle version : fragments en cache et ETags reprennent l'extrait recalculé
+                post.version = F('version') + 1
+            Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time', 'version'])
+            for post in batch:
+                invalidate_post(post.pk)
+            invalidate_syndication()
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} posts mis à jour."))
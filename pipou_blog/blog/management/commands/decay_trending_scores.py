@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.trending import redecay_all
+
+
+class Command(BaseCommand):
+    help = "Applique la décroissance temporelle à tous les scores de tendance (à planifier périodiquement)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de scores traités par lot")
+
+    def handle(self, *args, **options):
+        updated, removed = redecay_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{updated} scores mis à jour, {removed} scores expirés supprimés."))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import like_buffer
+
+
+class Command(BaseCommand):
+    help = "Reporte dans la base les likes en attente dans le journal write-behind (BLOG_LIKE_WRITE_BEHIND)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=like_buffer.FLUSH_BATCH_SIZE, help="Nombre d'intentions reportées par transaction")
+        parser.add_argument('--interval', type=float, default=0, help="Tourne en continu en attendant N secondes entre deux reports")
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = like_buffer.flush_all(batch_size=options['batch_size'])
+            if flushed or not options['interval']:
+                self.stdout.write(self.style.SUCCESS(f"{flushed} intentions de like reportées."))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.synthetic import BATCH_SIZE, DEFAULT_END, SYNTHETIC_PASSWORD, ZIPF_EXPONENT, Generator
+
+
+def end_date(value):
+    """'2025-01-01' -> minuit UTC ce jour-là"""
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des utilisateurs, posts et likes synthétiques, reproductibles à partir d'une graine, "
+        "pour tester les performances sur des volumes réalistes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Nombre d'utilisateurs")
+        parser.add_argument('--posts', type=int, default=10000, help="Nombre de posts")
+        parser.add_argument('--likes', type=int, default=100000, help="Nombre de likes visé (plafonné au nombre d'utilisateurs par post)")
+        parser.add_argument('--seed', type=int, default=0, help="Graine : mêmes volumes et même graine, mêmes données")
+        parser.add_argument('--zipf', type=float, default=ZIPF_EXPONENT, help="Exposant de la loi de Zipf des auteurs et des likes")
+        parser.add_argument('--days', type=int, default=365, help="Période couverte par les posts, en jours")
+        parser.add_argument(
+            '--end', type=end_date, default=DEFAULT_END,
+            help=f"Fin de la période couverte, AAAA-MM-JJ (défaut : {DEFAULT_END.date()})",
+        )
+        parser.add_argument('--prefix', default='synth', help="Préfixe des noms d'utilisateurs générés")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Nombre de lignes écrites par lot")
+
+    def handle(self, *args, **options):
+        generator = Generator(
+            options['users'], options['posts'], options['likes'],
+            seed=options['seed'], zipf=options['zipf'], days=options['days'], end=options['end'],
+            prefix=options['prefix'], batch_size=options['batch_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        try:
+            counts = generator.run()
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['users']} utilisateurs, {counts['posts']} posts et {counts['likes']} likes générés "
+            f"(mot de passe : « {SYNTHETIC_PASSWORD} »)."
+        ))
@@ -0,0 +1,43 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Lower
+
+from blog.importer import IMPORT_CHUNK_SIZE, ImportFormatError, import_posts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Importe des posts en masse depuis un fichier JSON ou NDJSON (« - » pour l'entrée standard)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier JSON (tableau) ou NDJSON (un objet par ligne)")
+        parser.add_argument('--author', help="Email de l'auteur des lignes sans champ « author »")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Nombre de posts écrits par transaction")
+
+    def handle(self, *args, **options):
+        default_author = None
+        if options['author']:
+            # Comme l'auteur des lignes et la connexion : email insensible à la casse
+            default_author = (
+                User.objects.alias(email_lower=Lower('email'))
+                .filter(email_lower=options['author'].lower())
+                .first()
+            )
+            if default_author is None:
+                raise CommandError(f"Aucun utilisateur avec l'email {options['author']}")
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            result = import_posts(source, default_author, chunk_size=options['chunk_size'])
+        except ImportFormatError as error:
+            raise CommandError(str(error))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        for error in result.errors:
+            self.stderr.write(f"Ligne {error['row']} : {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"{result.created} posts importés, {len(result.errors)} lignes rejetées."))
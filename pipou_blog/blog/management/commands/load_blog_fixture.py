@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.fixture_loader import FIXTURE_CHUNK_SIZE, FixtureFormatError, load_fixture
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge en flux les utilisateurs et les posts d'une fixture dumpdata "
+        "(« - » pour l'entrée standard), sans dupliquer les lignes existantes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fixture JSON au format dumpdata")
+        parser.add_argument('--chunk-size', type=int, default=FIXTURE_CHUNK_SIZE, help="Nombre d'objets écrits par lot")
+
+    def handle(self, *args, **options):
+        source = sys.stdin.buffer if options['path'] == '-' else open(options['path'], 'rb')
+        try:
+            result = load_fixture(source, chunk_size=options['chunk_size'])
+        except FixtureFormatError as error:
+            raise CommandError(str(error))
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+
+        for model, count in sorted(result.skipped.items()):
+            self.stdout.write(f"{count} objets {model} ignorés")
+        if result.posts_orphaned:
+            self.stderr.write(f"{result.posts_orphaned} posts sans auteur connu ignorés")
+        for error in result.invalid:
+            self.stderr.write(f"Post {error['pk']} : {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Utilisateurs : {result.users_created} créés, {result.users_existing} existants. "
+            f"Posts : {result.posts_created} créés, {result.posts_existing} existants."
+        ))
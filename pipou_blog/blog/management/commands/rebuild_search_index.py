@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.search import index_posts
+
+
+class Command(BaseCommand):
+    help = "Indexe par lots les posts existants pour la recherche plein texte"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de posts indexés par lot")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexed = 0
+        last_id = 0
+
+        while True:
+            ids = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            index_posts(Post.objects.filter(pk__in=ids))
+            indexed += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"{indexed} posts indexés."))
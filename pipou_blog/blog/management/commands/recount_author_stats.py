@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from authentication.models import STATS_FIELDS
+from blog.author_stats import actual_stats
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Recalcule par lots les statistiques d'auteur (posts, likes reçus, dernier post) et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre d'utilisateurs traités par lot")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les écarts sans les corriger")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        checked = fixed = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', *STATS_FIELDS)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            checked += len(batch)
+
+            with transaction.atomic():
+                actual = actual_stats([row[0] for row in batch])
+                drifted = [
+                    User(pk=row[0], **dict(zip(STATS_FIELDS, actual[row[0]])))
+                    for row in batch
+                    if tuple(row[1:]) != actual[row[0]]
+                ]
+                if drifted and not dry_run:
+                    User.objects.bulk_update(drifted, STATS_FIELDS)
+            fixed += len(drifted)
+
+        verb = "à corriger" if dry_run else "corrigées"
+        self.stdout.write(self.style.SUCCESS(f"{checked} auteurs vérifiés, {fixed} statistiques {verb}."))
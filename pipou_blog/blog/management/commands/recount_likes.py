@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from blog.cache import invalidate_post
+from blog.models import Like, Post
+
+
+class Command(BaseCommand):
+    help = "Recalcule Post.likes_count par lots à partir de la table Like et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de posts traités par lot")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les écarts sans les corriger")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        checked = fixed = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'likes_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            checked += len(batch)
+
+            with transaction.atomic():
+                actual = dict(
+                    Like.objects.filter(post_id__in=[pk for pk, _ in batch])
+                    .order_by()
+                    .values('post_id')
+                    .annotate(total=Count('id'))
+                    .values_list('post_id', 'total')
+                )
+                drifted = [
+                    Post(pk=pk, likes_count=actual.get(pk, 0), version=F('version') + 1)
+                    for pk, stored in batch
+                    if stored != actual.get(pk, 0)
+                ]
+                if drifted and not dry_run:
+                    # La version change avec le compteur : fragments en cache et ETags suivent
+                    Post.objects.bulk_update(drifted, ['likes_count', 'version'])
+                    for post in drifted:
+                        invalidate_post(post.pk)
+            fixed += len(drifted)
+
+        verb = "à corriger" if dry_run else "corrigés"
+        self.stdout.write(self.style.SUCCESS(f"{checked} posts vérifiés, {fixed} compteurs {verb}."))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes_count(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Like = apps.get_model('blog', 'Like')
+    counts = (
+        Like.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Post.objects.update(likes_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_like'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de likes'),
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+    ]
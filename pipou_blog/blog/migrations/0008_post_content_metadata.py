@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:27
+
+import math
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Copie figée de blog.models.content_metadata à la date de la migration
+EXCERPT_WORDS = 20
+WORDS_PER_MINUTE = 200
+
+
+def content_metadata(content):
+    word_count = len(strip_tags(content).split())
+    return {
+        'excerpt': Truncator(content).words(EXCERPT_WORDS, truncate=' …'),
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+    }
+
+
+def backfill_content_metadata(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    last_id = 0
+    while True:
+        batch = list(Post.objects.filter(pk__gt=last_id).order_by('pk').only('pk', 'content')[:500])
+        if not batch:
+            break
+        last_id = batch[-1].pk
+        for post in batch:
+            for field, value in content_metadata(post.content).items():
+                setattr(post, field, value)
+        Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_likes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Extrait'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Temps de lecture (min)'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de mots'),
+        ),
+        migrations.RunPython(backfill_content_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:40
+
+import blog.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_INDEX_SQL = """
+UPDATE blog_post AS p SET search_vector =
+    setweight(to_tsvector('french', coalesce(p.title, '')), 'A')
+    || setweight(to_tsvector('french', coalesce(u.username, '')), 'B')
+    || setweight(to_tsvector('french', coalesce(p.content, '')), 'C')
+FROM authentication_user AS u
+WHERE u.id = p.user_id;
+"""
+
+SQLITE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+    "USING fts5(title, content, username, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO blog_post_fts (rowid, title, content, username) "
+    "SELECT p.id, p.title, p.content, u.username "
+    "FROM blog_post AS p JOIN authentication_user AS u ON u.id = p.user_id",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_INDEX_SQL)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_INDEX_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_updated_at'),
+        ('authentication', '0002_user_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.AddIndex(
+            model_name='post',
+            index=blog.indexes.SearchVectorIndex(fields=['search_vector'], name='blog_post_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='blog.post')),
+                ('score', models.FloatField(default=0, verbose_name='Score')),
+                ('scored_at', models.DateTimeField(verbose_name='Date du calcul')),
+            ],
+            options={
+                'verbose_name': 'Score de tendance',
+                'verbose_name_plural': 'Scores de tendance',
+                'indexes': [models.Index(fields=['-score'], name='blog_trending_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+from pipou_blog.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('blog', '0012_trendingscore'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='like',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='blog_like_post_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='like',
+            index=models.Index(fields=['user', '-created_at'], name='blog_like_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='blog_post_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='blog_post_user_created_idx'),
+        ),
+    ]
@@ -1,24 +1,106 @@
+import math
+
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Value
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from blog.indexes import SearchVectorIndex
+
+EXCERPT_WORDS = 20
+WORDS_PER_MINUTE = 200
+
+
+def content_metadata(content):
+  """Calcule l'extrait, le nombre de mots et le temps de lecture (en minutes) d'un contenu"""
+  word_count = len(strip_tags(content).split())
+  return {
+    'excerpt': Truncator(content).words(EXCERPT_WORDS, truncate=' …'),
+    'word_count': word_count,
+    'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+  }
+
 
 # Create your models here.
+class PostQuerySet(models.QuerySet):
+  def with_like_state(self, user):
+    """Annote chaque post avec `liked` (like de l'utilisateur courant) via une sous-requête EXISTS"""
+    if user.is_authenticated:
+      liked = Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+    else:
+      liked = Value(False, output_field=models.BooleanField())
+    return self.annotate(liked=liked)
+
+
 class Post(models.Model):
   title = models.CharField(max_length=255, verbose_name='Titre')
   content = models.TextField(verbose_name='Contenu')
   created_at = models.DateTimeField(auto_now_add=True, verbose_name='Date de création')
+  updated_at = models.DateTimeField(auto_now=True, verbose_name='Date de modification')
   user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+  likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de likes')
+  excerpt = models.TextField(blank=True, default='', editable=False, verbose_name='Extrait')
+  word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de mots')
+  reading_time = models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Temps de lecture (min)')
+  version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Version')
+  # Index plein texte PostgreSQL (voir blog.search) ; reste vide sous SQLite qui utilise FTS5
+  search_vector = SearchVectorField(null=True, editable=False)
+
+  objects = PostQuerySet.as_manager()
 
   class Meta:
     verbose_name = 'Publication'
     verbose_name_plural = 'Publications'
     ordering = ['-created_at']
+    # Ordre des pages par curseur (created_at, id) : fil global et posts d'un auteur
+    indexes = [
+      models.Index(fields=['-created_at', '-id'], name='blog_post_created_idx'),
+      models.Index(fields=['user', '-created_at', '-id'], name='blog_post_user_created_idx'),
+      SearchVectorIndex(fields=['search_vector'], name='blog_post_search_vector_gin'),
+    ]
 
   def __str__(self):
     return self.title
 
+  def save(self, *args, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or 'content' in update_fields:
+      self.refresh_content_metadata()
+      if update_fields is not None:
+        update_fields = set(update_fields) | {'excerpt', 'word_count', 'reading_time'}
+    bumped = not self._state.adding
+    if bumped:
+      if update_fields is None:
+        # Le compteur de likes et l'index de recherche ne s'écrivent que par update() :
+        # une sauvegarde complète écraserait les incréments concurrents
+        update_fields = {
+          field.name for field in self._meta.concrete_fields if not field.primary_key
+        } - {'likes_count', 'search_vector'}
+      # Toute modification change la version, ce qui invalide les fragments en cache ;
+      # incrémentée en base pour ne jamais revenir en arrière face à un like concurrent
+      self.version = F('version') + 1
+      update_fields = set(update_fields) | {'version'}
+    if update_fields is not None:
+      kwargs['update_fields'] = update_fields
+    super().save(*args, **kwargs)
+    if bumped:
+      self.refresh_from_db(fields=['version'])
+
+  def card_cache_key(self):
+    """Clé du fragment de carte mis en cache dans partials/post_card.html"""
+    return make_template_fragment_key('post_card', [self.pk, self.version, self.created_at])
+
+  def refresh_content_metadata(self):
+    """Met à jour les colonnes précalculées à partir du contenu"""
+    for field, value in content_metadata(self.content).items():
+      setattr(self, field, value)
+
   def get_likes_count(self):
-    """Retourne le nombre total de likes pour ce post"""
-    return self.likes.count()
+    """Retourne le nombre total de likes pour ce post (compteur dénormalisé)"""
+    return self.likes_count
 
   def is_liked_by_user(self, user):
     """Vérifie si un utilisateur a liké ce post"""
@@ -36,6 +118,24 @@ class Like(models.Model):
     verbose_name = 'Like'
     verbose_name_plural = 'Likes'
     unique_together = ('user', 'post')
+    indexes = [
+      models.Index(fields=['post', '-created_at', '-id'], name='blog_like_post_created_idx'),
+      models.Index(fields=['user', '-created_at'], name='blog_like_user_created_idx'),
+    ]
     
   def __str__(self):
-    return f"{self.user} a liké {self.post.title}"
\ No newline at end of file
+    return f"{self.user} a liké {self.post.title}"
+
+class TrendingScore(models.Model):
+  """Score de tendance d'un post : somme des likes pondérés par une décroissance exponentielle"""
+  post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+  score = models.FloatField(default=0, verbose_name='Score')
+  scored_at = models.DateTimeField(verbose_name='Date du calcul')
+
+  class Meta:
+    verbose_name = 'Score de tendance'
+    verbose_name_plural = 'Scores de tendance'
+    indexes = [models.Index(fields=['-score'], name='blog_trending_score_idx')]
+
+  def __str__(self):
+    return f"{self.post_id} : {self.score:.2f}"
@@ -0,0 +1,146 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+FEED_PAGE_SIZE = 20
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible ou falsifié"""
+
+
+class KeysetPage:
+    """Page de résultats obtenue par pagination par curseur"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pagination par curseur (« keyset ») sur des champs triés en ordre décroissant.
+
+    Au lieu d'un OFFSET, chaque page filtre sur la dernière clé vue, par exemple
+    ``(created_at, id) < (t, n)``. Le coût d'une page ne dépend donc pas de sa
+    position et aucun ``COUNT(*)`` n'est exécuté.
+    """
+
+    def __init__(self, queryset, per_page, fields=("created_at", "id")):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields = tuple(fields)
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, field) for field in self.fields]
+        payload = {"d": direction, "k": [self._serialize(value) for value in values]}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            direction = payload["d"]
+            keys = payload["k"]
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if direction not in ("n", "p") or len(keys) != len(self.fields):
+            raise InvalidCursor(cursor)
+
+        model = self.queryset.model
+        try:
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, keys)
+            ]
+        except Exception:
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def get_page(self, cursor=None):
+        """Retourne la page désignée par ``cursor`` (la première page si absent ou invalide)"""
+        direction, values = "n", None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = "n", None
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward=direction == "n"))
+
+        if direction == "n":
+            ordering = ["-%s" % field for field in self.fields]
+        else:
+            ordering = list(self.fields)
+
+        # Une ligne de plus que nécessaire indique s'il existe une page suivante
+        rows = list(queryset.order_by(*ordering)[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if direction == "p":
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        next_cursor = self.encode_cursor(rows[-1], "n") if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], "p") if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def _seek_filter(self, values, forward):
+        """Construit ``(f1, f2, ...) < (v1, v2, ...)`` (ou ``>``) en Q imbriqués"""
+        lookup = "lt" if forward else "gt"
+        condition = Q()
+        for index in reversed(range(len(self.fields))):
+            field = self.fields[index]
+            strict = Q(**{"%s__%s" % (field, lookup): values[index]})
+            if index == len(self.fields) - 1:
+                condition = strict
+            else:
+                condition = strict | (Q(**{field: values[index]}) & condition)
+        # Borne redondante sur le premier champ : permet un parcours d'index par intervalle
+        bound = "lte" if forward else "gte"
+        return Q(**{"%s__%s" % (self.fields[0], bound): values[0]}) & condition
+
+    @staticmethod
+    def _serialize(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return value
+
+
+class KeysetPaginationMixin:
+    """
+    Remplace la pagination par numéro de page d'une ``ListView`` par une
+    pagination par curseur, lue dans le paramètre GET ``cursor``.
+    """
+
+    cursor_kwarg = "cursor"
+    keyset_fields = ("created_at", "id")
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, fields=self.keyset_fields)
+        page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
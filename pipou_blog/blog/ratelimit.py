@@ -0,0 +1,213 @@
+"""
+Limitation de débit par seau à jetons (« token bucket »).
+
+Chaque client (adresse IP, ou utilisateur pour les vues réservées aux
+utilisateurs connectés) dispose par portée d'un seau de N jetons, rechargé en
+continu de N jetons par période (`BLOG_RATELIMITS`, par exemple ``'10/m'``).
+Une requête consomme un jeton ; un seau vide donne immédiatement une réponse
+429 avec `Retry-After` (délai avant le prochain jeton), avant l'exécution de la
+vue : sans requête SQL pour les vues anonymes, sans hachage de mot de passe. Contrairement à un compteur par fenêtre fixe,
+un client ne peut pas enchaîner 2N requêtes à la jonction de deux périodes.
+
+Un seau est un couple (jetons, horodatage de la dernière recharge) stocké dans
+le cache. Sa lecture et son écriture se font sous un verrou court posé avec
+`cache.add`, atomique : des requêtes parallèles d'un même client ne lisent
+jamais le même état et ne peuvent pas dépasser la limite ensemble. Le cache
+doit être partagé entre les processus (voir `CACHES`), sinon chaque processus
+applique sa propre limite. Si le cache est indisponible, un stockage en mémoire
+du processus prend le relais. Les requêtes rejetées sont comptées par portée
+(`shed_counts`).
+"""
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES = {
+    'like': '60/m',
+    'login': '10/m',
+    'register': '5/h',
+}
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+BUCKET_KEY = 'blog:ratelimit:%s:%s'
+LOCK_KEY = 'blog:ratelimit:lock:%s:%s'
+SHED_KEY = 'blog:ratelimit:shed:%s'
+LOCAL_MAX_BUCKETS = 10000
+# Un verrou abandonné (processus interrompu) expire seul après LOCK_TIMEOUT secondes
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 20
+LOCK_WAIT = 0.005
+
+
+class BucketBusy(Exception):
+    """Le verrou du seau est resté pris pendant toutes les tentatives"""
+
+
+def parse_rate(rate):
+    """'10/m' -> (10 jetons, 60 secondes)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def consume(state, capacity, period, now):
+    """
+    Recharge le seau `state` (`(jetons, horodatage)`, None pour un seau neuf)
+    jusqu'à `now` puis tente d'en retirer un jeton. Retourne le nouvel état et
+    0 si la requête est acceptée, sinon le nombre de secondes avant le prochain
+    jeton.
+    """
+    refill_per_second = capacity / period
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / refill_per_second
+
+
+class LocalBucketStore:
+    """Seaux en mémoire du processus, utilisés quand le cache ne répond pas"""
+
+    def __init__(self, max_buckets=LOCAL_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+        self.shed = Counter()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, period, now):
+        with self.lock:
+            state, retry_after = consume(self.buckets.get(key), capacity, period, now)
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+            return retry_after
+
+    def count_shed(self, scope):
+        with self.lock:
+            self.shed[scope] += 1
+
+
+local_store = LocalBucketStore()
+
+
+@contextmanager
+def bucket_lock(scope, client):
+    """Verrou exclusif sur le seau `(scope, client)`, partagé par tous les processus"""
+    key = LOCK_KEY % (scope, client)
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(key, 1, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        raise BucketBusy
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def take_token(scope, client, rate, now=None):
+    """
+    Consomme un jeton du seau `(scope, client)`. Retourne 0 si la requête est
+    acceptée, sinon le nombre de secondes avant le prochain jeton.
+    """
+    capacity, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    key = BUCKET_KEY % (scope, client)
+
+    try:
+        with bucket_lock(scope, client):
+            state, retry_after = consume(cache.get(key), capacity, period, now)
+            # Un seau inutilisé depuis une période entière est plein : inutile de le garder
+            cache.set(key, state, period)
+        return retry_after
+    except BucketBusy:
+        # Rafale de requêtes parallèles d'un même client : rejetée plutôt qu'attendue
+        return LOCK_TIMEOUT
+    except Exception:
+        logger.warning("Cache indisponible, limitation de débit en mémoire", exc_info=True)
+        return local_store.consume(key, capacity, period, now)
+
+
+def count_shed(scope):
+    try:
+        cache.add(SHED_KEY % scope, 0, None)
+        cache.incr(SHED_KEY % scope)
+    except Exception:
+        local_store.count_shed(scope)
+
+
+def shed_counts():
+    """Nombre de requêtes rejetées par portée (cache partagé et repli local cumulés)"""
+    counts = {}
+    for scope in get_rates():
+        try:
+            shared = cache.get(SHED_KEY % scope, 0)
+        except Exception:
+            shared = 0
+        counts[scope] = shared + local_store.shed[scope]
+    return counts
+
+
+def get_rates():
+    return {**DEFAULT_RATES, **getattr(settings, 'BLOG_RATELIMITS', {})}
+
+
+def ip_key(request):
+    """Adresse IP du client, None si elle est inconnue (la requête n'est alors pas limitée)"""
+    ip = client_ip(request)
+    return 'ip:' + ip if ip else None
+
+
+def user_key(request):
+    """
+    Utilisateur connecté : un même compte partage sa limite entre toutes ses
+    sessions. À placer sous `login_required`.
+    """
+    return 'user:%s' % request.user.pk
+
+
+def client_ip(request):
+    """
+    `REMOTE_ADDR`, ou derrière un proxy qui réécrit l'en-tête (Vercel, voir
+    `BLOG_RATELIMIT_TRUST_FORWARDED_FOR`) la première adresse de X-Forwarded-For
+    """
+    if getattr(settings, 'BLOG_RATELIMIT_TRUST_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def ratelimit(scope, key=ip_key, applies=None):
+    """
+    Limite le débit de la vue décorée pour la portée `scope` (voir
+    `BLOG_RATELIMITS`). `applies(request)` restreint la limitation à certaines
+    requêtes, par exemple celles qui vérifient un mot de passe. Les vues anonymes
+    sont limitées par adresse IP, avant toute requête SQL. `key(request)` peut
+    retourner None : la requête passe alors sans limite.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if getattr(settings, 'BLOG_RATELIMIT_ENABLED', True) and (applies is None or applies(request)):
+                client = key(request)
+                # Sans client identifiable, un seau unique bloquerait tout le site
+                retry_after = take_token(scope, client, get_rates()[scope]) if client else 0
+                if retry_after:
+                    count_shed(scope)
+                    response = HttpResponse("Trop de requêtes, réessayez plus tard.", status=429, content_type='text/plain; charset=utf-8')
+                    response['Retry-After'] = str(math.ceil(retry_after))
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
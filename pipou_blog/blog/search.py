@@ -0,0 +1,122 @@
+"""
+Recherche plein texte sur les posts (titre, contenu, nom d'auteur).
+
+- PostgreSQL : colonne `Post.search_vector` (tsvector) couverte par un index GIN,
+  classement avec `ts_rank`.
+- SQLite : table virtuelle FTS5 `blog_post_fts` dont le rowid est l'id du post,
+  classement avec `bm25`.
+
+L'index est maintenu à chaque enregistrement ou suppression de post (voir
+`blog.signals`) et peut être reconstruit avec la commande `rebuild_search_index`.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import F, OuterRef, Q, Subquery
+
+from blog.models import Post
+
+SEARCH_CONFIG = 'french'
+FTS_TABLE = 'blog_post_fts'
+
+User = get_user_model()
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def post_search_vector():
+    """Expression tsvector pondérée : titre (A), auteur (B), contenu (C)"""
+    username = Subquery(User.objects.filter(pk=OuterRef('user_id')).values('username')[:1])
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(username, weight='B', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def ensure_fts_table(sender=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Crée la table FTS5 d'une base construite sans migrations (`migrate
+    --run-syncdb`, bases de test), que la migration 0011 ne couvre pas.
+    Branchée sur `post_migrate` (voir `BlogConfig.ready`) : exécutée une fois
+    par migration, hors de toute transaction.
+    """
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(title, content, username, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def index_posts(queryset):
+    """Met à jour l'index de recherche des posts du queryset"""
+    if is_postgresql():
+        queryset.update(search_vector=post_search_vector())
+    elif connection.vendor == 'sqlite':
+        rows = list(queryset.values_list('pk', 'title', 'content', 'user__username'))
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            placeholders = ', '.join(['%s'] * len(rows))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", [row[0] for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, username) VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+
+def index_post(post):
+    index_posts(Post.objects.filter(pk=post.pk))
+
+
+def unindex_post(post_id):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+
+def fts5_query(text):
+    """Transforme la saisie en requête FTS5 sûre : chaque mot entre guillemets, préfixe autorisé"""
+    words = re.findall(r'\w+', text)
+    return ' '.join('"%s"*' % word for word in words)
+
+
+def search_post_ids(text, limit, offset=0):
+    """Retourne les ids des posts correspondant à `text`, du plus pertinent au moins pertinent"""
+    if not text.strip():
+        return []
+
+    if is_postgresql():
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return list(
+            Post.objects.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-created_at', '-id')
+            .values_list('pk', flat=True)[offset:offset + limit]
+        )
+
+    if connection.vendor == 'sqlite':
+        match = fts5_query(text)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            # Poids bm25 : titre, contenu, auteur (les scores bm25 sont négatifs : tri croissant)
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 5.0), rowid DESC LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    # Autres moteurs : recherche naïve, uniquement pour le développement
+    return list(
+        Post.objects.filter(
+            Q(title__icontains=text) | Q(content__icontains=text) | Q(user__username__icontains=text)
+        ).values_list('pk', flat=True)[offset:offset + limit]
+    )
@@ -0,0 +1,173 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from collections import Counter
+
+from django.db.models import Count, F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .author_stats import (
+    record_likes_received, record_likes_received_by_post, record_post_created, record_post_deleted,
+)
+from .cache import invalidate_post, invalidate_syndication, invalidate_users
+from .likes import apply_like_deltas
+from .models import Like, Post
+from .search import index_post, index_posts, unindex_post
+from .trending import record_like
+
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    """Incrémente le compteur dénormalisé du post à la création d'un like"""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            likes_count=F('likes_count') + 1, version=F('version') + 1
+        )
+        record_like(instance.post_id, 1)
+        record_likes_received(instance.post_id, 1)
+        invalidate_post(instance.post_id)
+
+
+def origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def is_cascade(origin):
+    """Suppression partie d'un post ou d'un utilisateur (instance ou queryset)"""
+    return issubclass(origin_model(origin), (Post, get_user_model()))
+
+
+def is_user_deletion(origin):
+    """Suppression partie d'un utilisateur : ses posts disparaissent avec lui"""
+    return issubclass(origin_model(origin), get_user_model())
+
+
+def first_of_bulk_delete(origin, instance, marker):
+    """
+    Suppression par queryset : vrai pour le premier objet du queryset, que le
+    receveur traite alors en entier d'une seule requête ; faux pour les suivants.
+    """
+    pending = getattr(origin, marker, None)
+    first = pending is None
+    if first:
+        pending = set(origin.values_list('pk', flat=True))
+        setattr(origin, marker, pending)
+    pending.discard(instance.pk)
+    if not pending:
+        # Un nouvel appel à delete() sur le même queryset repart de zéro
+        delattr(origin, marker)
+    return first
+
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, origin=None, **kwargs):
+    """Décrémente le compteur à la suppression d'un like (vue, admin ou queryset)"""
+    if is_cascade(origin):
+        # Likes supprimés en cascade : décomptés en bloc par les receveurs pre_delete
+        # ci-dessous, sinon chaque like coûterait plusieurs requêtes
+        return
+    Post.objects.filter(pk=instance.post_id, likes_count__gt=0).update(
+        likes_count=F('likes_count') - 1, version=F('version') + 1
+    )
+    record_like(instance.post_id, -1)
+    record_likes_received(instance.post_id, -1)
+    invalidate_post(instance.post_id)
+
+
+@receiver(pre_delete, sender=Post)
+def discount_deleted_post_likes(sender, instance, origin=None, **kwargs):
+    """Retire aux auteurs les likes des posts supprimés, en une fois par suppression"""
+    if is_user_deletion(origin):
+        # Les statistiques de l'auteur supprimé n'ont plus d'importance
+        return
+    if isinstance(origin, QuerySet):
+        if first_of_bulk_delete(origin, instance, '_likes_discounted'):
+            counts = Like.objects.filter(post__in=origin).values_list('post_id').annotate(likes=Count('pk'))
+            record_likes_received_by_post({post_id: -likes for post_id, likes in counts})
+        return
+    likes = Like.objects.filter(post_id=instance.pk).count()
+    if likes:
+        record_likes_received(instance.pk, -likes)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def discount_deleted_user_likes(sender, instance, origin=None, **kwargs):
+    """Retire les likes des utilisateurs supprimés des posts des autres auteurs, en bloc"""
+    if isinstance(origin, QuerySet):
+        if not first_of_bulk_delete(origin, instance, '_likes_discounted'):
+            return
+        users = origin
+    else:
+        users = [instance.pk]
+    liked = Like.objects.filter(user__in=users).exclude(post__user__in=users)
+    deltas = Counter()
+    deltas.subtract(liked.values_list('post_id', flat=True))
+    apply_like_deltas(deltas)
+
+
+@receiver(post_delete, sender=Post)
+def drop_post_card_fragment(sender, instance, **kwargs):
+    """Libère le fragment de carte en cache d'un post supprimé"""
+    cache.delete(instance.card_cache_key())
+    invalidate_post(instance.pk)
+    invalidate_syndication()
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def increment_author_post_count(sender, instance, created, **kwargs):
+    """Met à jour les statistiques de l'auteur à la publication d'un post"""
+    if created:
+        record_post_created(instance)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_author_post_count(sender, instance, origin=None, **kwargs):
+    if not is_user_deletion(origin):
+        record_post_deleted(instance)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post_pages(sender, instance, **kwargs):
+    """Rend obsolètes les pages anonymes et les flux en cache qui affichent ce post"""
+    invalidate_post(instance.pk)
+    invalidate_syndication()
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Maintient l'index plein texte quand le titre ou le contenu change"""
+    if update_fields is None or {'title', 'content'} & set(update_fields):
+        index_post(instance)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def detect_username_change(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Repère un changement de nom d'utilisateur, indexé avec chacun de ses posts"""
+    instance._username_changed = False
+    if raw or instance._state.adding or (update_fields is not None and 'username' not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    instance._username_changed = previous is not None and previous != instance.username
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_renamed_user_posts(sender, instance, **kwargs):
+    if getattr(instance, '_username_changed', False):
+        index_posts(Post.objects.filter(user_id=instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_pages(sender, instance, update_fields=None, **kwargs):
+    """Un nom ou un avatar modifié apparaît dans les pages en cache (hors simple connexion)"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_users()
+    invalidate_syndication()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_deleted_user_pages(sender, instance, **kwargs):
+    invalidate_users()
+    invalidate_syndication()
@@ -0,0 +1,303 @@
+"""
+Génération de données synthétiques (utilisateurs, posts, likes) à l'échelle de
+la production, pour les mesures de performance et le travail sur les index.
+
+Les volumes sont libres (par exemple 100k utilisateurs, 2M posts, 50M likes) et
+le résultat ne dépend que de la graine : deux générations avec la même graine et
+les mêmes volumes produisent les mêmes données.
+
+Distributions :
+
+- auteurs et likes suivent une loi de Zipf (exposant `zipf`) sur un classement
+  aléatoire des utilisateurs et des posts : quelques comptes très prolifiques,
+  quelques posts viraux, une longue traîne ;
+- longueur des contenus log-normale (médiane ~150 mots), en paragraphes ;
+- dates des posts réparties sur les `days` jours précédant la date de fin `end`
+  (fixe par défaut, pour que la graine détermine aussi les dates), likes
+  postérieurs à leur post.
+
+Le plan (auteur, date et nombre de likes de chaque post) est calculé d'abord,
+dans des tableaux compacts, afin d'écrire directement les compteurs
+dénormalisés (`likes_count`, statistiques d'auteur). Les lignes sont ensuite
+écrites par lots avec des ids explicites : `COPY` sous PostgreSQL, `INSERT`
+groupés ailleurs (un `bulk_create` imposerait `auto_now_add` aux dates).
+L'index de recherche et les caches sont mis à jour à la fin de chaque lot.
+"""
+import io
+import itertools
+import math
+import random
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils.crypto import RANDOM_STRING_CHARS
+
+from blog.cache import invalidate_feed, invalidate_syndication, invalidate_users
+from blog.models import Like, Post, content_metadata
+from blog.search import index_posts
+
+BATCH_SIZE = 5000
+ZIPF_EXPONENT = 1.1
+SYNTHETIC_PASSWORD = 'synthetic'
+# Fin de la période couverte par défaut : fixe, pour que les dates ne dépendent que de la graine
+DEFAULT_END = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+WORDS = (
+    "le la les un une des et mais donc car pour avec sans sous sur dans chez "
+    "blog article chat pipou maison jardin cuisine recette voyage montagne mer "
+    "ville projet code django python base données index requête cache page "
+    "lecture écriture matin soir semaine printemps hiver soleil pluie café thé "
+    "livre musique photo ami famille travail idée question réponse histoire "
+    "petit grand nouveau vieux beau simple rapide lent vrai facile difficile "
+    "aimer partager écrire lire chercher trouver penser voir faire aller venir"
+).split()
+
+User = get_user_model()
+
+
+def zipf_cum_weights(count, exponent):
+    """Poids cumulés de la loi de Zipf sur les rangs 1..count"""
+    return array('d', itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def shuffled(count, rng):
+    """Permutation aléatoire : le rang k de la loi de Zipf désigne l'élément order[k]"""
+    order = array('l', range(count))
+    rng.shuffle(order)
+    return order
+
+
+def sentence(rng, words):
+    text = ' '.join(rng.choices(WORDS, k=words))
+    return text[0].upper() + text[1:]
+
+
+def post_content(rng):
+    words = min(3000, max(5, int(rng.lognormvariate(math.log(150), 0.8))))
+    paragraphs = []
+    while words > 0:
+        length = min(words, rng.randint(30, 120))
+        paragraphs.append(sentence(rng, length) + '.')
+        words -= length
+    return '\n\n'.join(paragraphs)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def insert_rows(model, rows):
+    """
+    Écrit des lignes (dicts par attname) de `model` ; les champs absents prennent
+    leur valeur par défaut. PostgreSQL : `COPY ... FROM STDIN`, sinon `executemany`.
+    """
+    db = connections[DEFAULT_DB_ALIAS]
+    fields = model._meta.concrete_fields
+    columns = ', '.join(db.ops.quote_name(field.column) for field in fields)
+    defaults = [field.get_default() for field in fields]
+    # Seules les dates demandent une conversion : les autres valeurs passent telles quelles
+    dates = {index for index, field in enumerate(fields) if field.get_internal_type() == 'DateTimeField'}
+    table = db.ops.quote_name(model._meta.db_table)
+    with db.cursor() as cursor:
+        if db.vendor == 'postgresql':
+            buffer = io.StringIO()
+            for row in rows:
+                values = (row.get(field.attname, default) for field, default in zip(fields, defaults))
+                buffer.write('\t'.join(copy_value(value) for value in values) + '\n')
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+        else:
+            values = [
+                [
+                    db.ops.adapt_datetimefield_value(value) if index in dates else value
+                    for index, value in enumerate(row.get(field.attname, default) for field, default in zip(fields, defaults))
+                ]
+                for row in rows
+            ]
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", values)
+
+
+def copy_value(value):
+    """Valeur au format texte de COPY"""
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def reset_sequences():
+    """Les ids ont été fixés explicitement : réaligne les séquences (PostgreSQL)"""
+    db = connections[DEFAULT_DB_ALIAS]
+    with db.cursor() as cursor:
+        for sql in db.ops.sequence_reset_sql(no_style(), [User, Post, Like]):
+            cursor.execute(sql)
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class Generator:
+    """Prépare puis écrit un jeu de données ; `log` reçoit les messages de progression"""
+
+    def __init__(self, users, posts, likes, seed=0, zipf=ZIPF_EXPONENT, days=365, end=DEFAULT_END,
+                 prefix='synth', batch_size=BATCH_SIZE, log=None):
+        self.users = users
+        self.posts = posts if users else 0
+        self.likes = likes
+        self.seed = seed
+        self.zipf = zipf
+        self.days = days
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.end = end.replace(microsecond=0)
+
+    def rng(self, stage):
+        """Un générateur par étape : chaque étape reste reproductible indépendamment des autres"""
+        return random.Random(f"{self.seed}:{stage}")
+
+    def run(self):
+        if User.objects.filter(username__startswith=f"{self.prefix}-").exists():
+            raise ValueError(f"Des utilisateurs « {self.prefix}-… » existent déjà : choisissez un autre préfixe")
+        self.plan()
+        self.first_user, self.first_post, self.first_like = next_id(User), next_id(Post), next_id(Like)
+        self.write_users()
+        self.write_posts()
+        self.write_likes()
+        reset_sequences()
+        invalidate_users()
+        invalidate_feed()
+        invalidate_syndication()
+        return {'users': self.users, 'posts': self.posts, 'likes': sum(self.post_likes)}
+
+    def plan(self):
+        """Auteur, date et nombre de likes de chaque post, et statistiques des auteurs"""
+        rng = self.rng('plan')
+        start = self.end - timedelta(days=self.days)
+        step = self.days * 86400 / max(1, self.posts)
+
+        authors = shuffled(self.users, rng)
+        author_weights = zipf_cum_weights(self.users, self.zipf)
+        author_ranks = rng.choices(range(self.users), cum_weights=author_weights, k=self.posts) if self.posts else []
+        self.post_authors = array('l', (authors[rank] for rank in author_ranks))
+        # Dates croissantes avec les ids, comme en production
+        self.post_times = array('d', ((index + rng.random()) * step for index in range(self.posts)))
+        self.start = start
+
+        self.post_likes = array('l', [0] * self.posts)
+        if self.posts and self.likes:
+            ranked = shuffled(self.posts, rng)
+            weights = zipf_cum_weights(self.posts, self.zipf)
+            total = weights[-1]
+            assigned = carry = 0
+            for rank, cumulative in enumerate(weights):
+                # Arrondi cumulé : la somme des parts vaut exactement `likes`
+                target = round(self.likes * cumulative / total)
+                wanted = target - assigned + carry
+                assigned = target
+                # Un post ne peut pas recevoir plus de likes qu'il n'y a d'utilisateurs :
+                # l'excédent passe aux posts suivants du classement
+                self.post_likes[ranked[rank]] = min(self.users, wanted)
+                carry = wanted - self.post_likes[ranked[rank]]
+
+        self.user_posts = array('l', [0] * self.users)
+        self.user_likes = array('l', [0] * self.users)
+        self.user_last_post = array('d', [-1.0] * self.users)
+        for index, author in enumerate(self.post_authors):
+            self.user_posts[author] += 1
+            self.user_likes[author] += self.post_likes[index]
+            self.user_last_post[author] = self.post_times[index]
+
+    def post_date(self, index):
+        return self.start + timedelta(seconds=int(self.post_times[index]))
+
+    def write_users(self):
+        rng = self.rng('users')
+        # Sel tiré de la graine mais aussi long qu'un sel aléatoire : un sel trop court
+        # ferait recalculer et réenregistrer le hash à chaque connexion
+        salt = ''.join(rng.choices(RANDOM_STRING_CHARS, k=22))
+        password = make_password(SYNTHETIC_PASSWORD, salt=salt)
+        for batch in batches(range(self.users), self.batch_size):
+            rows = []
+            for index in batch:
+                username = f"{self.prefix}-{index}"
+                last_post = self.user_last_post[index]
+                rows.append({
+                    'id': self.first_user + index,
+                    'username': username,
+                    'email': f"{username}@example.com",
+                    'password': password,
+                    'first_name': rng.choice(WORDS).capitalize(),
+                    'last_name': rng.choice(WORDS).capitalize(),
+                    'date_joined': self.start,
+                    'date_updated': self.end,
+                    'post_count': self.user_posts[index],
+                    'likes_received': self.user_likes[index],
+                    'last_post_at': self.start + timedelta(seconds=int(last_post)) if last_post >= 0 else None,
+                })
+            with transaction.atomic():
+                insert_rows(User, rows)
+            self.log(f"Utilisateurs : {batch[-1] + 1}/{self.users}")
+
+    def write_posts(self):
+        rng = self.rng('posts')
+        for batch in batches(range(self.posts), self.batch_size):
+            rows = []
+            for index in batch:
+                content = post_content(rng)
+                created_at = self.post_date(index)
+                rows.append({
+                    'id': self.first_post + index,
+                    'title': sentence(rng, rng.randint(3, 9)),
+                    'content': content,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'user_id': self.first_user + self.post_authors[index],
+                    'likes_count': self.post_likes[index],
+                    **content_metadata(content),
+                })
+            with transaction.atomic():
+                insert_rows(Post, rows)
+                index_posts(Post.objects.filter(pk__range=(rows[0]['id'], rows[-1]['id'])))
+            self.log(f"Posts : {batch[-1] + 1}/{self.posts}")
+
+    def write_likes(self):
+        rng = self.rng('likes')
+        total = sum(self.post_likes)
+        horizon = self.end.timestamp()
+        ids = itertools.count(self.first_like)
+
+        def likes():
+            for index, count in enumerate(self.post_likes):
+                if not count:
+                    continue
+                created = self.post_date(index)
+                window = max(1.0, horizon - created.timestamp())
+                for user in rng.sample(range(self.users), count):
+                    yield {
+                        'id': next(ids),
+                        'user_id': self.first_user + user,
+                        'post_id': self.first_post + index,
+                        'created_at': created + timedelta(seconds=int(rng.random() * window)),
+                    }
+
+        written = 0
+        for rows in batches(likes(), self.batch_size):
+            with transaction.atomic():
+                insert_rows(Like, rows)
+            written += len(rows)
+            self.log(f"Likes : {written}/{total}")
@@ -1,11 +1,45 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.http import HttpRequest, HttpResponse
 from django.contrib.auth import get_user_model
-from .models import Post
+from .models import Post, Like, TrendingScore
+from .trending import trending_posts
+from .likes import add_like, remove_like
+from .fixture_loader import FixtureFormatError, iter_json_array, load_fixture
+from .author_stats import actual_stats
+from . import like_buffer, ratelimit
+from unittest import mock
+from django.contrib.messages.storage.fallback import FallbackStorage
+from authentication.views import custom_login_view
+from django.test import override_settings
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from django.db import OperationalError, close_old_connections
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+from .views import BlogHome
 from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F, Max, Min
+from django.core.cache import cache
+from io import BytesIO, StringIO
 
 User = get_user_model()
+
+# Pour les classes qui créent beaucoup de comptes : PBKDF2 n'y apporte que de la lenteur
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 class BlogViewTests(TestCase):
   def setUp(self):
+    cache.clear()
     self.client = Client()
     self.user = User.objects.create_user(username="test", email="testuser@gmail.com", password="testpass")
     self.post = Post.objects.create(title="Test Post", content="Test Content", user=self.user)
@@ -90,3 +124,1501 @@ class BlogViewTests(TestCase):
     self.assertEqual(response.status_code, 404)
     self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
 
+
+class BlogHomePaginationTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="paginator", email="paginator@gmail.com", password="testpass")
+    self.posts = [
+      Post.objects.create(title=f"Post {i}", content="Contenu", user=self.user)
+      for i in range(45)
+    ]
+
+  def test_first_page_is_limited(self):
+    response = self.client.get(reverse("index"))
+    posts = response.context["posts"]
+
+    self.assertEqual(len(posts), 20)
+    self.assertEqual(posts[0], self.posts[-1])
+    self.assertTrue(response.context["page_obj"].has_next())
+    self.assertFalse(response.context["page_obj"].has_previous())
+
+  def test_cursor_walks_every_post_once(self):
+    seen = []
+    cursor = None
+    while True:
+      response = self.client.get(reverse("index"), {"cursor": cursor} if cursor else {})
+      page = response.context["page_obj"]
+      seen.extend(post.pk for post in page.object_list)
+      if not page.has_next():
+        break
+      cursor = page.next_cursor
+
+    self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+  def test_previous_cursor_returns_previous_page(self):
+    first = self.client.get(reverse("index")).context["page_obj"]
+    second = self.client.get(reverse("index"), {"cursor": first.next_cursor}).context["page_obj"]
+    back = self.client.get(reverse("index"), {"cursor": second.previous_cursor}).context["page_obj"]
+
+    self.assertEqual(list(back.object_list), list(first.object_list))
+    self.assertFalse(back.has_previous())
+
+  def test_same_timestamp_posts_are_not_skipped(self):
+    Post.objects.update(created_at=self.posts[0].created_at)
+    seen = []
+    cursor = None
+    while True:
+      page = self.client.get(reverse("index"), {"cursor": cursor} if cursor else {}).context["page_obj"]
+      seen.extend(post.pk for post in page.object_list)
+      if not page.has_next():
+        break
+      cursor = page.next_cursor
+
+    self.assertEqual(sorted(seen), sorted(post.pk for post in self.posts))
+    self.assertEqual(len(seen), len(set(seen)))
+
+  def test_invalid_cursor_falls_back_to_first_page(self):
+    response = self.client.get(reverse("index"), {"cursor": "pas-un-curseur"})
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response.context["posts"][0], self.posts[-1])
+
+  def test_no_count_or_offset_query(self):
+    cursor = self.client.get(reverse("index")).context["page_obj"].next_cursor
+    with CaptureQueriesContext(connection) as queries:
+      self.client.get(reverse("index"), {"cursor": cursor})
+
+    post_queries = [query["sql"].upper() for query in queries.captured_queries if 'FROM "BLOG_POST"' in query["sql"].upper()]
+    sql = " ".join(post_queries)
+    self.assertNotIn("COUNT(", sql)
+    self.assertNotIn("OFFSET", sql)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class LikeCounterTests(TestCase):
+  def setUp(self):
+    self.client = Client()
+    self.user = User.objects.create_user(username="liker", email="liker@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post aimé", content="Contenu", user=self.user)
+    self.client.login(email="liker@gmail.com", password="testpass")
+
+  def test_toggle_like_updates_counter(self):
+    response = self.client.post(reverse("like", args=[self.post.pk]))
+    self.assertEqual(response.json(), {"liked": True, "likes_count": 1})
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 1)
+
+    response = self.client.post(reverse("like", args=[self.post.pk]))
+    self.assertEqual(response.json(), {"liked": False, "likes_count": 0})
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 0)
+
+  def test_cascade_delete_of_liker_updates_counter(self):
+    other = User.objects.create_user(username="other", email="other@gmail.com", password="testpass")
+    Like.objects.create(user=other, post=self.post)
+    other.delete()
+
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 0)
+
+  def test_cascade_delete_of_liker_is_accounted_in_bulk(self):
+    other_author = User.objects.create_user(username="autre", email="autre@gmail.com", password="testpass")
+    posts = [self.post] + [Post.objects.create(title=f"Post {i}", content="Contenu", user=other_author) for i in range(3)]
+    fan = User.objects.create_user(username="fan", email="fan@gmail.com", password="testpass")
+    for post in posts:
+      Like.objects.create(user=fan, post=post)
+      Like.objects.create(user=self.user, post=post)
+
+    with CaptureQueriesContext(connection) as queries:
+      fan.delete()
+
+    for post in posts:
+      post.refresh_from_db()
+      self.assertEqual(post.likes_count, 1)
+      self.assertAlmostEqual(TrendingScore.objects.get(post=post).score, 1, places=2)
+    self.assertEqual(User.objects.get(pk=self.user.pk).likes_received, 1)
+    self.assertEqual(User.objects.get(pk=other_author.pk).likes_received, 3)
+    # Pas de requêtes par like supprimé
+    self.assertFalse([q for q in queries.captured_queries if 'UPDATE "blog_post"' in q["sql"]][1:])
+
+  def test_queryset_delete_of_users_is_accounted_in_bulk(self):
+    other_author = User.objects.create_user(username="autre", email="autre@gmail.com", password="testpass")
+    posts = [self.post] + [Post.objects.create(title=f"Post {i}", content="Contenu", user=other_author) for i in range(3)]
+    fans = [
+      User.objects.create_user(username=f"fan{i}", email=f"fan{i}@gmail.com", password="testpass") for i in range(2)
+    ]
+    # Posts des fans, supprimés avec eux
+    for i in range(5):
+      Like.objects.create(user=self.user, post=Post.objects.create(title=f"Fan {i}", content="Contenu", user=fans[0]))
+    for post in posts:
+      Like.objects.create(user=self.user, post=post)
+      for fan in fans:
+        Like.objects.create(user=fan, post=post)
+
+    with CaptureQueriesContext(connection) as queries:
+      User.objects.filter(username__startswith="fan").delete()
+
+    for post in posts:
+      post.refresh_from_db()
+      self.assertEqual(post.likes_count, 1)
+    self.assertEqual(User.objects.get(pk=self.user.pk).likes_received, 1)
+    self.assertEqual(User.objects.get(pk=other_author.pk).likes_received, 3)
+    # Une mise à jour par table, quel que soit le nombre de posts et de likes supprimés
+    for table in ("blog_post", "authentication_user"):
+      updates = [q for q in queries.captured_queries if f'UPDATE "{table}"' in q["sql"]]
+      self.assertLessEqual(len(updates), 1, table)
+
+  def test_queryset_delete_of_posts_discounts_authors_in_bulk(self):
+    fan = User.objects.create_user(username="fan", email="fan@gmail.com", password="testpass")
+    for i in range(4):
+      Like.objects.create(user=fan, post=Post.objects.create(title=f"Brouillon {i}", content="Contenu", user=self.user))
+    Like.objects.create(user=fan, post=self.post)
+
+    with CaptureQueriesContext(connection) as queries:
+      Post.objects.filter(title__startswith="Brouillon").delete()
+
+    self.assertEqual(User.objects.get(pk=self.user.pk).likes_received, 1)
+    counts = [q for q in queries.captured_queries if 'COUNT(' in q["sql"]]
+    self.assertLessEqual(len(counts), 1)
+
+  def test_recount_likes_fixes_drift(self):
+    Like.objects.create(user=self.user, post=self.post)
+    Post.objects.filter(pk=self.post.pk).update(likes_count=42)
+    version = Post.objects.get(pk=self.post.pk).version
+
+    out = StringIO()
+    call_command("recount_likes", "--batch-size", "1", stdout=out)
+
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 1)
+    self.assertEqual(self.post.version, version + 1)
+    self.assertIn("1 compteurs corrigés", out.getvalue())
+
+class LikesStatusBatchTests(TestCase):
+  def setUp(self):
+    self.client = Client()
+    self.user = User.objects.create_user(username="batch", email="batch@gmail.com", password="testpass")
+    self.posts = [Post.objects.create(title=f"Post {i}", content="Contenu", user=self.user) for i in range(50)]
+    Like.objects.create(user=self.user, post=self.posts[0])
+    self.client.login(email="batch@gmail.com", password="testpass")
+
+  def test_returns_state_for_every_requested_post(self):
+    ids = ",".join(str(post.pk) for post in self.posts)
+    response = self.client.get(reverse("likes_status"), {"ids": ids})
+
+    data = response.json()["posts"]
+    self.assertEqual(len(data), 50)
+    self.assertEqual(data[str(self.posts[0].pk)], {"liked": True, "likes_count": 1})
+    self.assertEqual(data[str(self.posts[1].pk)], {"liked": False, "likes_count": 0})
+
+  def test_query_count_is_constant(self):
+    # Forcer le chargement de la session et de l'utilisateur avant de compter
+    self.client.get(reverse("likes_status"), {"ids": str(self.posts[0].pk)})
+    ids = ",".join(str(post.pk) for post in self.posts)
+    with CaptureQueriesContext(connection) as few:
+      self.client.get(reverse("likes_status"), {"ids": str(self.posts[0].pk)})
+    with CaptureQueriesContext(connection) as many:
+      self.client.get(reverse("likes_status"), {"ids": ids})
+
+    self.assertEqual(len(few), len(many))
+
+  def test_invalid_ids_return_400(self):
+    response = self.client.get(reverse("likes_status"), {"ids": "1,abc"})
+    self.assertEqual(response.status_code, 400)
+
+  def test_requires_login(self):
+    self.client.logout()
+    response = self.client.get(reverse("likes_status"), {"ids": str(self.posts[0].pk)})
+    self.assertEqual(response.status_code, 302)
+
+class LikeStateRenderingTests(TestCase):
+  def setUp(self):
+    self.client = Client()
+    self.user = User.objects.create_user(username="viewer", email="viewer@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post aimé", content="Contenu", user=self.user)
+    Like.objects.create(user=self.user, post=self.post)
+
+  def test_home_renders_liked_state(self):
+    self.client.login(email="viewer@gmail.com", password="testpass")
+    response = self.client.get(reverse("index"))
+
+    self.assertTrue(response.context["posts"][0].liked)
+    self.assertContains(response, 'data-liked="true"')
+    self.assertContains(response, "💙")
+
+  def test_detail_renders_liked_state(self):
+    self.client.login(email="viewer@gmail.com", password="testpass")
+    response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+
+    self.assertTrue(response.context["post"].liked)
+    self.assertContains(response, 'data-liked="true"')
+
+  def test_anonymous_sees_unliked_state(self):
+    response = self.client.get(reverse("index"))
+
+    self.assertFalse(response.context["posts"][0].liked)
+    self.assertNotContains(response, "💙")
+
+  def test_home_query_count_does_not_depend_on_page_size(self):
+    self.client.login(email="viewer@gmail.com", password="testpass")
+    with CaptureQueriesContext(connection) as one_post:
+      self.client.get(reverse("index"))
+
+    for i in range(19):
+      post = Post.objects.create(title=f"Post {i}", content="Contenu", user=self.user)
+      Like.objects.create(user=self.user, post=post)
+    with CaptureQueriesContext(connection) as full_page:
+      self.client.get(reverse("index"))
+
+    self.assertEqual(len(one_post), len(full_page))
+
+class PostContentMetadataTests(TestCase):
+  def setUp(self):
+    self.client = Client()
+    self.user = User.objects.create_user(username="writer", email="writer@gmail.com", password="testpass")
+
+  def test_metadata_computed_on_save(self):
+    post = Post.objects.create(title="Long", content=" ".join(["mot"] * 450), user=self.user)
+
+    self.assertEqual(post.word_count, 450)
+    self.assertEqual(post.reading_time, 3)
+    self.assertEqual(post.excerpt, " ".join(["mot"] * 20) + " …")
+
+  def test_metadata_refreshed_on_edit(self):
+    post = Post.objects.create(title="Court", content="Un deux trois", user=self.user)
+    self.client.login(email="writer@gmail.com", password="testpass")
+    self.client.post(reverse("edit", args=[post.pk]), {"title": "Court", "content": "Quatre cinq"})
+
+    post.refresh_from_db()
+    self.assertEqual(post.word_count, 2)
+    self.assertEqual(post.excerpt, "Quatre cinq")
+
+  def test_home_does_not_load_content(self):
+    Post.objects.create(title="Titre", content="Contenu secret", user=self.user)
+    with CaptureQueriesContext(connection) as queries:
+      response = self.client.get(reverse("index"))
+
+    post_sql = [q["sql"] for q in queries.captured_queries if 'FROM "blog_post"' in q["sql"]]
+    self.assertTrue(post_sql)
+    self.assertNotIn('"blog_post"."content"', post_sql[0])
+    self.assertContains(response, "Contenu secret")
+
+  def test_backfill_command(self):
+    post = Post.objects.create(title="Titre", content="Un deux", user=self.user)
+    Post.objects.filter(pk=post.pk).update(excerpt="", word_count=0)
+    version = Post.objects.get(pk=post.pk).version
+
+    call_command("backfill_post_metadata", stdout=StringIO())
+
+    post.refresh_from_db()
+    self.assertEqual(post.excerpt, "Un deux")
+    self.assertEqual(post.word_count, 2)
+    self.assertEqual(post.version, version + 1)
+
+class PostCardCacheTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="cached", email="cached@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Titre initial", content="Contenu", user=self.user)
+
+  def test_card_fragment_is_served_from_cache(self):
+    self.client.get(reverse("index"))
+    # Modification sans passer par save() : la version ne change pas
+    Post.objects.filter(pk=self.post.pk).update(title="Titre modifié")
+
+    response = self.client.get(reverse("index"))
+    self.assertContains(response, "Titre initial")
+
+  def test_edit_bumps_version_and_invalidates_card(self):
+    self.client.get(reverse("index"))
+    self.post.title = "Titre modifié"
+    with self.captureOnCommitCallbacks(execute=True):
+      self.post.save()
+
+    response = self.client.get(reverse("index"))
+    self.assertEqual(self.post.version, 1)
+    self.assertContains(response, "Titre modifié")
+
+  def test_like_bumps_version(self):
+    Like.objects.create(user=self.user, post=self.post)
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.version, 1)
+
+  def test_edit_keeps_concurrent_likes_and_version(self):
+    # Instance chargée avant un like concurrent, puis modifiée
+    stale = Post.objects.get(pk=self.post.pk)
+    Like.objects.create(user=self.user, post=self.post)
+    stale.title = "Titre modifié"
+    stale.save()
+
+    self.post.refresh_from_db()
+    self.assertEqual((self.post.likes_count, self.post.version), (1, 2))
+    self.assertEqual(stale.version, 2)
+
+  def test_like_state_is_rendered_per_viewer(self):
+    other = User.objects.create_user(username="other", email="other@gmail.com", password="testpass")
+    Like.objects.create(user=other, post=self.post)
+
+    self.client.login(email="other@gmail.com", password="testpass")
+    self.assertContains(self.client.get(reverse("index")), 'data-liked="true"')
+
+    self.client.login(email="cached@gmail.com", password="testpass")
+    self.assertContains(self.client.get(reverse("index")), 'data-liked="false"')
+
+  def test_delete_drops_fragment(self):
+    self.client.get(reverse("index"))
+    key = self.post.card_cache_key()
+    self.assertIsNotNone(cache.get(key))
+
+    self.post.delete()
+    self.assertIsNone(cache.get(key))
+
+class AnonymousPageCacheTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="author", email="author@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post en cache", content="Contenu", user=self.user)
+
+  def test_second_anonymous_request_hits_no_database(self):
+    self.client.get(reverse("index"))
+    with self.assertNumQueries(0):
+      response = self.client.get(reverse("index"))
+    self.assertContains(response, "Post en cache")
+
+  def test_detail_page_is_cached(self):
+    self.client.get(reverse("post_detail", args=[self.post.pk]))
+    with self.assertNumQueries(0):
+      response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+    self.assertContains(response, "Post en cache")
+
+  def test_post_create_invalidates_feed(self):
+    self.client.get(reverse("index"))
+    with self.captureOnCommitCallbacks(execute=True):
+      Post.objects.create(title="Nouveau post", content="Contenu", user=self.user)
+
+    self.assertContains(self.client.get(reverse("index")), "Nouveau post")
+
+  def test_post_edit_invalidates_detail(self):
+    self.client.get(reverse("post_detail", args=[self.post.pk]))
+    self.post.title = "Titre modifié"
+    with self.captureOnCommitCallbacks(execute=True):
+      self.post.save()
+
+    self.assertContains(self.client.get(reverse("post_detail", args=[self.post.pk])), "Titre modifié")
+
+  def test_like_invalidates_detail(self):
+    self.client.get(reverse("post_detail", args=[self.post.pk]))
+    with self.captureOnCommitCallbacks(execute=True):
+      Like.objects.create(user=self.user, post=self.post)
+
+    self.assertContains(self.client.get(reverse("post_detail", args=[self.post.pk])), "<strong>1</strong> like")
+
+  def test_post_delete_invalidates_feed(self):
+    self.client.get(reverse("index"))
+    with self.captureOnCommitCallbacks(execute=True):
+      self.post.delete()
+
+    self.assertNotContains(self.client.get(reverse("index")), "Post en cache")
+
+  def test_invalidation_waits_for_commit(self):
+    self.client.get(reverse("post_detail", args=[self.post.pk]))
+    with self.captureOnCommitCallbacks() as callbacks:
+      Like.objects.create(user=self.user, post=self.post)
+      # Avant la validation, la page en cache reste celle des données validées
+      self.assertContains(self.client.get(reverse("post_detail", args=[self.post.pk])), "Aucun like")
+
+    for callback in callbacks:
+      callback()
+    self.assertContains(self.client.get(reverse("post_detail", args=[self.post.pk])), "<strong>1</strong> like")
+
+  def test_authenticated_requests_are_not_cached(self):
+    self.client.login(email="author@gmail.com", password="testpass")
+    self.client.get(reverse("index"))
+    response = self.client.get(reverse("index"))
+
+    self.assertIsNotNone(response.context)
+
+  def test_pending_messages_bypass_cache(self):
+    self.client.get(reverse("index"))
+
+    carrier = HttpResponse()
+    storage = CookieStorage(HttpRequest())
+    storage.add(messages.SUCCESS, "Message en attente")
+    storage.update(carrier)
+    self.client.cookies["messages"] = carrier.cookies["messages"].value
+
+    response = self.client.get(reverse("index"))
+    # Rendu complet (contexte présent) plutôt qu'une page servie depuis le cache
+    self.assertIsNotNone(response.context)
+
+  def test_response_using_csrf_token_is_not_cached(self):
+    request = RequestFactory().get(reverse("index"))
+    request.user = AnonymousUser()
+    request.META["CSRF_COOKIE_NEEDS_UPDATE"] = True
+    view = BlogHome()
+    view.setup(request)
+
+    view._store_page("blog:page:test", HttpResponse("page"))
+    self.assertIsNone(cache.get("blog:page:test"))
+
+class ConditionalGetTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="etag", email="etag@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post validé", content="Contenu", user=self.user)
+    self.client.login(email="etag@gmail.com", password="testpass")
+
+  def revalidate(self, url, params=None):
+    first = self.client.get(url, params or {})
+    self.assertIn("ETag", first)
+    return self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=first["ETag"])
+
+  def test_home_returns_304_without_rendering(self):
+    response = self.revalidate(reverse("index"))
+
+    self.assertEqual(response.status_code, 304)
+    self.assertIsNone(response.context)
+
+  def test_home_etag_changes_after_like(self):
+    etag = self.client.get(reverse("index"))["ETag"]
+    Like.objects.create(user=self.user, post=self.post)
+
+    response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+    self.assertEqual(response.status_code, 200)
+
+  def test_detail_returns_304_then_200_after_edit(self):
+    url = reverse("post_detail", args=[self.post.pk])
+    self.assertEqual(self.revalidate(url).status_code, 304)
+
+    etag = self.client.get(url)["ETag"]
+    self.post.title = "Post modifié"
+    self.post.save()
+    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+  def test_etag_depends_on_viewer(self):
+    etag = self.client.get(reverse("index"))["ETag"]
+    User.objects.create_user(username="other", email="other@gmail.com", password="testpass")
+    self.client.login(email="other@gmail.com", password="testpass")
+
+    self.assertEqual(self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+  def test_like_status_endpoints_revalidate(self):
+    self.assertEqual(self.revalidate(reverse("like_status", args=[self.post.pk])).status_code, 304)
+    self.assertEqual(self.revalidate(reverse("likes_status"), {"ids": str(self.post.pk)}).status_code, 304)
+
+  def test_authenticated_responses_are_private(self):
+    response = self.client.get(reverse("index"))
+    self.assertIn("private", response["Cache-Control"])
+    self.assertIn("no-cache", response["Cache-Control"])
+
+class FeedFragmentTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="scroll", email="scroll@gmail.com", password="testpass")
+    self.posts = [Post.objects.create(title=f"Post {i}", content="Contenu", user=self.user) for i in range(25)]
+
+  def test_fragment_returns_next_cards_and_cursor(self):
+    home = self.client.get(reverse("index"))
+    cursor = home.context["page_obj"].next_cursor
+
+    response = self.client.get(reverse("feed_fragment"), {"cursor": cursor})
+
+    self.assertEqual(response.status_code, 200)
+    self.assertTemplateUsed(response, "partials/post_card.html")
+    self.assertNotContains(response, "<html")
+    self.assertContains(response, 'class="post_container"', count=5)
+    self.assertEqual(response["X-Next-Cursor"], "")
+
+  def test_fragment_first_page_exposes_next_cursor(self):
+    response = self.client.get(reverse("feed_fragment"))
+
+    self.assertContains(response, 'class="post_container"', count=20)
+    self.assertNotEqual(response["X-Next-Cursor"], "")
+
+  def test_home_exposes_feed_url_and_cursor(self):
+    response = self.client.get(reverse("index"))
+
+    self.assertContains(response, 'data-feed-url="%s"' % reverse("feed_fragment"))
+    self.assertContains(response, 'data-next-cursor="%s"' % response.context["page_obj"].next_cursor)
+
+class SyndicationFeedTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="feeder", email="feeder@gmail.com", password="testpass")
+    self.other = User.objects.create_user(username="other", email="other@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Premier article", content="Contenu du flux", user=self.user)
+    Post.objects.create(title="Article d'un autre", content="Contenu", user=self.other)
+
+  def test_rss_and_atom_feeds(self):
+    rss = self.client.get(reverse("feed_rss"))
+    atom = self.client.get(reverse("feed_atom"))
+
+    self.assertEqual(rss.status_code, 200)
+    self.assertIn("application/rss+xml", rss["Content-Type"])
+    self.assertContains(rss, "Premier article")
+    self.assertIn("application/atom+xml", atom["Content-Type"])
+    self.assertContains(atom, "Premier article")
+
+  def test_author_feed_only_lists_author_posts(self):
+    response = self.client.get(reverse("author_feed_atom", args=[self.user.pk]))
+
+    self.assertContains(response, "Premier article")
+    self.assertNotContains(response, "Article d&#x27;un autre")
+    self.assertNotContains(response, "Article d'un autre")
+
+  def test_author_feed_404(self):
+    self.assertEqual(self.client.get(reverse("author_feed_rss", args=[9999])).status_code, 404)
+
+  def test_feed_is_cached_until_post_change(self):
+    self.client.get(reverse("feed_rss"))
+    with self.assertNumQueries(0):
+      self.client.get(reverse("feed_rss"))
+
+    Like.objects.create(user=self.other, post=self.post)
+    with self.assertNumQueries(0):
+      self.client.get(reverse("feed_rss"))
+
+    with self.captureOnCommitCallbacks(execute=True):
+      Post.objects.create(title="Nouvel article", content="Contenu", user=self.user)
+    self.assertContains(self.client.get(reverse("feed_rss")), "Nouvel article")
+
+  def test_feed_revalidation_returns_304(self):
+    first = self.client.get(reverse("feed_atom"))
+    self.assertIn("Last-Modified", first)
+
+    response = self.client.get(reverse("feed_atom"), HTTP_IF_NONE_MATCH=first["ETag"])
+    self.assertEqual(response.status_code, 304)
+
+class PostSearchTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="chercheur", email="search@gmail.com", password="testpass")
+    self.title_match = Post.objects.create(title="Recette de crêpes", content="Farine et lait", user=self.user)
+    self.content_match = Post.objects.create(title="Goûter", content="Des crêpes pour tout le monde", user=self.user)
+    self.other = Post.objects.create(title="Jardinage", content="Planter des tomates", user=self.user)
+
+  def search(self, q, **params):
+    return self.client.get(reverse("search"), {"q": q, **params})
+
+  def test_title_matches_rank_before_content_matches(self):
+    posts = self.search("crêpes").context["posts"]
+    self.assertEqual(posts, [self.title_match, self.content_match])
+
+  def test_search_by_author_username(self):
+    posts = self.search("chercheur").context["posts"]
+    self.assertEqual(len(posts), 3)
+
+  def test_accent_insensitive_prefix_search(self):
+    posts = self.search("crepe").context["posts"]
+    self.assertIn(self.title_match, posts)
+
+  def test_edit_and_delete_update_index(self):
+    self.other.content = "Planter des crêpes"
+    self.other.save()
+    self.assertIn(self.other, self.search("crêpes").context["posts"])
+
+    self.title_match.delete()
+    self.assertNotIn(self.title_match.title, [p.title for p in self.search("crêpes").context["posts"]])
+
+  def test_renamed_author_is_reindexed(self):
+    self.user.username = "jardinier"
+    self.user.save()
+    self.assertEqual(len(self.search("jardinier").context["posts"]), 3)
+    self.assertEqual(self.search("chercheur").context["posts"], [])
+
+  def test_huge_page_number_is_clamped(self):
+    response = self.search("crêpes", page="100000000000000000000")
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response.context["posts"], [])
+
+  def test_special_characters_do_not_break_query(self):
+    response = self.search('"crêpes" AND OR * (')
+    self.assertEqual(response.status_code, 200)
+
+  def test_pagination(self):
+    for i in range(25):
+      Post.objects.create(title=f"Tomates {i}", content="Contenu", user=self.user)
+
+    first = self.search("tomates")
+    second = self.search("tomates", page=2)
+    self.assertEqual(len(first.context["posts"]), 20)
+    self.assertTrue(first.context["has_next"])
+    self.assertEqual(len(second.context["posts"]), 6)
+    self.assertFalse(second.context["has_next"])
+
+  def test_rebuild_search_index_command(self):
+    out = StringIO()
+    call_command("rebuild_search_index", "--batch-size", "2", stdout=out)
+    self.assertIn("3 posts indexés", out.getvalue())
+    self.assertEqual(len(self.search("crêpes").context["posts"]), 2)
+
+class TrendingTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.users = [
+      User.objects.create_user(username=f"fan{i}", email=f"fan{i}@gmail.com", password="testpass")
+      for i in range(3)
+    ]
+    self.hot = Post.objects.create(title="Post viral", content="Contenu", user=self.users[0])
+    self.cold = Post.objects.create(title="Post tiède", content="Contenu", user=self.users[0])
+    self.quiet = Post.objects.create(title="Post ignoré", content="Contenu", user=self.users[0])
+
+  def test_likes_update_score_incrementally(self):
+    for user in self.users:
+      Like.objects.create(user=user, post=self.hot)
+    Like.objects.create(user=self.users[0], post=self.cold)
+
+    self.assertAlmostEqual(TrendingScore.objects.get(post=self.hot).score, 3, places=2)
+    Like.objects.filter(post=self.hot, user=self.users[0]).delete()
+    self.assertAlmostEqual(TrendingScore.objects.get(post=self.hot).score, 2, places=2)
+
+  def test_trending_page_ranks_by_score(self):
+    for user in self.users:
+      Like.objects.create(user=user, post=self.hot)
+    Like.objects.create(user=self.users[0], post=self.cold)
+
+    posts = self.client.get(reverse("trending")).context["posts"]
+    self.assertEqual(posts, [self.hot, self.cold])
+
+  def test_old_likes_decay(self):
+    for user in self.users:
+      Like.objects.create(user=user, post=self.hot)
+    Like.objects.create(user=self.users[0], post=self.cold)
+    TrendingScore.objects.filter(post=self.hot).update(scored_at=timezone.now() - timedelta(hours=72))
+
+    posts = self.client.get(reverse("trending")).context["posts"]
+    self.assertEqual(posts, [self.cold, self.hot])
+
+  def test_decay_command_rebases_and_drops_expired_scores(self):
+    Like.objects.create(user=self.users[0], post=self.hot)
+    Like.objects.create(user=self.users[0], post=self.cold)
+    TrendingScore.objects.filter(post=self.hot).update(scored_at=timezone.now() - timedelta(hours=24))
+    TrendingScore.objects.filter(post=self.cold).update(scored_at=timezone.now() - timedelta(days=30))
+
+    call_command("decay_trending_scores", stdout=StringIO())
+
+    self.assertAlmostEqual(TrendingScore.objects.get(post=self.hot).score, 0.5, places=2)
+    self.assertFalse(TrendingScore.objects.filter(post=self.cold).exists())
+
+  def test_deleting_liked_post_cascades(self):
+    Like.objects.create(user=self.users[0], post=self.hot)
+    self.hot.delete()
+    self.assertFalse(TrendingScore.objects.exists())
+
+  def test_trending_read_is_a_single_query(self):
+    for user in self.users:
+      Like.objects.create(user=user, post=self.hot)
+    with self.assertNumQueries(1):
+      trending_posts(AnonymousUser())
+
+class AuthorStatsTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.author = User.objects.create_user(username="prolifique", email="prolifique@gmail.com", password="testpass")
+    self.fan = User.objects.create_user(username="fan", email="fan@gmail.com", password="testpass")
+
+  def assertStats(self, post_count, likes_received, last_post_at):
+    self.author.refresh_from_db()
+    self.assertEqual(
+      (self.author.post_count, self.author.likes_received, self.author.last_post_at),
+      (post_count, likes_received, last_post_at),
+    )
+
+  def test_stats_follow_posts_and_likes(self):
+    first = Post.objects.create(title="Premier", content="Contenu", user=self.author)
+    second = Post.objects.create(title="Second", content="Contenu", user=self.author)
+    self.assertStats(2, 0, second.created_at)
+
+    Like.objects.create(user=self.fan, post=first)
+    Like.objects.create(user=self.author, post=first)
+    self.assertStats(2, 2, second.created_at)
+
+    Like.objects.filter(user=self.fan).delete()
+    self.assertStats(2, 1, second.created_at)
+
+    second.delete()
+    self.assertStats(1, 1, first.created_at)
+
+    # La suppression en cascade retire aussi les likes reçus
+    first.delete()
+    self.assertStats(0, 0, None)
+
+  def test_full_user_save_keeps_concurrent_stats(self):
+    # Instance chargée avant la publication, puis enregistrée (profil, admin)
+    stale = User.objects.get(pk=self.author.pk)
+    post = Post.objects.create(title="Post", content="Contenu", user=self.author)
+    stale.biography = "Nouvelle biographie"
+    stale.save()
+
+    self.assertStats(1, 0, post.created_at)
+    self.assertEqual(self.author.biography, "Nouvelle biographie")
+
+  def test_toggle_like_updates_author_stats(self):
+    post = Post.objects.create(title="Post", content="Contenu", user=self.author)
+    self.client.login(email="fan@gmail.com", password="testpass")
+
+    self.client.post(reverse("like", args=[post.pk]))
+    self.assertStats(1, 1, post.created_at)
+    self.client.post(reverse("like", args=[post.pk]))
+    self.assertStats(1, 0, post.created_at)
+
+  def test_recount_author_stats_repairs_drift(self):
+    post = Post.objects.create(title="Post", content="Contenu", user=self.author)
+    Like.objects.create(user=self.fan, post=post)
+    User.objects.filter(pk=self.author.pk).update(post_count=7, likes_received=0, last_post_at=None)
+
+    out = StringIO()
+    call_command("recount_author_stats", "--dry-run", stdout=out)
+    self.assertIn("1 statistiques à corriger", out.getvalue())
+    self.assertStats(7, 0, None)
+
+    call_command("recount_author_stats", stdout=StringIO())
+    self.assertStats(1, 1, post.created_at)
+
+  def test_profile_shows_stored_stats_without_aggregating(self):
+    for i in range(3):
+      Like.objects.create(user=self.fan, post=Post.objects.create(title=f"Post {i}", content="Contenu", user=self.author))
+    self.client.login(email="fan@gmail.com", password="testpass")
+
+    with CaptureQueriesContext(connection) as queries:
+      response = self.client.get(reverse("profile", args=[self.author.pk]))
+    self.assertContains(response, "<strong>3</strong> posts")
+    self.assertContains(response, "<strong>3</strong> likes reçus")
+    self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class PostLikersTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.author = User.objects.create_user(username="auteur", email="auteur@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post viral", content="Contenu", user=self.author)
+
+  def add_likers(self, count, start=0):
+    for i in range(start, start + count):
+      fan = User.objects.create_user(username=f"fan{i}", email=f"fan{i}@gmail.com", password="testpass")
+      Like.objects.create(user=fan, post=self.post)
+
+  def count_detail_queries(self):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+      response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+    self.assertEqual(response.status_code, 200)
+    return len(queries)
+
+  def test_detail_queries_do_not_grow_with_likes(self):
+    self.add_likers(2)
+    few = self.count_detail_queries()
+    self.add_likers(40, start=2)
+    self.assertEqual(self.count_detail_queries(), few)
+
+  def test_detail_shows_a_bounded_preview(self):
+    self.add_likers(12)
+    response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+
+    self.assertEqual(len(response.context["likers"]), 10)
+    self.assertContains(response, "<strong>12</strong> likes")
+    self.assertContains(response, reverse("post_likers", args=[self.post.pk]))
+    # Les plus récents d'abord
+    self.assertContains(response, "fan11")
+    self.assertNotContains(response, ">fan0<")
+
+  def test_detail_without_likes(self):
+    response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+    self.assertContains(response, "Aucun utilisateur n'a aimé ce post.")
+    self.assertNotContains(response, reverse("post_likers", args=[self.post.pk]))
+
+  def test_likers_endpoint_is_cursor_paginated(self):
+    self.add_likers(55)
+    url = reverse("post_likers", args=[self.post.pk])
+
+    first = self.client.get(url)
+    self.assertEqual(len(first.context["likes"]), 50)
+    next_cursor = first.context["page_obj"].next_cursor
+    self.assertIsNotNone(next_cursor)
+
+    second = self.client.get(url, {"cursor": next_cursor})
+    usernames = [like.user.username for like in second.context["likes"]]
+    self.assertEqual(usernames, ["fan4", "fan3", "fan2", "fan1", "fan0"])
+    self.assertFalse(second.context["page_obj"].has_next())
+
+  def test_likers_endpoint_unknown_post(self):
+    response = self.client.get(reverse("post_likers", args=[self.post.pk + 100]))
+    self.assertEqual(response.status_code, 404)
+
+def query_plan(sql):
+  """Plan d'exécution d'une requête capturée, sous forme de texte"""
+  with connection.cursor() as cursor:
+    if connection.vendor == 'postgresql':
+      # Sur des tables de test quasi vides, PostgreSQL préférerait un parcours séquentiel
+      cursor.execute("SET LOCAL enable_seqscan = off")
+      cursor.execute("EXPLAIN " + sql)
+    else:
+      cursor.execute("EXPLAIN QUERY PLAN " + sql)
+    return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def captured_selects(queries, table, *fragments):
+  """Requêtes capturées qui lisent `table` et contiennent tous les fragments"""
+  selects = [
+    query["sql"] for query in queries.captured_queries
+    if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]
+    and all(fragment in query["sql"] for fragment in fragments)
+  ]
+  if not selects:
+    raise AssertionError(f"Aucune requête sur {table} parmi {len(queries)} requêtes capturées")
+  return selects
+
+
+class QueryPlanTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.user = User.objects.create_user(username="lecteur", email="lecteur@gmail.com", password="testpass")
+    self.posts = [
+      Post.objects.create(title=f"Post {i}", content="Contenu", user=self.user) for i in range(25)
+    ]
+    self.client.login(email="lecteur@gmail.com", password="testpass")
+
+  def assertUsesIndex(self, selects, index_name):
+    for sql in selects:
+      self.assertIn(index_name, query_plan(sql), sql)
+
+  def test_blog_home_walks_the_created_index(self):
+    with CaptureQueriesContext(connection) as queries:
+      first = self.client.get(reverse("index"))
+    self.assertUsesIndex(captured_selects(queries, "blog_post", "ORDER BY", "LIMIT"), "blog_post_created_idx")
+
+    with CaptureQueriesContext(connection) as queries:
+      self.client.get(reverse("index"), {"cursor": first.context["page_obj"].next_cursor})
+    self.assertUsesIndex(captured_selects(queries, "blog_post", "ORDER BY", "LIMIT"), "blog_post_created_idx")
+
+  def test_profile_walks_the_author_index(self):
+    with CaptureQueriesContext(connection) as queries:
+      self.client.get(reverse("profile", args=[self.user.pk]))
+    self.assertUsesIndex(captured_selects(queries, "blog_post", "ORDER BY", "LIMIT"), "blog_post_user_created_idx")
+
+  def test_toggle_like_lookup_uses_an_index(self):
+    Like.objects.create(user=self.user, post=self.posts[0])
+    with CaptureQueriesContext(connection) as queries:
+      self.client.post(reverse("like", args=[self.posts[1].pk]))
+    deletes = [query["sql"] for query in queries.captured_queries if query["sql"].startswith('DELETE FROM "blog_like"')]
+    self.assertTrue(deletes)
+    for sql in deletes:
+      plan = query_plan(sql)
+      self.assertNotIn("SCAN blog_like", plan)
+      self.assertNotIn("Seq Scan on blog_like", plan)
+
+  def test_likers_list_walks_the_post_likes_index(self):
+    Like.objects.create(user=self.user, post=self.posts[0])
+    with CaptureQueriesContext(connection) as queries:
+      self.client.get(reverse("post_likers", args=[self.posts[0].pk]))
+    self.assertUsesIndex(captured_selects(queries, "blog_like", "ORDER BY"), "blog_like_post_created_idx")
+
+
+class IdempotentLikeApiTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.author = User.objects.create_user(username="auteur", email="auteur@gmail.com", password="testpass")
+    self.fan = User.objects.create_user(username="fan", email="fan@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post", content="Contenu", user=self.author)
+    self.url = reverse("like", args=[self.post.pk])
+    self.client.login(email="fan@gmail.com", password="testpass")
+
+  def test_put_is_idempotent(self):
+    for _ in range(3):
+      response = self.client.put(self.url)
+      self.assertEqual(response.json(), {"liked": True, "likes_count": 1})
+    self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+  def test_delete_is_idempotent(self):
+    Like.objects.create(user=self.fan, post=self.post)
+    for _ in range(3):
+      response = self.client.delete(self.url)
+      self.assertEqual(response.json(), {"liked": False, "likes_count": 0})
+    self.assertFalse(Like.objects.exists())
+
+  def test_put_and_delete_keep_derived_state_in_sync(self):
+    self.client.put(self.url)
+    self.post.refresh_from_db()
+    self.author.refresh_from_db()
+    self.assertEqual((self.post.likes_count, self.post.version), (1, 1))
+    self.assertEqual(self.author.likes_received, 1)
+    self.assertTrue(TrendingScore.objects.filter(post=self.post).exists())
+
+    self.client.delete(self.url)
+    self.client.delete(self.url)
+    self.post.refresh_from_db()
+    self.author.refresh_from_db()
+    self.assertEqual((self.post.likes_count, self.post.version), (0, 2))
+    self.assertEqual(self.author.likes_received, 0)
+
+  def test_put_is_a_single_insert(self):
+    with CaptureQueriesContext(connection) as queries:
+      self.client.put(self.url)
+    inserts = [query["sql"] for query in queries.captured_queries if 'INTO "blog_like"' in query["sql"]]
+    self.assertEqual(len(inserts), 1)
+    self.assertIn("ON CONFLICT", inserts[0])
+
+  def test_unknown_post(self):
+    url = reverse("like", args=[self.post.pk + 100])
+    self.assertEqual(self.client.put(url).status_code, 404)
+    self.assertEqual(self.client.delete(url).status_code, 404)
+    self.assertEqual(self.client.post(url).status_code, 404)
+    self.assertFalse(Like.objects.exists())
+
+  def test_other_methods_are_rejected(self):
+    self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class ConcurrentLikeTests(TransactionTestCase):
+  THREADS = 8
+  ROUNDS = 10
+
+  def setUp(self):
+    cache.clear()
+    self.author = User.objects.create_user(username="auteur", email="auteur@gmail.com", password="testpass")
+    self.fans = [
+      User.objects.create_user(username=f"fan{i}", email=f"fan{i}@gmail.com", password="testpass")
+      for i in range(self.THREADS)
+    ]
+    self.post = Post.objects.create(title="Post", content="Contenu", user=self.author)
+
+  def run_concurrently(self, target, args_list):
+    barrier = threading.Barrier(len(args_list))
+    errors = []
+
+    def worker(*args):
+      try:
+        barrier.wait()
+        while True:
+          try:
+            target(*args)
+            break
+          except OperationalError as error:
+            # La base SQLite en mémoire partagée n'attend pas le verrou d'écriture :
+            # on rejoue comme le ferait le délai d'attente d'une base sur disque
+            if connection.vendor != "sqlite" or "locked" not in str(error):
+              raise
+            time.sleep(0.001)
+      except Exception as error:
+        errors.append(error)
+      finally:
+        close_old_connections()
+
+    threads = [threading.Thread(target=worker, args=args) for args in args_list]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(errors, [])
+
+  def test_concurrent_retries_of_the_same_like(self):
+    fan = self.fans[0]
+
+    def like_and_unlike(round_index):
+      if round_index % 2:
+        remove_like(fan, self.post.pk)
+      else:
+        add_like(fan, self.post.pk)
+
+    for _ in range(self.ROUNDS):
+      self.run_concurrently(add_like, [(fan, self.post.pk)] * self.THREADS)
+      self.assertEqual(Like.objects.filter(user=fan, post=self.post).count(), 1)
+      self.run_concurrently(like_and_unlike, [(i,) for i in range(self.THREADS)])
+      self.run_concurrently(remove_like, [(fan, self.post.pk)] * self.THREADS)
+      self.assertFalse(Like.objects.filter(user=fan, post=self.post).exists())
+
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 0)
+
+  def test_concurrent_likes_from_many_users(self):
+    self.run_concurrently(add_like, [(fan, self.post.pk) for fan in self.fans])
+
+    self.post.refresh_from_db()
+    self.author.refresh_from_db()
+    self.assertEqual(self.post.likes_count, self.THREADS)
+    self.assertEqual(self.author.likes_received, self.THREADS)
+    self.assertEqual(Like.objects.filter(post=self.post).count(), self.THREADS)
+
+
+@override_settings(BLOG_LIKE_WRITE_BEHIND=True, PASSWORD_HASHERS=FAST_HASHERS)
+class LikeWriteBehindTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    journal_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, journal_dir, ignore_errors=True)
+    settings_override = override_settings(BLOG_LIKE_JOURNAL_PATH=os.path.join(journal_dir, "likes.sqlite3"))
+    settings_override.enable()
+    self.addCleanup(settings_override.disable)
+
+    self.client = Client()
+    self.author = User.objects.create_user(username="auteur", email="auteur@gmail.com", password="testpass")
+    self.fans = [
+      User.objects.create_user(username=f"fan{i}", email=f"fan{i}@gmail.com", password="testpass")
+      for i in range(3)
+    ]
+    self.post = Post.objects.create(title="Post viral", content="Contenu", user=self.author)
+    self.url = reverse("like", args=[self.post.pk])
+    self.client.login(email="fan0@gmail.com", password="testpass")
+
+  def test_like_is_journaled_not_written(self):
+    response = self.client.put(self.url)
+
+    self.assertEqual(response.json(), {"liked": True, "likes_count": 1})
+    self.assertFalse(Like.objects.exists())
+    self.assertEqual(len(like_buffer.get_journal()), 1)
+
+  def test_intents_are_coalesced_per_user_and_post(self):
+    for _ in range(3):
+      self.client.post(self.url)
+    self.assertEqual(self.client.post(self.url).json(), {"liked": False, "likes_count": 0})
+    self.client.put(self.url)
+    self.assertEqual(len(like_buffer.get_journal()), 1)
+
+    self.assertEqual(like_buffer.flush_all(), 1)
+    self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+  def test_reads_merge_pending_state_for_the_author_of_the_intent(self):
+    self.client.put(self.url)
+
+    detail = self.client.get(reverse("post_detail", args=[self.post.pk]))
+    self.assertTrue(detail.context["post"].liked)
+    self.assertEqual(detail.context["post"].likes_count, 1)
+    home = self.client.get(reverse("index"))
+    self.assertTrue(home.context["posts"][0].liked)
+    status = self.client.get(reverse("likes_status"), {"ids": str(self.post.pk)}).json()
+    self.assertEqual(status["posts"][str(self.post.pk)], {"liked": True, "likes_count": 1})
+
+    other = Client()
+    other.login(email="fan1@gmail.com", password="testpass")
+    detail = other.get(reverse("post_detail", args=[self.post.pk]))
+    self.assertFalse(detail.context["post"].liked)
+    self.assertEqual(detail.context["post"].likes_count, 0)
+
+  def test_pending_intent_changes_the_viewer_etag(self):
+    url = reverse("post_detail", args=[self.post.pk])
+    etag = self.client.get(url)["ETag"]
+    self.client.put(self.url)
+    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+  def test_flush_applies_batches_and_derived_state(self):
+    Like.objects.create(user=self.fans[2], post=self.post)
+    like_buffer.queue_like(self.fans[0], self.post.pk, True)
+    like_buffer.queue_like(self.fans[1], self.post.pk, True)
+    like_buffer.queue_like(self.fans[2], self.post.pk, False)
+
+    with CaptureQueriesContext(connection) as queries:
+      flushed = like_buffer.flush()
+    self.assertEqual(flushed, 3)
+    # Une insertion et une suppression groupées, une seule mise à jour du compteur
+    self.assertEqual(len([q for q in queries.captured_queries if q["sql"].startswith('UPDATE "blog_post"')]), 1)
+
+    self.post.refresh_from_db()
+    self.author.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 2)
+    self.assertEqual(self.author.likes_received, 2)
+    self.assertEqual(
+      set(Like.objects.filter(post=self.post).values_list("user__username", flat=True)), {"fan0", "fan1"}
+    )
+    self.assertEqual(len(like_buffer.get_journal()), 0)
+
+  def test_replayed_batch_counts_nothing_twice(self):
+    like_buffer.queue_like(self.fans[0], self.post.pk, True)
+    rows = like_buffer.get_journal().batch(10)
+    like_buffer.flush()
+    # Simule une interruption entre le commit et l'acquittement du journal
+    for user_id, post_id, liked, _ in rows:
+      like_buffer.get_journal().record(user_id, post_id, liked)
+    like_buffer.flush()
+
+    self.post.refresh_from_db()
+    self.assertEqual(self.post.likes_count, 1)
+
+  def test_intents_on_deleted_posts_are_dropped(self):
+    like_buffer.queue_like(self.fans[0], self.post.pk, True)
+    self.post.delete()
+    self.assertEqual(like_buffer.flush(), 1)
+    self.assertFalse(Like.objects.exists())
+
+  def test_flush_command(self):
+    self.client.put(self.url)
+    out = StringIO()
+    call_command("flush_like_buffer", stdout=out)
+    self.assertIn("1 intentions de like reportées", out.getvalue())
+    self.assertTrue(Like.objects.filter(user=self.fans[0], post=self.post).exists())
+
+
+@override_settings(BLOG_RATELIMIT_ENABLED=True, PASSWORD_HASHERS=FAST_HASHERS, BLOG_RATELIMITS={"like": "3/m", "login": "2/m", "register": "1/h"})
+class RateLimitTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    ratelimit.local_store.buckets.clear()
+    ratelimit.local_store.shed.clear()
+    # Horloge figée : les seaux ne se rechargent pas pendant un test
+    clock = mock.patch.object(ratelimit, "time")
+    fake_time = clock.start()
+    fake_time.time.return_value = 1000.0
+    fake_time.sleep.side_effect = time.sleep
+    self.addCleanup(clock.stop)
+    self.client = Client()
+    self.user = User.objects.create_user(username="pressé", email="presse@gmail.com", password="testpass")
+    self.post = Post.objects.create(title="Post", content="Contenu", user=self.user)
+
+  def test_like_is_throttled_per_user_before_the_view(self):
+    self.client.login(email="presse@gmail.com", password="testpass")
+    url = reverse("like", args=[self.post.pk])
+    for _ in range(3):
+      self.assertEqual(self.client.post(url).status_code, 200)
+
+    with CaptureQueriesContext(connection) as queries:
+      response = self.client.post(url)
+    self.assertEqual(response.status_code, 429)
+    self.assertIn("Retry-After", response)
+    # Seuls la session et l'utilisateur sont chargés
+    self.assertFalse([q for q in queries.captured_queries if "blog_" in q["sql"]])
+
+    # Une nouvelle session du même compte ne remet pas le seau à plein
+    other = Client()
+    other.login(email="presse@gmail.com", password="testpass")
+    self.assertEqual(other.post(url).status_code, 429)
+    # Un autre compte dispose de son propre seau
+    User.objects.create_user(username="calme", email="calme@gmail.com", password="testpass")
+    other.login(email="calme@gmail.com", password="testpass")
+    self.assertEqual(other.post(url).status_code, 200)
+
+  def login_attempt(self, remote_addr="127.0.0.1", **extra):
+    request = RequestFactory().post("/login/", {"email": "presse@gmail.com", "password": "mauvais"}, REMOTE_ADDR=remote_addr, **extra)
+    request.user = AnonymousUser()
+    request.session = {}
+    request._messages = FallbackStorage(request)
+    return custom_login_view(request)
+
+  def test_login_attempts_are_throttled_by_ip_without_hashing(self):
+    self.login_attempt()
+    self.login_attempt("10.0.0.2")
+    self.login_attempt()
+
+    with self.assertNumQueries(0), mock.patch.object(User, "check_password") as check_password:
+      response = self.login_attempt()
+    self.assertEqual(response.status_code, 429)
+    check_password.assert_not_called()
+    self.assertEqual(self.login_attempt("10.0.0.2").status_code, 200)
+
+  def test_requests_without_client_address_are_not_throttled(self):
+    # Un seau commun à tous les clients sans adresse bloquerait tout le site
+    for _ in range(4):
+      self.assertEqual(self.login_attempt("").status_code, 200)
+
+  @override_settings(BLOG_RATELIMIT_TRUST_FORWARDED_FOR=True)
+  def test_forwarded_client_address_behind_a_proxy(self):
+    for _ in range(2):
+      self.login_attempt("10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.7")
+    self.assertEqual(self.login_attempt("10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.7").status_code, 429)
+    self.assertEqual(self.login_attempt("10.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.2, 10.0.0.1").status_code, 200)
+
+  def test_login_form_display_is_not_throttled(self):
+    for _ in range(5):
+      request = RequestFactory().get("/login/")
+      request.user = AnonymousUser()
+      self.assertEqual(custom_login_view(request).status_code, 200)
+
+  def test_emergency_login_is_throttled(self):
+    for _ in range(2):
+      self.client.get("/emergency-login/", {"email": "presse@gmail.com", "password": "mauvais"})
+    response = self.client.get("/emergency-login/", {"email": "presse@gmail.com", "password": "mauvais"})
+    self.assertEqual(response.status_code, 429)
+
+  def test_registration_is_throttled(self):
+    url = reverse("register")
+    self.client.post(url, {"email": "invalide"})
+    response = self.client.post(url, {"email": "invalide"})
+    self.assertEqual(response.status_code, 429)
+
+  def test_tokens_refill_over_time(self):
+    for _ in range(3):
+      self.assertEqual(ratelimit.take_token("like", "client", "3/m", now=1000.0), 0)
+    self.assertAlmostEqual(ratelimit.take_token("like", "client", "3/m", now=1000.0), 20)
+    # Un jeton toutes les 20 secondes
+    self.assertEqual(ratelimit.take_token("like", "client", "3/m", now=1020.0), 0)
+    self.assertAlmostEqual(ratelimit.take_token("like", "client", "3/m", now=1030.0), 10)
+
+  def test_no_double_burst_across_minutes(self):
+    for _ in range(3):
+      self.assertEqual(ratelimit.take_token("like", "client", "3/m", now=959.0), 0)
+    # La minute suivante commence, mais le seau ne s'est rechargé que de deux secondes
+    self.assertGreater(ratelimit.take_token("like", "client", "3/m", now=961.0), 0)
+
+  def test_parallel_requests_cannot_exceed_the_limit(self):
+    barrier = threading.Barrier(20)
+    results = []
+
+    def request():
+      barrier.wait()
+      results.append(ratelimit.take_token("like", "client", "5/m", now=1000.0))
+
+    threads = [threading.Thread(target=request) for _ in range(20)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(results.count(0), 5)
+
+  def test_falls_back_to_process_memory_when_the_cache_fails(self):
+    with self.assertLogs("blog.ratelimit", "WARNING"), mock.patch.object(ratelimit, "cache") as broken_cache:
+      broken_cache.get.side_effect = ConnectionError
+      broken_cache.add.side_effect = ConnectionError
+      broken_cache.incr.side_effect = ConnectionError
+      self.assertEqual(ratelimit.take_token("login", "client", "1/m"), 0)
+      self.assertGreater(ratelimit.take_token("login", "client", "1/m"), 0)
+      ratelimit.count_shed("login")
+    self.assertEqual(ratelimit.local_store.shed["login"], 1)
+
+  def test_shed_counters_are_exposed_to_staff(self):
+    self.client.login(email="presse@gmail.com", password="testpass")
+    url = reverse("like", args=[self.post.pk])
+    for _ in range(5):
+      self.client.post(url)
+
+    self.assertEqual(self.client.get(reverse("ratelimit_stats")).status_code, 302)
+    User.objects.filter(pk=self.user.pk).update(is_staff=True)
+    response = self.client.get(reverse("ratelimit_stats"))
+    self.assertEqual(response.json()["shed"]["like"], 2)
+
+
+class BulkImportTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.client = Client()
+    self.staff = User.objects.create_user(username="admin", email="admin@gmail.com", password="testpass", is_staff=True)
+    self.author = User.objects.create_user(username="plume", email="plume@gmail.com", password="testpass")
+
+  def ndjson(self, rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+  def test_endpoint_imports_ndjson_and_reports_row_errors(self):
+    body = self.ndjson([
+      {"title": "Migré 1", "content": "<p>Premier post importé</p>", "author": "PLUME@gmail.com"},
+      {"title": "", "content": "Sans titre"},
+      "{pas du json",
+      {"title": "Migré 2", "content": "Second", "created_at": "2020-05-01T12:00:00+00:00"},
+      {"title": "Inconnu", "content": "Contenu", "author": "personne@gmail.com"},
+      ["pas", "un", "objet"],
+    ])
+    self.client.login(email="admin@gmail.com", password="testpass")
+
+    response = self.client.post(reverse("import_posts"), body, content_type="application/x-ndjson")
+
+    data = response.json()
+    self.assertEqual(data["created"], 2)
+    self.assertEqual([error["row"] for error in data["errors"]], [2, 3, 5, 6])
+    self.assertIn("title", data["errors"][0]["errors"])
+    self.assertIn("author", data["errors"][2]["errors"])
+
+    first = Post.objects.get(title="Migré 1")
+    self.assertEqual(first.user, self.author)
+    self.assertEqual(first.word_count, 3)
+    second = Post.objects.get(title="Migré 2")
+    self.assertEqual(second.user, self.staff)
+    self.assertEqual(second.created_at.year, 2020)
+
+  def test_import_maintains_derived_state(self):
+    body = self.ndjson([{"title": f"Recette {i}", "content": "Tarte aux pommes", "author": "plume@gmail.com"} for i in range(3)])
+    self.client.login(email="admin@gmail.com", password="testpass")
+    self.client.get(reverse("index"))
+    feed_etag = self.client.get(reverse("index"))["ETag"]
+
+    self.client.post(reverse("import_posts"), body, content_type="application/x-ndjson")
+
+    self.author.refresh_from_db()
+    self.assertEqual(self.author.post_count, 3)
+    self.assertIsNotNone(self.author.last_post_at)
+    self.assertEqual(len(self.client.get(reverse("search"), {"q": "pommes"}).context["posts"]), 3)
+    self.assertNotEqual(self.client.get(reverse("index"))["ETag"], feed_etag)
+
+  def test_endpoint_accepts_a_json_array(self):
+    body = json.dumps([{"title": "A", "content": "a"}, {"title": "B", "content": "b"}])
+    self.client.login(email="admin@gmail.com", password="testpass")
+    response = self.client.post(reverse("import_posts"), body, content_type="application/json")
+    self.assertEqual(response.json(), {"created": 2, "errors": []})
+
+    response = self.client.post(reverse("import_posts"), "[{", content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+
+  def test_endpoint_is_staff_only(self):
+    self.client.login(email="plume@gmail.com", password="testpass")
+    response = self.client.post(reverse("import_posts"), "{}", content_type="application/json")
+    self.assertEqual(response.status_code, 302)
+    self.assertFalse(Post.objects.exists())
+
+  def test_command_writes_in_bounded_chunks(self):
+    rows = [{"title": f"Post {i}", "content": "Contenu"} for i in range(7)] + [{"title": "x" * 300, "content": "trop long"}]
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as source:
+      source.write(self.ndjson(rows))
+    self.addCleanup(os.unlink, source.name)
+
+    out, err = StringIO(), StringIO()
+    with CaptureQueriesContext(connection) as queries:
+      call_command("import_posts", source.name, "--author", "plume@gmail.com", "--chunk-size", "3", stdout=out, stderr=err)
+
+    self.assertIn("7 posts importés, 1 lignes rejetées", out.getvalue())
+    self.assertIn("Ligne 8", err.getvalue())
+    inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "blog_post"')]
+    self.assertEqual(len(inserts), 3)
+    self.assertEqual(Post.objects.filter(user=self.author).count(), 7)
+
+  def test_command_author_email_ignores_case(self):
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as source:
+      source.write(self.ndjson([{"title": "Post", "content": "Contenu"}]))
+    self.addCleanup(os.unlink, source.name)
+
+    call_command("import_posts", source.name, "--author", "Plume@Gmail.com", stdout=StringIO(), stderr=StringIO())
+    self.assertEqual(Post.objects.filter(user=self.author).count(), 1)
+
+
+class FixtureLoaderTests(TestCase):
+  def setUp(self):
+    cache.clear()
+    self.existing = User.objects.create_user(username="plume", email="plume@gmail.com", password="testpass")
+
+  def fixture(self, users, posts_per_user):
+    items = [{"model": "contenttypes.contenttype", "pk": 1, "fields": {"app_label": "blog", "model": "post"}}]
+    for old_pk, username in users:
+      items.append({"model": "authentication.user", "pk": old_pk, "fields": {
+        "username": username, "email": f"{username}@gmail.com", "first_name": "", "last_name": "",
+        "is_staff": False, "is_superuser": False, "password": "!"}})
+    for old_pk, _ in users:
+      for i in range(posts_per_user):
+        items.append({"model": "blog.post", "pk": old_pk * 100 + i, "fields": {
+          "title": f"Post {i}", "content": "Tarte aux pommes", "created_at": "2021-03-04T05:06:07Z", "user": old_pk}})
+    return json.dumps(items).encode()
+
+  def test_iter_json_array_reads_across_small_blocks(self):
+    document = json.dumps([{"é": "ü" * 5}, 12345, [1, 2], "fin"]).encode()
+    self.assertEqual(list(iter_json_array(BytesIO(document), read_size=3)), [{"é": "ü" * 5}, 12345, [1, 2], "fin"])
+    self.assertEqual(list(iter_json_array(StringIO(" [ ] "))), [])
+    for broken in ('{"a": 1}', '[{"a": 1}', '[1 2]'):
+      with self.assertRaises(FixtureFormatError):
+        list(iter_json_array(StringIO(broken), read_size=2))
+
+  def test_load_remaps_user_ids_and_skips_existing_rows(self):
+    Post.objects.create(title="Post 0", content="Déjà là", user=self.existing)
+    source = self.fixture([(7, "plume"), (9, "nouveau")], posts_per_user=2)
+
+    result = load_fixture(BytesIO(source))
+
+    self.assertEqual(result.as_dict(), {
+      "users_created": 1, "users_existing": 1, "posts_created": 3, "posts_existing": 1,
+      "posts_orphaned": 0, "invalid": [], "skipped": {"contenttypes.contenttype": 1}})
+    new_user = User.objects.get(username="nouveau")
+    self.assertEqual(Post.objects.filter(user=new_user).count(), 2)
+    self.assertEqual(Post.objects.get(user=self.existing, title="Post 1").created_at.year, 2021)
+    new_user.refresh_from_db()
+    self.assertEqual(new_user.post_count, 2)
+    self.assertEqual(len(self.client.get(reverse("search"), {"q": "pommes"}).context["posts"]), 3)
+
+    again = load_fixture(BytesIO(source))
+    self.assertEqual((again.users_created, again.posts_created, again.posts_existing), (0, 0, 4))
+    self.assertEqual(Post.objects.count(), 4)
+
+  def test_load_uses_set_based_lookups_per_chunk(self):
+    users = [(pk, f"auteur{pk}") for pk in range(1, 7)]
+
+    with CaptureQueriesContext(connection) as queries:
+      result = load_fixture(BytesIO(self.fixture(users, posts_per_user=3)), chunk_size=4)
+
+    self.assertEqual((result.users_created, result.posts_created), (6, 18))
+    post_lookups = [q for q in queries.captured_queries if q["sql"].startswith("SELECT") and '"blog_post"."title" IN' in q["sql"]]
+    user_inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT OR IGNORE INTO "authentication_user"')]
+    post_inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "blog_post"')]
+    self.assertEqual((len(user_inserts), len(post_lookups), len(post_inserts)), (2, 5, 5))
+
+  def test_posts_without_known_author_are_counted(self):
+    source = json.dumps([{"model": "blog.post", "pk": 1, "fields": {"title": "Seul", "content": "x", "user": 42}}])
+    result = load_fixture(StringIO(source))
+    self.assertEqual(result.posts_orphaned, 1)
+    self.assertFalse(Post.objects.exists())
+
+  def test_posts_with_invalid_dates_are_reported(self):
+    posts = [
+      {"model": "blog.post", "pk": 1, "fields": {"title": "Mois 13", "content": "x", "created_at": "2021-13-04T05:06:07Z", "user": 7}},
+      {"model": "blog.post", "pk": 2, "fields": {"title": "Pas une date", "content": "x", "created_at": "hier", "user": 7}},
+      {"model": "blog.post", "pk": 3, "fields": {"title": "Valide", "content": "x", "created_at": "2021-03-04T05:06:07Z", "user": 7}},
+    ]
+    source = json.loads(self.fixture([(7, "plume")], posts_per_user=0)) + posts
+
+    result = load_fixture(StringIO(json.dumps(source)))
+
+    self.assertEqual([error["pk"] for error in result.invalid], [1, 2])
+    self.assertIn("created_at", result.invalid[0]["errors"])
+    self.assertEqual(list(Post.objects.values_list("title", flat=True)), ["Valide"])
+
+  def test_command_reports_counts(self):
+    with tempfile.NamedTemporaryFile("wb", suffix=".json", delete=False) as source:
+      source.write(self.fixture([(3, "nouveau")], posts_per_user=2))
+    self.addCleanup(os.unlink, source.name)
+
+    out = StringIO()
+    call_command("load_blog_fixture", source.name, stdout=out)
+
+    self.assertIn("Utilisateurs : 1 créés, 0 existants. Posts : 2 créés, 0 existants.", out.getvalue())
+    self.assertIn("1 objets contenttypes.contenttype ignorés", out.getvalue())
+
+
+class SyntheticDataTests(TestCase):
+  def generate(self, **options):
+    options = {"users": 30, "posts": 120, "likes": 900, "seed": 7, "stdout": StringIO(), **options}
+    call_command("generate_synthetic_data", **options)
+
+  def snapshot(self, prefix="synth"):
+    posts = Post.objects.filter(user__username__startswith=f"{prefix}-").order_by("created_at")
+    return list(posts.values_list("user__username", "title", "likes_count", "word_count", "created_at"))
+
+  def test_generates_consistent_skewed_data(self):
+    self.generate()
+
+    self.assertEqual((User.objects.count(), Post.objects.count(), Like.objects.count()), (30, 120, 900))
+    counts = sorted(Post.objects.values_list("likes_count", flat=True), reverse=True)
+    self.assertGreater(counts[0], 5 * counts[len(counts) // 2])
+    mismatched = Post.objects.annotate(actual=Count("likes")).exclude(likes_count=F("actual"))
+    self.assertFalse(mismatched.exists())
+
+    users = list(User.objects.all())
+    stats = actual_stats([user.pk for user in users])
+    self.assertTrue(all(stats[user.pk] == (user.post_count, user.likes_received, user.last_post_at) for user in users))
+    self.assertFalse(Like.objects.filter(created_at__lt=F("post__created_at")).exists())
+    self.assertTrue(self.client.login(email="synth-0@example.com", password="synthetic"))
+    self.assertTrue(Post.objects.create(title="Après", content="x", user=users[0]).pk > 120)
+
+  def test_same_seed_gives_same_data(self):
+    self.generate()
+    first = self.snapshot()
+    Post.objects.all().delete()
+    User.objects.all().delete()
+
+    self.generate()
+    self.assertEqual(self.snapshot(), first)
+
+    self.generate(prefix="autre", seed=8)
+    self.assertNotEqual([row[1:] for row in self.snapshot("autre")], [row[1:] for row in first])
+
+  def test_end_date_anchors_the_period(self):
+    call_command("generate_synthetic_data", "--end=2024-06-01", "--days=30", users=30, posts=120, likes=900, stdout=StringIO())
+    dates = Post.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+    self.assertGreaterEqual(dates["first"], datetime(2024, 5, 2, tzinfo=dt_timezone.utc))
+    self.assertLess(dates["last"], datetime(2024, 6, 1, tzinfo=dt_timezone.utc))
+
+  def test_refuses_to_reuse_a_prefix(self):
+    self.generate(users=2, posts=0, likes=0)
+    with self.assertRaises(CommandError):
+      self.generate(users=2, posts=0, likes=0)
@@ -0,0 +1,103 @@
+"""
+Classement des posts en tendance.
+
+Chaque like ajoute 1 au score du post, et ce score est divisé par deux à chaque
+demi-vie écoulée. Le score est stocké dans `TrendingScore` avec la date à
+laquelle il a été calculé :
+
+- un like ou un unlike met à jour la seule ligne du post (`record_like`), un
+  lot de likes les lignes de ses posts en une fois (`record_likes`) ;
+- la commande `decay_trending_scores` ramène périodiquement tous les scores à
+  la date courante et supprime ceux devenus négligeables ;
+- la lecture du top (`trending_posts`) est une seule requête triée sur l'index
+  `blog_trending_score_idx`.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import Post, TrendingScore
+
+HALF_LIFE_HOURS = getattr(settings, 'BLOG_TRENDING_HALF_LIFE_HOURS', 24)
+MIN_SCORE = 0.01
+
+
+def decayed(score, scored_at, now):
+    hours = max(0.0, (now - scored_at).total_seconds() / 3600)
+    return score * 0.5 ** (hours / HALF_LIFE_HOURS)
+
+
+def record_like(post_id, delta):
+    """Applique un like (+1) ou un unlike (-1) au score du post"""
+    record_likes({post_id: delta})
+
+
+def record_likes(deltas, now=None):
+    """Applique des variations de likes `{post_id: delta}` aux scores, en trois requêtes au plus"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = {row.post_id: row for row in TrendingScore.objects.select_for_update().filter(post_id__in=list(deltas))}
+        updated, created = [], []
+        for post_id, delta in deltas.items():
+            row = rows.get(post_id)
+            if row is None:
+                # Un unlike sans score existant (post supprimé, score expiré) ne crée rien
+                if delta > 0:
+                    created.append(TrendingScore(post_id=post_id, score=delta, scored_at=now))
+                continue
+            row.score = max(0.0, decayed(row.score, row.scored_at, now) + delta)
+            row.scored_at = now
+            updated.append(row)
+        if updated:
+            TrendingScore.objects.bulk_update(updated, ['score', 'scored_at'])
+        if created:
+            TrendingScore.objects.bulk_create(created)
+
+
+def redecay_all(batch_size=1000, now=None):
+    """Ramène tous les scores à `now` par lots ; retourne (scores mis à jour, scores supprimés)"""
+    now = now or timezone.now()
+    updated = removed = 0
+    last_id = 0
+
+    while True:
+        batch = list(TrendingScore.objects.filter(post_id__gt=last_id).order_by('post_id')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].post_id
+
+        expired = []
+        for row in batch:
+            row.score = decayed(row.score, row.scored_at, now)
+            row.scored_at = now
+            if row.score < MIN_SCORE:
+                expired.append(row.post_id)
+        with transaction.atomic():
+            TrendingScore.objects.bulk_update(
+                [row for row in batch if row.post_id not in expired], ['score', 'scored_at']
+            )
+            TrendingScore.objects.filter(post_id__in=expired).delete()
+        updated += len(batch) - len(expired)
+        removed += len(expired)
+
+    return updated, removed
+
+
+def trending_posts(user, limit=50):
+    """
+    Retourne les `limit` posts en tendance. Les candidats sont lus en une requête
+    sur l'index du score, puis reclassés avec leur score ramené à maintenant pour
+    corriger l'écart accumulé depuis le dernier `redecay_all`.
+    """
+    now = timezone.now()
+    candidates = list(
+        Post.objects.filter(trending__score__gte=MIN_SCORE)
+        .select_related('user', 'trending')
+        .defer('content')
+        .with_like_state(user)
+        .order_by('-trending__score')[:limit * 2]
+    )
+    for post in candidates:
+        post.trending_score = decayed(post.trending.score, post.trending.scored_at, now)
+    candidates.sort(key=lambda post: post.trending_score, reverse=True)
+    return candidates[:limit]
@@ -1,12 +1,25 @@
 from django.urls import path
-from .views import BlogHome, BlogPostCreate, BlogPostEdit, BlogPostDelete, toggle_like, get_like_status, BlogPostDetail
+from .cache import cached_feed
+from .feeds import LatestPostsFeed, AtomLatestPostsFeed, AuthorPostsFeed, AtomAuthorPostsFeed
+from .views import BlogHome, BlogFeedFragment, BlogPostCreate, BlogPostEdit, BlogPostDelete, toggle_like, get_like_status, get_likes_status, BlogPostDetail, PostLikers, search_posts, trending, ratelimit_stats, import_posts_view
 
 urlpatterns = [
     path('', BlogHome.as_view(), name="index"),
+    path('blog/feed/', BlogFeedFragment.as_view(), name="feed_fragment"),
+    path('blog/search/', search_posts, name="search"),
+    path('blog/trending/', trending, name="trending"),
     path('blog/<int:pk>/', BlogPostDetail.as_view(), name='post_detail'),
+    path('blog/<int:pk>/likers/', PostLikers.as_view(), name='post_likers'),
+    path('blog/import/', import_posts_view, name="import_posts"),
     path('blog/create/', BlogPostCreate.as_view(), name="create"),
     path('blog/edit/<int:pk>/', BlogPostEdit.as_view(), name="edit"),
     path('blog/delete/<int:pk>/', BlogPostDelete.as_view(), name="delete"),
     path('blog/like/<int:post_id>/', toggle_like, name="like"),
+    path('blog/like-status/', get_likes_status, name="likes_status"),
+    path('blog/ratelimit-stats/', ratelimit_stats, name="ratelimit_stats"),
     path('blog/like-status/<int:post_id>/', get_like_status, name="like_status"),
+    path('feeds/rss/', cached_feed(LatestPostsFeed()), name="feed_rss"),
+    path('feeds/atom/', cached_feed(AtomLatestPostsFeed()), name="feed_atom"),
+    path('feeds/author/<int:user_id>/rss/', cached_feed(AuthorPostsFeed()), name="author_feed_rss"),
+    path('feeds/author/<int:user_id>/atom/', cached_feed(AtomAuthorPostsFeed()), name="author_feed_atom"),
 ]
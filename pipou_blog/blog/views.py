@@ -1,36 +1,151 @@
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
+from blog.forms import PostForm
+from blog.importer import ImportFormatError, import_posts
 from blog.models import Post, Like
-from django.shortcuts import redirect, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, get_object_or_404, render
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_http_methods
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from blog.pagination import FEED_PAGE_SIZE, KeysetPaginationMixin, KeysetPaginator
+from blog import like_buffer
+from blog.like_buffer import merge_pending_likes
+from blog.likes import add_like, remove_like, toggle_like as toggle_post_like
+from blog.ratelimit import ratelimit, shed_counts, user_key
+from blog.search import search_post_ids
+from blog.trending import trending_posts
+from blog.conditional import conditional_view, feed_etag, post_etag, like_status_etag, likes_status_etag
+from blog.cache import AnonymousPageCacheMixin, get_generation, POST_GENERATION_KEY, USERS_GENERATION_KEY
 
-class BlogHome(ListView):
+@method_decorator(conditional_view(feed_etag), name="get")
+class BlogHome(AnonymousPageCacheMixin, KeysetPaginationMixin, ListView):
     model = Post
     context_object_name = "posts"
     template_name = "index.html"  # Template original
+    paginate_by = FEED_PAGE_SIZE
 
-class BlogPostDetail(DetailView):
+    def get_queryset(self):
+        # Les cartes n'affichent que l'extrait précalculé : inutile de charger le contenu
+        return (
+            Post.objects.select_related("user")
+            .defer("content")
+            .with_like_state(self.request.user)
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        merge_pending_likes(self.request.user, context["posts"])
+        return context
+
+class BlogFeedFragment(BlogHome):
+    """Cartes suivantes du fil, en fragment HTML, pour le défilement infini"""
+    template_name = "partials/post_list.html"
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response["X-Next-Cursor"] = context["page_obj"].next_cursor or ""
+        return response
+
+@method_decorator(conditional_view(post_etag), name="get")
+class BlogPostDetail(AnonymousPageCacheMixin, DetailView):
     model = Post
     context_object_name = "post"
     template_name = "posts/post_detail.html"
 
+    def get_page_cache_generations(self):
+        return [get_generation(POST_GENERATION_KEY % self.kwargs["pk"]), get_generation(USERS_GENERATION_KEY)]
+
+    def get_queryset(self):
+        return Post.objects.select_related("user").with_like_state(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        merge_pending_likes(self.request.user, [self.object])
+        # Aperçu borné des likers : le rendu ne dépend pas de la popularité du post
+        context["likers"] = KeysetPaginator(likers_queryset(self.object), LIKERS_PREVIEW_SIZE).get_page()
+        return context
+
+LIKERS_PREVIEW_SIZE = 10
+LIKERS_PAGE_SIZE = 50
+
+def likers_queryset(post):
+    return Like.objects.filter(post=post).select_related("user")
+
+class PostLikers(AnonymousPageCacheMixin, KeysetPaginationMixin, ListView):
+    """Liste complète des likers d'un post, paginée par curseur (?cursor=...)"""
+    context_object_name = "likes"
+    template_name = "posts/post_likers.html"
+    paginate_by = LIKERS_PAGE_SIZE
+
+    def get_page_cache_generations(self):
+        return [get_generation(POST_GENERATION_KEY % self.kwargs["pk"]), get_generation(USERS_GENERATION_KEY)]
+
+    def get_queryset(self):
+        self.post = get_object_or_404(Post.objects.only("id", "title", "likes_count"), pk=self.kwargs["pk"])
+        return likers_queryset(self.post)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["post"] = self.post
+        return context
+
+def trending(request):
+    """Les 50 posts les plus likés récemment (score à décroissance exponentielle)"""
+    return render(request, "posts/trending.html", {
+        "posts": merge_pending_likes(request.user, trending_posts(request.user)),
+    })
+
+SEARCH_PAGE_SIZE = 20
+# Au-delà, l'OFFSET ne sert qu'à faire travailler la base (et déborde l'entier SQLite)
+SEARCH_MAX_PAGE = 500
+
+def search_posts(request):
+    """Recherche plein texte classée par pertinence, paginée par numéro de page (?q=...&page=2)"""
+    query = request.GET.get("q", "").strip()
+    try:
+        page = min(max(1, int(request.GET.get("page", 1))), SEARCH_MAX_PAGE)
+    except ValueError:
+        page = 1
+
+    # Une ligne de plus que nécessaire indique s'il existe une page suivante, sans COUNT(*)
+    ids = search_post_ids(query, SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE)
+    has_next = len(ids) > SEARCH_PAGE_SIZE
+    ids = ids[:SEARCH_PAGE_SIZE]
+
+    posts_by_id = (
+        Post.objects.select_related("user")
+        .defer("content")
+        .with_like_state(request.user)
+        .in_bulk(ids)
+    )
+    posts = merge_pending_likes(request.user, [posts_by_id[pk] for pk in ids if pk in posts_by_id])
+
+    return render(request, "posts/search.html", {
+        "query": query,
+        "posts": posts,
+        "page": page,
+        "has_next": has_next,
+    })
+
 class BlogPostCreate(LoginRequiredMixin, CreateView):
     model = Post
     template_name = "posts/post_create.html"
-    fields = ["title", "content"]
+    form_class = PostForm
     success_url = reverse_lazy("index")
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        return super().form_valid(form)
+        # Le post et les statistiques de son auteur sont enregistrés ensemble
+        with transaction.atomic():
+            return super().form_valid(form)
 
 class BlogPostEdit(LoginRequiredMixin, UpdateView):
     model = Post
     template_name = "posts/post_update.html"
-    fields = ["title", "content"]
+    form_class = PostForm
     success_url = reverse_lazy("index")
 
     def get_queryset(self):
@@ -48,29 +163,87 @@ class BlogPostDelete(LoginRequiredMixin, DeleteView):
 
 
 @login_required
+@conditional_view(like_status_etag)
 def get_like_status(request, post_id):
     """Vue pour récupérer l'état du like d'un post"""
-    post = get_object_or_404(Post, id=post_id)
-    liked = post.is_liked_by_user(request.user)
-    
+    post = get_object_or_404(Post.objects.with_like_state(request.user), id=post_id)
+    merge_pending_likes(request.user, [post])
+
     return JsonResponse({
-        'liked': liked,
-        'likes_count': post.get_likes_count()
+        'liked': post.liked,
+        'likes_count': post.likes_count
     })
 
+MAX_LIKE_STATUS_IDS = 100
+
 @login_required
-@require_POST
-def toggle_like(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    
+@conditional_view(likes_status_etag)
+def get_likes_status(request):
+    """Vue pour récupérer en une requête l'état des likes de plusieurs posts (?ids=1,2,3)"""
     try:
-        like = Like.objects.get(user=request.user, post=post)
-        like.delete()
+        post_ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk]
+    except ValueError:
+        return JsonResponse({'error': 'Identifiants invalides'}, status=400)
+    post_ids = post_ids[:MAX_LIKE_STATUS_IDS]
+
+    posts = merge_pending_likes(
+        request.user,
+        list(Post.objects.filter(pk__in=post_ids).only('id', 'likes_count').with_like_state(request.user)),
+    )
+
+    return JsonResponse({
+        'posts': {
+            str(post.pk): {'liked': post.liked, 'likes_count': post.likes_count}
+            for post in posts
+        }
+    })
+
+@login_required
+@ratelimit("like", key=user_key)
+@require_http_methods(["POST", "PUT", "DELETE"])
+def toggle_like(request, post_id):
+    """
+    POST inverse l'état du like ; PUT (liker) et DELETE (retirer le like) sont
+    idempotents et peuvent être rejoués sans risque.
+    """
+    if like_buffer.is_enabled():
+        # Mode write-behind : l'intention est journalisée, la base est mise à jour par lots
+        liked = {"PUT": True, "DELETE": False}.get(request.method)
+        liked, likes_count = like_buffer.queue_like(request.user, post_id, liked)
+    elif request.method == "PUT":
+        liked = True
+        _, likes_count = add_like(request.user, post_id)
+    elif request.method == "DELETE":
         liked = False
-    except Like.DoesNotExist:
-       Like.objects.create(user=request.user, post=post)
-       liked = True
+        _, likes_count = remove_like(request.user, post_id)
+    else:
+        liked, likes_count = toggle_post_like(request.user, post_id)
+
+    if likes_count is None:
+        raise Http404("Post introuvable")
+
     return JsonResponse({
         "liked": liked,
-        "likes_count": post.likes.count(),
-        })
\ No newline at end of file
+        "likes_count": likes_count,
+        })
+
+
+@user_passes_test(lambda user: user.is_staff)
+def ratelimit_stats(request):
+    """Compteurs des requêtes rejetées par la limitation de débit, par portée"""
+    return JsonResponse({"shed": shed_counts()})
+
+
+@user_passes_test(lambda user: user.is_staff)
+@require_http_methods(["POST"])
+def import_posts_view(request):
+    """
+    Import de posts en masse (staff) : corps JSON ou NDJSON, voir `blog.importer`.
+    Les lignes sans auteur sont attribuées à l'utilisateur connecté.
+    """
+    try:
+        # La requête est lue ligne à ligne : le NDJSON n'est jamais chargé en entier
+        result = import_posts(request, default_author=request.user)
+    except ImportFormatError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+    return JsonResponse(result.as_dict())
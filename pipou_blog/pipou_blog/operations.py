@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    `AddIndex` construit avec `CREATE INDEX CONCURRENTLY` sous PostgreSQL, pour ne
+    pas bloquer les écritures sur une table volumineuse pendant la construction.
+    Les autres moteurs utilisent l'opération standard. La migration qui l'emploie
+    doit déclarer `atomic = False`.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+    def describe(self):
+        return super().describe() + " (concurrently on PostgreSQL)"
+
+
+class AddConstraintConcurrently(migrations.AddConstraint):
+    """
+    `AddConstraint` pour une contrainte unique portée par un index (expressions,
+    condition) : construite avec `CREATE UNIQUE INDEX CONCURRENTLY` sous
+    PostgreSQL. Les autres moteurs utilisent l'opération standard. La migration
+    qui l'emploie doit déclarer `atomic = False`.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            # Une construction concurrente interrompue laisse un index invalide du même nom
+            schema_editor.execute(schema_editor._delete_index_sql(model, self.constraint.name, concurrently=True), params=None)
+            statement = self.constraint.create_sql(model, schema_editor)
+            statement.template = statement.template.replace(
+                'CREATE UNIQUE INDEX', 'CREATE UNIQUE INDEX CONCURRENTLY', 1
+            )
+            schema_editor.execute(statement, params=None)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(schema_editor._delete_index_sql(model, self.constraint.name, concurrently=True), params=None)
+
+    def describe(self):
+        return super().describe() + " (concurrently on PostgreSQL)"
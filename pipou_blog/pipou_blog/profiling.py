@@ -0,0 +1,174 @@
+"""
+Profilage par requête : temps passé en SQL (nombre et durée), dans le rendu des
+templates, dans le cache et dans le reste du code (vue et middlewares).
+
+Une requête est profilée si elle est tirée au sort (`BLOG_PROFILING_SAMPLE_RATE`,
+de 0 à 1) ou, avec `BLOG_PROFILING_STAFF`, si elle vient d'un membre du staff.
+Le résultat est :
+
+- écrit sur le logger `pipou_blog.profiling`, une ligne JSON par requête tirée
+  au sort ;
+- ajouté à la réponse dans un en-tête `Server-Timing` pour le staff, lisible
+  dans l'onglet réseau des navigateurs.
+
+Les durées sont exclusives : une requête SQL exécutée pendant le rendu d'un
+template compte en SQL, pas en template. `view` est le reste du temps total.
+
+Sans tirage ni profilage du staff, le middleware se retire de la chaîne au
+démarrage (`MiddlewareNotUsed`) : aucun coût. Sinon, une requête non profilée
+coûte un tirage aléatoire ; les sondes (templates, cache) ne font qu'une
+lecture de variable de contexte hors des requêtes profilées.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ('sql', 'template', 'cache')
+CACHE_METHODS = (
+    'add', 'get', 'set', 'touch', 'delete', 'get_many', 'get_or_set', 'has_key',
+    'incr', 'decr', 'set_many', 'delete_many', 'clear',
+)
+
+_active = ContextVar('pipou_blog_profile', default=None)
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(CATEGORIES, 0.0)
+        self.counts = dict.fromkeys(CATEGORIES, 0)
+        # Mesures en cours : [catégorie, temps passé dans des mesures imbriquées]
+        self.stack = []
+
+    def measure(self, category, func, *args, **kwargs):
+        if self.stack and self.stack[-1][0] == category:
+            # Appel réentrant (include, get_or_set) : déjà compté par l'appel englobant
+            return func(*args, **kwargs)
+        self.stack.append([category, 0.0])
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _, nested = self.stack.pop()
+            self.durations[category] += elapsed - nested
+            self.counts[category] += 1
+            if self.stack:
+                self.stack[-1][1] += elapsed
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        return self.measure('sql', execute, sql, params, many, context)
+
+    def summary(self):
+        total = (time.perf_counter() - self.started) * 1000
+        timings = {category: self.durations[category] * 1000 for category in CATEGORIES}
+        timings['view'] = max(0.0, total - sum(timings.values()))
+        timings['total'] = total
+        return timings
+
+
+def profiled(category, func):
+    """Sonde : mesure `func` dans la requête profilée en cours, sinon l'appelle tel quel"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        return profile.measure(category, func, *args, **kwargs)
+    wrapper.profiled = True
+    return wrapper
+
+
+def install_template_probe():
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = profiled('template', Template.render)
+
+
+def install_cache_probes():
+    """Les instances de cache sont propres à chaque thread : sondées à leur premier usage profilé"""
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if getattr(cache, '_profiled', False):
+            continue
+        for name in CACHE_METHODS:
+            setattr(cache, name, profiled('cache', getattr(cache, name)))
+        cache._profiled = True
+
+
+def server_timing(timings, profile):
+    descriptions = {
+        'sql': f"SQL ({profile.counts['sql']})",
+        'template': f"Templates ({profile.counts['template']})",
+        'cache': f"Cache ({profile.counts['cache']})",
+        'view': "Vue",
+        'total': "Total",
+    }
+    return ', '.join(
+        f'{name};desc="{description}";dur={timings[name]:.2f}' for name, description in descriptions.items()
+    )
+
+
+class ProfilingMiddleware:
+    """À placer en tête de `MIDDLEWARE` pour couvrir les autres middlewares"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'BLOG_PROFILING_SAMPLE_RATE', 0.0)
+        self.profile_staff = getattr(settings, 'BLOG_PROFILING_STAFF', False)
+        if self.sample_rate <= 0 and not self.profile_staff:
+            raise MiddlewareNotUsed
+        install_template_probe()
+
+    def __call__(self, request):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        # Le staff ne se reconnaît qu'après l'authentification : toute requête de
+        # session est profilée, le résultat est ignoré s'il ne s'agit pas du staff
+        if not sampled and not (self.profile_staff and settings.SESSION_COOKIE_NAME in request.COOKIES):
+            return self.get_response(request)
+
+        install_cache_probes()
+        profile = Profile()
+        token = _active.set(profile)
+        try:
+            with ExitStack() as stack:
+                # Toutes les connexions, y compris celles que ce thread n'a pas encore
+                # ouvertes : sinon la première requête d'un nouveau thread ne compterait rien
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            _active.reset(token)
+
+        timings = profile.summary()
+        user = getattr(request, 'user', None)
+        if self.profile_staff and user is not None and user.is_staff:
+            response['Server-Timing'] = server_timing(timings, profile)
+        if sampled:
+            self.log(request, response, timings, profile)
+        return response
+
+    def log(self, request, response, timings, profile):
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **{f'{name}_ms': round(value, 2) for name, value in timings.items()},
+            'sql_count': profile.counts['sql'],
+            'template_count': profile.counts['template'],
+            'cache_count': profile.counts['cache'],
+        }
+        logger.info(json.dumps(record), extra={'profile': record})
@@ -0,0 +1,88 @@
+"""
+Budgets de requêtes SQL par nom d'URL.
+
+Chaque vue nommée des applications `blog`, `authentication` et `user_profile`
+a ici soit un budget (nombre maximal de requêtes pour la requête HTTP décrite),
+soit une raison d'exemption. `pipou_blog.tests.QueryBudgetTests` appelle chaque
+vue sur un jeu de données d'une ligne puis de 100 lignes (posts de l'auteur,
+likes du post, likes du visiteur) et échoue si le budget est dépassé ou si le
+nombre de requêtes varie avec le volume : une boucle N+1 est détectée dès son
+introduction.
+
+Les valeurs des requêtes décrites (`args`, `query`, `data`) désignent des
+attributs du jeu de données de test : `post`, `author`, `viewer`, `post_ids`.
+
+Un budget est un entier, valable pour tous les moteurs, ou un dictionnaire par
+moteur (`connection.vendor`) quand le nombre de requêtes en dépend : l'index de
+recherche coûte une requête `UPDATE` sous PostgreSQL, mais une lecture des posts
+puis la réécriture de la table FTS5 sous SQLite (voir `blog.search`). Le test
+s'exécute sur tous les moteurs et échoue sur un moteur sans budget déclaré.
+"""
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    queries: int | dict
+    method: str = 'GET'
+    # Statut attendu : une redirection vers la connexion ne mesurerait rien
+    status: int = 200
+    # None : visiteur anonyme ; sinon 'viewer', 'author' ou 'staff'
+    user: str = None
+    args: tuple = ()
+    query: dict = field(default_factory=dict)
+    # Formulaire (dict) ou corps brut accompagné de content_type
+    data: dict | str = field(default_factory=dict)
+    content_type: str = None
+
+    def limit(self, vendor):
+        """Budget sur le moteur `vendor`, None s'il n'en a pas"""
+        if isinstance(self.queries, dict):
+            return self.queries.get(vendor)
+        return self.queries
+
+
+QUERY_BUDGETS = {
+    # blog
+    'index': QueryBudget(2),
+    'feed_fragment': QueryBudget(2),
+    'search': QueryBudget(2, query={'q': 'pommes'}),
+    'trending': QueryBudget(1),
+    'post_detail': QueryBudget(3, args=('post',)),
+    'post_likers': QueryBudget(2, args=('post',)),
+    'import_posts': QueryBudget(
+        {'sqlite': 9, 'postgresql': 7}, method='POST', user='staff', content_type='application/x-ndjson',
+        data='{"title": "Importé", "content": "Tarte aux pommes"}\n',
+    ),
+    'create': QueryBudget({'sqlite': 9, 'postgresql': 7}, method='POST', status=302, user='author', data={'title': 'Nouveau', 'content': 'Tarte aux pommes'}),
+    'edit': QueryBudget({'sqlite': 8, 'postgresql': 6}, method='POST', status=302, user='author', args=('post',), data={'title': 'Modifié', 'content': 'Tarte'}),
+    'delete': QueryBudget({'sqlite': 12, 'postgresql': 11}, method='POST', status=302, user='author', args=('post',)),
+    'like': QueryBudget(13, method='POST', user='viewer', args=('post',)),
+    'likes_status': QueryBudget(4, user='viewer', query={'ids': 'post_ids'}),
+    'like_status': QueryBudget(4, user='viewer', args=('post',)),
+    'ratelimit_stats': QueryBudget(2, user='staff'),
+    'feed_rss': QueryBudget(1),
+    'feed_atom': QueryBudget(1),
+    'author_feed_rss': QueryBudget(2, args=('author',)),
+    'author_feed_atom': QueryBudget(2, args=('author',)),
+    # user_profile
+    'profile': QueryBudget(6, user='viewer', args=('author',)),
+    'edit_profile': QueryBudget(2, user='viewer'),
+    'delete_account': QueryBudget(18, method='POST', status=302, user='viewer'),
+    # authentication (« login » est redirigé vers la connexion d'urgence au niveau du projet)
+    'login': QueryBudget(0, status=302),
+    'emergency_login': QueryBudget(9, query={'email': 'viewer@example.com', 'password': 'testpass'}),
+    'logout': QueryBudget(4, method='POST', status=302, user='viewer'),
+    'register': QueryBudget(13, method='POST', status=302, data={
+        'username': 'nouveau', 'email': 'nouveau@example.com', 'first_name': 'Nou', 'last_name': 'Veau',
+        'password1': 'Un-mot-de-passe-solide-42', 'password2': 'Un-mot-de-passe-solide-42',
+    }),
+}
+
+EXEMPT = {
+    'debug_login': "vue de diagnostic",
+    'test_post': "vue de diagnostic",
+    'test_no_csrf': "vue de diagnostic",
+    'simple_login_test': "vue de diagnostic",
+    'vercel_bypass_login': "vue de diagnostic",
+}
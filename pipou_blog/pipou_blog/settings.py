@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Pour servir les fichiers statiques
+    'pipou_blog.profiling.ProfilingMiddleware',  # Inactif sauf BLOG_PROFILING_* (voir pipou_blog.profiling)
+    'django.middleware.http.ConditionalGetMiddleware',  # 304 pour les réponses portant un ETag
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -225,4 +227,64 @@ if not DEBUG:
     
 else:
     # Configuration pour le développement local
-    pass  # Utiliser les configurations par défaut
\ No newline at end of file
+    pass  # Utiliser les configurations par défaut
+
+# Cache partagé entre les processus et les instances : limitation de débit, générations
+# du cache de pages et invalidation des flux (voir blog.cache et blog.ratelimit) n'ont
+# d'effet global que si toutes les instances voient le même cache
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    # Cache en mémoire du processus : convient à un seul processus (développement)
+    if not DEBUG:
+        print("ATTENTION: REDIS_URL n'est pas défini, cache et limitation de débit propres à chaque instance!")
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Durée (secondes) du cache des pages complètes servies aux visiteurs anonymes
+BLOG_PAGE_CACHE_TIMEOUT = int(os.getenv('BLOG_PAGE_CACHE_TIMEOUT', '300'))
+
+# Mode write-behind des likes (voir blog.like_buffer) : les likes sont journalisés
+# localement puis reportés par lots avec `manage.py flush_like_buffer --interval 1`
+BLOG_LIKE_WRITE_BEHIND = os.getenv('BLOG_LIKE_WRITE_BEHIND', 'False').lower() == 'true'
+BLOG_LIKE_JOURNAL_PATH = os.getenv('BLOG_LIKE_JOURNAL_PATH', str(BASE_DIR / 'like_journal.sqlite3'))
+
+# Limitation de débit par seau à jetons (voir blog.ratelimit) : 'N/s', 'N/m', 'N/h' ou 'N/d'
+BLOG_RATELIMIT_ENABLED = os.getenv('BLOG_RATELIMIT_ENABLED', 'True').lower() == 'true'
+BLOG_RATELIMITS = {
+    'like': os.getenv('BLOG_RATELIMIT_LIKE', '60/m'),
+    'login': os.getenv('BLOG_RATELIMIT_LOGIN', '10/m'),
+    'register': os.getenv('BLOG_RATELIMIT_REGISTER', '5/h'),
+}
+# Derrière un proxy qui réécrit X-Forwarded-For, l'adresse du client en est la première.
+# Activé par défaut sur Vercel (variable VERCEL), où REMOTE_ADDR est celle du proxy
+BLOG_RATELIMIT_TRUST_FORWARDED_FOR = os.getenv(
+    'BLOG_RATELIMIT_TRUST_FORWARDED_FOR', 'True' if os.getenv('VERCEL') else 'False'
+).lower() == 'true'
+
+# Profilage par requête (voir pipou_blog.profiling) : proportion des requêtes journalisées
+# sur le logger `pipou_blog.profiling`, et en-tête Server-Timing sur les réponses au staff
+BLOG_PROFILING_SAMPLE_RATE = float(os.getenv('BLOG_PROFILING_SAMPLE_RATE', '0'))
+BLOG_PROFILING_STAFF = os.getenv('BLOG_PROFILING_STAFF', 'False').lower() == 'true'
+
+# Les lignes de profilage (JSON) sortent sur la console, collectée par `vercel logs`
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'pipou_blog.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'pipou_blog.profiling.ProfilingMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # 304 pour les réponses portant un ETag
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -160,6 +162,9 @@ AUTH_USER_MODEL = 'authentication.User'
 LOGIN_REDIRECT_URL = 'index'
 LOGOUT_REDIRECT_URL = 'login'
 
+# La limitation de débit est activée explicitement par les tests qui la couvrent
+BLOG_RATELIMIT_ENABLED = False
+
 # Désactiver la migration pour les tests pour améliorer la performance
 class DisableMigrations:
     def __contains__(self, item):
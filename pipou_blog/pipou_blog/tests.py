@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from authentication import urls as authentication_urls
+from blog import urls as blog_urls
+from blog.models import Like, Post
+from blog.search import index_posts
+from pipou_blog.profiling import Profile, ProfilingMiddleware
+from pipou_blog.query_budgets import EXEMPT, QUERY_BUDGETS
+from user_profile import urls as user_profile_urls
+
+User = get_user_model()
+
+SIZES = (1, 100)
+
+
+def url_names(*modules):
+    return {
+        pattern.name
+        for module in modules
+        for pattern in module.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    }
+
+
+def build_dataset(rows):
+    """Auteur de `rows` posts, `rows` likes sur son dernier post, visiteur ayant liké `rows` posts"""
+    staff = User.objects.create_user(username='staff', email='staff@example.com', password='testpass', is_staff=True)
+    author = User.objects.create_user(username='author', email='author@example.com', password='testpass')
+    viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='testpass')
+    likers = User.objects.bulk_create(
+        User(username=f'liker{i}', email=f'liker{i}@example.com') for i in range(rows - 1)
+    )
+
+    posts = Post.objects.bulk_create(
+        Post(user=author, title=f'Post {i}', content='Tarte aux pommes', excerpt='Tarte aux pommes', word_count=3)
+        for i in range(rows)
+    )
+    index_posts(Post.objects.all())
+    post = posts[-1]
+    Like.objects.bulk_create([Like(user=viewer, post=liked) for liked in posts])
+    Like.objects.bulk_create([Like(user=liker, post=post) for liker in likers])
+    Post.objects.filter(pk__in=[p.pk for p in posts]).update(likes_count=1)
+    Post.objects.filter(pk=post.pk).update(likes_count=rows)
+    User.objects.filter(pk=author.pk).update(post_count=rows, likes_received=2 * rows - 1)
+
+    return SimpleNamespace(
+        staff=staff, author=author, viewer=viewer, post=post,
+        post_ids=','.join(str(p.pk) for p in posts[:100]),
+    )
+
+
+# Le hachage des mots de passe n'a pas d'effet sur les requêtes : autant le rendre rapide
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(TestCase):
+    def resolve(self, value, dataset):
+        if isinstance(value, str) and hasattr(dataset, value):
+            value = getattr(dataset, value)
+        return getattr(value, 'pk', value)
+
+    def count_queries(self, name, budget, dataset):
+        client = Client()
+        if budget.user:
+            client.force_login(getattr(dataset, budget.user))
+        url = reverse(name, args=[self.resolve(arg, dataset) for arg in budget.args])
+        query = {key: self.resolve(value, dataset) for key, value in budget.query.items()}
+        if query:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in query.items())
+
+        # Cache vidé : c'est le coût d'une page non servie depuis le cache qui est mesuré
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            if budget.method == 'GET':
+                response = client.get(url)
+            elif budget.content_type:
+                response = client.post(url, budget.data, content_type=budget.content_type)
+            else:
+                response = client.post(url, budget.data)
+        self.assertEqual(response.status_code, budget.status, f"{name} : statut {response.status_code}")
+        return [query['sql'] for query in queries.captured_queries]
+
+    def test_every_view_has_a_budget_or_an_exemption(self):
+        names = url_names(blog_urls, authentication_urls, user_profile_urls)
+        self.assertEqual(names - set(QUERY_BUDGETS) - set(EXEMPT), set())
+        self.assertEqual(set(QUERY_BUDGETS) & set(EXEMPT), set())
+
+    def test_every_budget_covers_this_engine(self):
+        missing = {name for name, budget in QUERY_BUDGETS.items() if budget.limit(connection.vendor) is None}
+        self.assertEqual(missing, set(), f"budgets à déclarer pour {connection.vendor}")
+
+    def test_views_stay_within_budget_at_every_size(self):
+        for name, budget in QUERY_BUDGETS.items():
+            limit = budget.limit(connection.vendor)
+            if limit is None:
+                # Signalé par test_every_budget_covers_this_engine
+                continue
+            counts = {}
+            for rows in SIZES:
+                with self.subTest(view=name, rows=rows):
+                    # Chaque mesure part d'une base vide
+                    with transaction.atomic():
+                        sql = self.count_queries(name, budget, build_dataset(rows))
+                        transaction.set_rollback(True)
+                    counts[rows] = len(sql)
+                    self.assertLessEqual(
+                        len(sql), limit,
+                        f"{name} ({rows} lignes) : {len(sql)} requêtes pour un budget de {limit}\n" + '\n'.join(sql),
+                    )
+            with self.subTest(view=name):
+                self.assertEqual(len(set(counts.values())), 1, f"{name} : le nombre de requêtes dépend du volume {counts}")
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', email='staff@example.com', password='testpass', is_staff=True)
+        cls.member = User.objects.create_user(username='member', email='member@example.com', password='testpass')
+        Post.objects.create(user=cls.member, title='Tarte', content='Tarte aux pommes')
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user=None):
+        # Client créé sous les réglages du test : il charge alors les middlewares
+        client = Client()
+        if user:
+            client.force_login(user)
+        return client
+
+    def get(self, user=None):
+        return self.client_for(user).get(reverse('index'))
+
+    def timings(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    @override_settings(BLOG_PROFILING_STAFF=True)
+    def test_staff_responses_carry_server_timing(self):
+        client = self.client_for(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('index'))
+        query_count = len(queries)
+
+        timings = self.timings(response)
+        self.assertEqual(list(timings), ['sql', 'template', 'cache', 'view', 'total'])
+        self.assertEqual(timings['sql']['desc'], f'"SQL ({query_count})"')
+        self.assertNotEqual(timings['template']['desc'], '"Templates (0)"')
+        durations = {name: float(entry['dur']) for name, entry in timings.items()}
+        self.assertAlmostEqual(
+            durations['sql'] + durations['template'] + durations['cache'] + durations['view'], durations['total'], delta=0.05,
+        )
+
+    @override_settings(BLOG_PROFILING_STAFF=True)
+    def test_other_responses_have_no_server_timing(self):
+        self.assertFalse(self.get(self.member).has_header('Server-Timing'))
+        self.assertFalse(self.get(None).has_header('Server-Timing'))
+
+    @override_settings(BLOG_PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_logged(self):
+        with self.assertLogs('pipou_blog.profiling', 'INFO') as logs:
+            response = self.get(None)
+        # Un échantillon journalisé n'expose rien au client
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'index')
+        self.assertEqual((record['method'], record['status']), ('GET', 200))
+        self.assertGreater(record['sql_count'], 0)
+        self.assertGreater(record['cache_count'], 0)
+        for name in ('sql', 'template', 'cache', 'view', 'total'):
+            self.assertGreaterEqual(record[f'{name}_ms'], 0)
+
+    def test_disabled_by_default(self):
+        with self.assertNoLogs('pipou_blog.profiling'):
+            response = self.get(self.staff)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(BLOG_PROFILING_STAFF=True)
+    def test_first_request_of_a_new_thread_counts_its_queries(self):
+        def view(request):
+            with connections['default'].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return HttpResponse()
+
+        middleware = ProfilingMiddleware(view)
+        request = RequestFactory().get('/', HTTP_COOKIE='sessionid=x')
+        request.user = self.staff
+        responses = []
+
+        def serve():
+            try:
+                responses.append(middleware(request))
+            finally:
+                connections.close_all()
+
+        # Un thread neuf, comme runserver en démarre un par requête
+        thread = threading.Thread(target=serve)
+        thread.start()
+        thread.join()
+        # Sans sonde sur la connexion du thread, la requête passerait pour du temps de vue
+        self.assertNotIn('desc="SQL (0)"', responses[0]['Server-Timing'])
+
+    def test_nested_measures_are_exclusive(self):
+        profile = Profile()
+
+        def render():
+            time.sleep(0.01)
+            profile.measure('sql', time.sleep, 0.02)
+            # Rendu imbriqué (include) : compté une seule fois
+            profile.measure('template', time.sleep, 0)
+
+        profile.measure('template', render)
+        self.assertEqual(profile.counts, {'sql': 1, 'template': 1, 'cache': 0})
+        self.assertGreaterEqual(profile.durations['sql'], 0.02)
+        self.assertLess(profile.durations['template'], 0.02)
+        self.assertGreaterEqual(profile.durations['template'], 0.01)
@@ -9,6 +9,8 @@ import os
 from django.conf import settings
 from django.conf.urls.static import static
 
+from blog.ratelimit import ratelimit
+
 def simple_test(request):
     """Vue de test ultra-simple"""
     try:
@@ -73,82 +75,30 @@ def load_fixtures(request):
         return HttpResponse(f"❌ Erreur lors du chargement des fixtures: {str(e)}")
 
 def load_fixtures_safe(request):
-    """Charger les fixtures en évitant les conflits de ContentType"""
+    """Charger les fixtures en flux, sans doublons ni conflits de ContentType"""
     try:
-        import json
-        from django.contrib.contenttypes.models import ContentType
         from authentication.models import User
+        from blog.fixture_loader import load_fixture
         from blog.models import Post
-        
-        # Lire le fichier de fixtures
-        with open('fixtures/all_data.json', 'r', encoding='utf-8') as f:
-            fixtures_data = json.load(f)
-        
-        results = []
-        user_id_mapping = {}  # Mapping ancien_id -> nouveau_user
-        
-        # Première passe : créer les utilisateurs et construire le mapping
-        for item in fixtures_data:
-            model_name = item['model']
-            
-            if model_name == 'authentication.user':
-                fields = item['fields']
-                old_id = item['pk']
-                
-                user, created = User.objects.get_or_create(
-                    username=fields['username'],
-                    defaults={
-                        'email': fields['email'],
-                        'first_name': fields.get('first_name', ''),
-                        'last_name': fields.get('last_name', ''),
-                        'is_staff': fields.get('is_staff', False),
-                        'is_superuser': fields.get('is_superuser', False),
-                    }
-                )
-                
-                # Ajouter au mapping
-                user_id_mapping[old_id] = user
-                
-                if created:
-                    results.append(f"✅ Utilisateur créé: {fields['username']} (ID: {old_id} -> {user.id})")
-                else:
-                    results.append(f"⚠️ Utilisateur existe déjà: {fields['username']} (ID: {old_id} -> {user.id})")
-        
-        # Deuxième passe : créer les articles avec le bon mapping d'utilisateurs
-        for item in fixtures_data:
-            model_name = item['model']
-            
-            if model_name == 'blog.post':
-                fields = item['fields']
-                old_user_id = fields['user']
-                
-                if old_user_id in user_id_mapping:
-                    user = user_id_mapping[old_user_id]
-                    
-                    post, created = Post.objects.get_or_create(
-                        title=fields['title'],
-                        defaults={
-                            'content': fields['content'],
-                            'user': user,
-                            'created_at': fields.get('created_at'),
-                        }
-                    )
-                    
-                    if created:
-                        results.append(f"✅ Article créé: {fields['title']} (par {user.username})")
-                    else:
-                        results.append(f"⚠️ Article existe déjà: {fields['title']}")
-                else:
-                    results.append(f"❌ Utilisateur ID {old_user_id} introuvable pour l'article: {fields['title']}")
-        
+
+        # Lecture incrémentale et écritures par lots (voir blog.fixture_loader)
+        with open('fixtures/all_data.json', 'rb') as f:
+            result = load_fixture(f)
+
+        skipped = ', '.join(f"{model} ({count})" for model, count in sorted(result.skipped.items()))
+
         return HttpResponse(f"""
 🎯 Chargement sécurisé des fixtures terminé!
 
 📊 Résultats:
-{chr(10).join(results)}
+✅ Utilisateurs créés: {result.users_created}
+⚠️ Utilisateurs existant déjà: {result.users_existing}
+✅ Articles créés: {result.posts_created}
+⚠️ Articles existant déjà: {result.posts_existing}
+❌ Articles sans auteur connu: {result.posts_orphaned}
+➖ Objets ignorés: {skipped or 'aucun'}
 
 📈 Statistiques:
-- Utilisateurs dans le mapping: {len(user_id_mapping)}
 - Total utilisateurs: {User.objects.count()}
 - Total articles: {Post.objects.count()}
 
@@ -428,7 +378,7 @@ def list_posts(request):
     try:
         from blog.models import Post
         
-        posts = Post.objects.all().order_by('-created_at')
+        posts = Post.objects.select_related('user').defer('content').order_by('-created_at')
         
         posts_html = ""
         for post in posts:
@@ -437,8 +387,8 @@ def list_posts(request):
                 <td>{post.id}</td>
                 <td><strong>{post.title[:50]}{'...' if len(post.title) > 50 else ''}</strong></td>
                 <td>{post.user.username}</td>
-                <td>{post.content[:100]}{'...' if len(post.content) > 100 else ''}</td>
-                <td>{post.likes}</td>
+                <td>{post.excerpt}</td>
+                <td>{post.likes_count}</td>
                 <td>{post.created_at.strftime('%d/%m/%Y %H:%M')}</td>
             </tr>
             """
@@ -462,7 +412,7 @@ def list_posts(request):
         <body>
             <div class="header">
                 <h1>📝 Gestion des articles</h1>
-                <p>Total: {posts.count()} articles</p>
+                <p>Total: {len(posts)} articles</p>
             </div>
             
             <div style="margin-bottom: 20px;">
@@ -1233,6 +1183,7 @@ def test_login_manual(request):
     """
     return HttpResponse(html)
 
+@ratelimit('login')
 def emergency_login(request):
     """Connexion d'urgence directe - contournement complet"""
     from django.contrib.auth import login, get_user_model
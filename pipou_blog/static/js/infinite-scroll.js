@@ -0,0 +1,40 @@
+// Défilement infini du fil : charge les cartes suivantes sous forme de fragment HTML
+document.addEventListener('DOMContentLoaded', function() {
+    const feed = document.querySelector('.post_view-content[data-feed-url]');
+    const sentinel = document.querySelector('.feed-sentinel');
+    if (!feed || !sentinel || !('IntersectionObserver' in window)) return;
+
+    let nextCursor = feed.dataset.nextCursor;
+    let loading = false;
+
+    // Le lien « Plus anciens » reste disponible sans JavaScript
+    const nextLink = document.querySelector('.pagination-next');
+    if (nextLink) nextLink.hidden = true;
+
+    const observer = new IntersectionObserver(entries => {
+        if (!entries.some(entry => entry.isIntersecting) || loading || !nextCursor) return;
+        loading = true;
+
+        fetch(`${feed.dataset.feedUrl}?cursor=${encodeURIComponent(nextCursor)}`, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        })
+            .then(response => {
+                nextCursor = response.headers.get('X-Next-Cursor');
+                return response.text();
+            })
+            .then(html => {
+                feed.insertAdjacentHTML('beforeend', html);
+                if (!nextCursor) observer.disconnect();
+            })
+            .catch(error => {
+                console.error('Erreur lors du chargement des articles suivants:', error);
+                if (nextLink) nextLink.hidden = false;
+                observer.disconnect();
+            })
+            .finally(() => {
+                loading = false;
+            });
+    }, { rootMargin: '600px' });
+
+    observer.observe(sentinel);
+});
@@ -1,73 +1,54 @@
 document.addEventListener('DOMContentLoaded', function() {
-    const likeButtons = document.querySelectorAll('.like-btn');
+    // Délégation d'événements : fonctionne aussi pour les cartes ajoutées par le défilement infini
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('.like-btn');
+        if (button) {
+            toggleLike(button);
+            return;
+        }
 
-    document.querySelectorAll('.post_container').forEach(el => {
-      el.addEventListener('click', function(e) {
-        if (e.target.closest('button, a')) return;
-        window.location.href = el.dataset.href;
-      });
+        const card = e.target.closest('.post_container');
+        if (card && !e.target.closest('button, a, form')) {
+            window.location.href = card.dataset.href;
+        }
     });
 
-    // Charger l'état initial des likes pour chaque bouton
-    likeButtons.forEach(button => {
-        const postId = button.dataset.postId;
-
-        // Récupérer l'état initial
-        fetch(`/blog/like-status/${postId}/`, {
-            method: 'GET',
-        })
-            .then(response => response.json())
-            .then(data => {
-                const icon = button.querySelector('.like-icon');
-                const count = button.querySelector('.like-count');
-
-                if (data.liked) {
-                    icon.textContent = '💙';
-                    button.dataset.liked = 'true';
-                } else {
-                    icon.textContent = '🤍';
-                    button.dataset.liked = 'false';
-                }
-                count.textContent = data.likes_count;
-            })
-            .catch(error => {
-                console.error('Erreur lors du chargement de l\'état des likes:', error);
-            });
+    // L'état initial (icône et compteur) est rendu côté serveur
+});
 
-        // Gérer les clics
-        button.addEventListener('click', function() {
-          const postId = this.dataset.postId;
+function toggleLike(button) {
+    const postId = button.dataset.postId;
+    // PUT et DELETE sont idempotents : un double clic ou une requête rejouée ne change pas l'état final
+    const method = button.dataset.liked === 'true' ? 'DELETE' : 'PUT';
 
-          fetch(`/blog/like/${postId}/`, {
-              method: 'POST',
-              headers: {
-                  'X-CSRFToken': getCookie('csrftoken'),
-                  'Content-Type': 'application/json',
-              },
-          })
-          .then(response => response.json())
-          .then(data => {
-              // Mettre à jour l'icône
-              const icon = this.querySelector('.like-icon');
-              const count = this.querySelector('.like-count');
+    fetch(`/blog/like/${postId}/`, {
+        method: method,
+        headers: {
+            'X-CSRFToken': getCookie('csrftoken'),
+            'Content-Type': 'application/json',
+        },
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Mettre à jour l'icône
+        const icon = button.querySelector('.like-icon');
+        const count = button.querySelector('.like-count');
 
-              if (data.liked) {
-                  icon.textContent = '💙';
-                  this.dataset.liked = 'true';
-              } else {
-                  icon.textContent = '🤍';
-                  this.dataset.liked = 'false';
-              }
+        if (data.liked) {
+            icon.textContent = '💙';
+            button.dataset.liked = 'true';
+        } else {
+            icon.textContent = '🤍';
+            button.dataset.liked = 'false';
+        }
 
-              // Mettre à jour le compteur
-              count.textContent = data.likes_count;
-          })
-          .catch(error => {
-              console.error('Erreur:', error);
-          });
-        });
+        // Mettre à jour le compteur
+        count.textContent = data.likes_count;
+    })
+    .catch(error => {
+        console.error('Erreur:', error);
     });
-});
+}
 
 // Fonction pour récupérer le token CSRF
 function getCookie(name) {
@@ -5,6 +5,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.messages import get_messages
 from authentication.models import User
 from user_profile.forms import UserProfileForm
+from blog.models import Post, Like
 import tempfile
 import os
 from PIL import Image
@@ -70,6 +71,66 @@ class UserProfileViewsTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, self.other_user.username)
 
+    def test_profile_view_conditional_get(self):
+        """Test de la revalidation du profil par ETag"""
+        self.client.login(email='test@example.com', password='testpass123')
+        url = reverse('profile', kwargs={'user_id': self.user.id})
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.user.biography = 'Nouvelle biographie'
+        self.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_etag_follows_author_stats(self):
+        """Un like sur un post hors de la page change les statistiques affichées"""
+        posts = [Post.objects.create(title=f'Post {i}', content='Contenu', user=self.other_user) for i in range(21)]
+        self.client.login(email='test@example.com', password='testpass123')
+        url = reverse('profile', kwargs={'user_id': self.other_user.id})
+        etag = self.client.get(url)['ETag']
+
+        # Le plus ancien post n'est pas sur la première page
+        Like.objects.create(user=self.user, post=posts[0])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def create_posts(self, count):
+        for i in range(count):
+            Post.objects.create(title=f'Post {i}', content='Contenu', user=self.other_user)
+
+    def test_profile_view_paginates_posts(self):
+        """Test de la pagination par curseur des posts du profil"""
+        self.create_posts(25)
+        self.client.login(email='test@example.com', password='testpass123')
+        url = reverse('profile', kwargs={'user_id': self.other_user.id})
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['user_posts']), 20)
+        self.assertContains(response, 'pagination-next')
+
+        response = self.client.get(url, {'cursor': response.context['page_obj'].next_cursor})
+        titles = [post.title for post in response.context['user_posts']]
+        self.assertEqual(titles, ['Post 4', 'Post 3', 'Post 2', 'Post 1', 'Post 0'])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_profile_view_query_budget(self):
+        """Le nombre de requêtes du profil ne dépend pas du nombre de posts ni de likes"""
+        self.client.login(email='test@example.com', password='testpass123')
+        url = reverse('profile', kwargs={'user_id': self.other_user.id})
+
+        self.create_posts(1)
+        with self.assertNumQueries(6):
+            self.client.get(url)
+
+        self.create_posts(60)
+        for post in Post.objects.all()[:10]:
+            Like.objects.create(user=self.user, post=post)
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
 
 @override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class EditProfileViewTestCase(TestCase):
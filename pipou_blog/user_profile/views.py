@@ -4,13 +4,38 @@ from django.contrib.auth import logout
 from .forms import UserProfileForm
 from authentication.models import User
 from blog.models import Post
+from blog.conditional import conditional_view, make_etag, viewer_key
+from blog.like_buffer import merge_pending_likes
+from blog.pagination import FEED_PAGE_SIZE, KeysetPaginator
+
+
+def profile_etag(request, user_id):
+    """Validateur du profil : auteur (date de mise à jour, statistiques) et versions des posts de la page"""
+    # Les statistiques changent par update(), sans toucher date_updated
+    author = User.objects.filter(id=user_id).values_list(
+        'date_updated', 'post_count', 'likes_received', 'last_post_at'
+    ).first()
+    if author is None:
+        return None
+    queryset = Post.objects.filter(user_id=user_id).only('id', 'created_at', 'version')
+    page = KeysetPaginator(queryset, FEED_PAGE_SIZE).get_page(request.GET.get('cursor'))
+    posts = [(post.pk, post.version) for post in page]
+    return make_etag('profile', user_id, author, viewer_key(request), posts, page.next_cursor, page.previous_cursor)
+
 
 @login_required
+@conditional_view(profile_etag)
 def profile_view(request, user_id):
     user_profile = get_object_or_404(User, id=user_id)
 
-    user_posts = Post.objects.filter(user=user_profile)
-    return render(request, 'user_profile/profile.html', {'user_profile': user_profile, "user_posts": user_posts})
+    # Une page de posts par curseur : le coût ne dépend pas du nombre de posts de l'auteur
+    queryset = Post.objects.filter(user=user_profile).select_related('user').defer('content').with_like_state(request.user)
+    page = KeysetPaginator(queryset, FEED_PAGE_SIZE).get_page(request.GET.get('cursor'))
+    return render(request, 'user_profile/profile.html', {
+        'user_profile': user_profile,
+        'user_posts': merge_pending_likes(request.user, page.object_list),
+        'page_obj': page,
+    })
 
 @login_required
 def edit_profile_view(request):